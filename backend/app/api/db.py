@@ -15,14 +15,14 @@ DATABASE_URL = os.environ.get("ASYNC_DATABASE_URL")
 
 engine = create_async_engine(DATABASE_URL, echo=True, future=True)
 
+# For code that manages its own session instead of depending on get_session
+AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
 async def init_db():
     async with engine.begin() as conn:
         # await conn.run_sync(SQLModel.metadata.drop_all)
         await conn.run_sync(SQLModel.metadata.create_all)
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with async_session() as session:
+    async with AsyncSessionLocal() as session:
         yield session
\ No newline at end of file
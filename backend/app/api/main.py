@@ -1,7 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.v1.routers import audios, translations, auth, utils
+from app.api.v1.routers import audios, translations, auth, utils, uploads, streams, jobs
 from app.api.v1.internal import admin
 
 
@@ -30,4 +30,7 @@ app.include_router(audios.router, prefix="/api/v1")
 app.include_router(translations.router, prefix="/api/v1")
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(utils.router, prefix="/api/v1")
+app.include_router(uploads.router, prefix="/api/v1")
+app.include_router(streams.router, prefix="/api/v1")
+app.include_router(jobs.router, prefix="/api/v1")
 app.include_router(admin.router, prefix="/api/v1")
\ No newline at end of file
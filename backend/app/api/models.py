@@ -1,8 +1,22 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from pydantic import EmailStr
+import os
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List, Literal
+
+# Largest file a chunked upload session accepts; single-shot uploads are capped by
+# nginx's client_max_body_size (100M)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+
+# Placeholder texts written into records while the worker is still processing them
+PENDING_TEXTS = ("Processing...", "Waiting for transcription...")
+
+
+def is_pending_text(text: Optional[str]) -> bool:
+    """True if a text field has not been filled by the worker yet."""
+    return text is None or text in PENDING_TEXTS
 
 
 class UserBase(SQLModel):
@@ -24,6 +38,89 @@ class UserAdminDisplay(UserBase):
     is_superuser: bool
 
 
+class LLMQuotaStatus(SQLModel):
+    model: str
+    rpm_limit: int
+    tpm_limit: int
+    requests_available: int
+    tokens_available: int
+    requests_last_minute: int
+    tokens_last_minute: int
+    throttled_last_minute: int
+    rpm_utilization: float
+    tpm_utilization: float
+
+
+class LLMCacheStats(SQLModel):
+    enabled: bool
+    hits: int
+    misses: int
+    hit_rate: float
+    entries: int
+    bytes_stored: int
+    max_bytes: int
+    evictions: int
+    latency_saved_seconds: float
+
+
+class LLMAnalysisStats(SQLModel):
+    structured_output: bool
+    structured: int
+    schema_failures: int
+    section_fallbacks: int
+    missing_sections: int
+
+
+class QueueDepth(SQLModel):
+    queue: str
+    depth: int  # Messages not yet taken by a worker
+    bulk: int  # Of which at bulk priority
+
+
+class SchedulerUser(SQLModel):
+    user_id: uuid.UUID
+    in_flight: int  # Runs admitted and not finished
+    in_flight_limit: int
+    waiting_interactive: int
+    waiting_bulk: int
+
+
+class ScheduledRun(SQLModel):
+    position: int  # 1 is admitted next
+    run_id: uuid.UUID
+    user_id: uuid.UUID
+    priority: str  # "interactive" or "bulk"
+
+
+class SchedulerStatus(SQLModel):
+    default_in_flight_limit: int
+    users: List[SchedulerUser]  # Users with runs waiting or in flight
+    waiting: List[ScheduledRun]
+
+
+class SchedulerLimitUpdate(SQLModel):
+    in_flight_limit: Optional[int] = Field(default=None, ge=1)  # None for the default
+
+
+class LLMBatch(SQLModel):
+    name: str
+    jobs: int
+
+
+class LLMBatchStatus(SQLModel):
+    pending: int  # Jobs waiting for the next submission
+    batches: List[LLMBatch]  # Submitted, not yet written back
+
+
+class LLMMeetingUsage(SQLModel):
+    analysis_id: uuid.UUID
+    calls: int
+    prompt_tokens: int  # Including cached tokens
+    cached_tokens: int
+    output_tokens: int
+    seconds: float  # Time spent in model calls
+
+
 class UserPublic(UserBase):
     id: uuid.UUID
 
@@ -60,8 +157,16 @@ class AudioTranscription(SQLModel, table=True):
     mime_type: str = Field(max_length=100)
     transcription_text: str = Field(sa_column_kwargs={"nullable": True})
     duration: Optional[float] = None
+    content_hash: Optional[str] = Field(default=None, index=True, max_length=64)  # SHA-256 of the audio
     created_at: datetime = Field(default_factory=datetime.utcnow)
     user_id: Optional[uuid.UUID] = Field(default=None, foreign_key="user.id")
+    # Saved by silence trimming before the upload (None when nothing was trimmed)
+    silence_trimmed_seconds: Optional[float] = None
+    silence_trimmed_tokens: Optional[int] = None
+
+    # Files on the Gemini File API, kept until every stage reading them succeeded
+    gemini_upload: Optional[str] = None  # JSON: name, URI and expiry of every file (segment), offset map
+    gemini_upload_expires_at: Optional[datetime] = None  # When the first of the files expires
 
 
 class AudioTranscriptionCreate(SQLModel):
@@ -76,6 +181,9 @@ class AudioTranscriptionPublic(SQLModel):
     mime_type: str
     transcription_text: Optional[str]
     duration: Optional[float]
+    content_hash: Optional[str]
+    silence_trimmed_seconds: Optional[float] = None
+    silence_trimmed_tokens: Optional[int] = None
     created_at: datetime
 
 
@@ -92,6 +200,7 @@ class AudioTranslation(SQLModel, table=True):
 
 class AudioTranslationCreate(SQLModel):
     audio_transcription_id: uuid.UUID
+    priority: Literal["interactive", "batch"] = "interactive"  # "batch": cheaper, done within hours
     # source_text: str
 
 
@@ -127,7 +236,8 @@ class MeetingAnalysis(SQLModel, table=True):
 
 class MeetingAnalysisCreate(SQLModel):
     audio_translation_id: uuid.UUID
-    generate_markdown: bool = True  # Whether to generate MD notes
+    generate_markdown: bool = True  # Prefetch MD notes (False: made on first request)
+    priority: Literal["interactive", "batch"] = "interactive"  # "batch": cheaper, done within hours
 
 
 class MeetingAnalysisPublic(SQLModel):
@@ -144,11 +254,153 @@ class MeetingAnalysisPublic(SQLModel):
     created_at: datetime
 
 
+class MeetingNotesPublic(SQLModel):
+    analysis_id: uuid.UUID
+    status: Literal["ready", "generating"]
+    notes_markdown: Optional[str] = None
+
+
 class FullPipeline(SQLModel):
     transcription_id: uuid.UUID
     translation_id: uuid.UUID
     analysis_id: uuid.UUID
 
 
+class UploadSession(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", index=True)
+    title: str = Field(default="Untitled", max_length=255)
+    original_filename: str = Field(max_length=255)
+    mime_type: str = Field(max_length=100)
+    total_size: int
+    received_ranges: str = Field(default="[]")  # JSON list of received [start, end) byte ranges
+    pipeline: str = Field(default="transcribe", max_length=32)  # "transcribe" or "full-analysis"
+    generate_markdown: bool = Field(default=True)
+    status: str = Field(default="open", max_length=32)  # "open", "completing" or "completed"
+    content_hash: Optional[str] = Field(default=None, max_length=64)  # Set once the file is in the object store
+
+    # Filled once the upload is finalized
+    audio_transcription_id: Optional[uuid.UUID] = Field(default=None, foreign_key="audiotranscription.id")
+    audio_translation_id: Optional[uuid.UUID] = Field(default=None, foreign_key="audiotranslation.id")
+    meeting_analysis_id: Optional[uuid.UUID] = Field(default=None, foreign_key="meetinganalysis.id")
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Stages of every pipeline, in order
+PIPELINE_STAGES = {
+    "transcribe": ("upload", "transcription"),
+    "full-analysis": ("upload", "transcription", "translation", "analysis"),
+}
+
+
+class PipelineRun(SQLModel, table=True):
+    """
+    Durable state of one pipeline run: which stages have finished. Their
+    outputs are the linked records, so re-running the pipeline continues
+    from the first unfinished stage.
+    """
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", index=True)
+    pipeline: str = Field(max_length=32)  # "transcribe" or "full-analysis"
+    file_path: str  # Stored audio
+    mime_type: str = Field(max_length=100)
+    generate_markdown: bool = Field(default=False)
+    completed_stages: str = Field(default="[]")  # JSON list of finished stages, in order
+
+    audio_transcription_id: uuid.UUID = Field(foreign_key="audiotranscription.id", index=True)
+    audio_translation_id: Optional[uuid.UUID] = Field(default=None, foreign_key="audiotranslation.id")
+    meeting_analysis_id: Optional[uuid.UUID] = Field(default=None, foreign_key="meetinganalysis.id")
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class PipelineRunPublic(SQLModel):
+    id: uuid.UUID
+    pipeline: str
+    completed_stages: List[str]
+    audio_transcription_id: uuid.UUID
+    audio_translation_id: Optional[uuid.UUID]
+    meeting_analysis_id: Optional[uuid.UUID]
+    created_at: datetime
+    updated_at: datetime
+
+
+class ProcessingJob(SQLModel, table=True):
+    """
+    Progress of one stage of work on a transcription, translation or
+    analysis, kept apart from the record so polling for it doesn't load
+    the record's text. One row per record and stage; retries and re-runs
+    update it.
+    """
+    # Jobs are looked up by record and stage on every update
+    __table_args__ = (Index("ix_processingjob_record_id_stage", "record_id", "stage"),)
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", index=True)
+    record_id: uuid.UUID = Field(index=True)  # The transcription, translation or analysis the stage writes
+    stage: str = Field(max_length=32)  # "upload", "transcription", "translation", "analysis" or "notes"
+    status: str = Field(default="queued", max_length=32, index=True)  # "queued", "running", "succeeded" or "failed"
+    attempts: int = Field(default=0)
+    error_message: Optional[str] = None
+    pipeline_run_id: Optional[uuid.UUID] = Field(default=None, foreign_key="pipelinerun.id")
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)  # Queued at
+    started_at: Optional[datetime] = None  # Start of the latest attempt
+    finished_at: Optional[datetime] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+def job_event(job: "ProcessingJob") -> dict:
+    """A job update as pushed to the user's event stream."""
+    return {
+        "type": "job",
+        "record_id": str(job.record_id),
+        "stage": job.stage,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error_message": job.error_message,
+        "updated_at": job.updated_at.isoformat(),
+    }
+
+
+class ProcessingJobPublic(SQLModel):
+    stage: str
+    status: str
+    attempts: int
+    error_message: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    updated_at: datetime
+
+
+class UploadSessionCreate(SQLModel):
+    original_filename: str = Field(max_length=255)
+    mime_type: str = Field(max_length=100)
+    total_size: int = Field(gt=0, le=UPLOAD_MAX_BYTES)
+    title: str = "Untitled"
+    pipeline: Literal["transcribe", "full-analysis"] = "transcribe"
+    generate_markdown: bool = True
+
+
+class UploadSessionPublic(SQLModel):
+    id: uuid.UUID
+    title: str
+    original_filename: str
+    mime_type: str
+    total_size: int
+    pipeline: str
+    status: str
+    offset: int  # Bytes received contiguously from the start of the file
+    received_ranges: List[List[int]]
+    audio_transcription_id: Optional[uuid.UUID]
+    audio_translation_id: Optional[uuid.UUID]
+    meeting_analysis_id: Optional[uuid.UUID]
+    created_at: datetime
+
+
 class UserStatusUpdate(SQLModel):
     is_active: bool
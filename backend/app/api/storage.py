@@ -0,0 +1,209 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+from fastapi import UploadFile
+
+from app.audio.probe import probe_duration
+
+# Ensure media directory exists
+MEDIA_DIR = Path(__file__).parent.parent.parent / "media"
+MEDIA_DIR.mkdir(exist_ok=True)
+
+# Audio is stored once per SHA-256, shared by every upload of the same bytes
+OBJECTS_DIR = MEDIA_DIR / "objects"
+
+# Size of each read/write while copying an upload to disk. Peak memory per
+# upload is bounded by this, not by the size of the recording.
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    file_size: int
+    content_hash: str  # SHA-256 of the file contents
+    duration: Optional[float] = None  # Seconds, read from the container headers
+
+
+def user_media_dir(user_id) -> Path:
+    """Return (and create) the media directory of a user."""
+    client_dir = MEDIA_DIR / str(user_id)
+    client_dir.mkdir(exist_ok=True)
+    return client_dir
+
+
+def object_path(content_hash: str) -> Path:
+    """Content-addressed location of an audio file: MEDIA_DIR/objects/ab/abcd..."""
+    return OBJECTS_DIR / content_hash[:2] / content_hash
+
+
+def _store_object(tmp_name: str, content_hash: str) -> Path:
+    """
+    Move a fully written temp file to its content-addressed location. If the
+    same bytes are already stored, the temp file is dropped instead.
+    """
+    destination = object_path(content_hash)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    if destination.exists():
+        os.unlink(tmp_name)
+    else:
+        os.replace(tmp_name, destination)
+    return destination
+
+
+def _copy_to_store(source) -> StoredUpload:
+    """
+    Copy a file object into the object store in bounded chunks, hashing it
+    on the way, and probe its duration from the headers. The data is written
+    to a temp file first and renamed into place, so a crashed upload never
+    leaves a truncated file behind.
+    Runs in a worker thread.
+    """
+    OBJECTS_DIR.mkdir(exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=OBJECTS_DIR, prefix=".upload-", suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                tmp.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        path = _store_object(tmp_name, digest.hexdigest())
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    return StoredUpload(path=path, file_size=size, content_hash=digest.hexdigest(), duration=probe_duration(path))
+
+
+async def save_upload(file: UploadFile) -> StoredUpload:
+    """
+    Stream an uploaded file into the content-addressed object store without
+    holding it in memory or blocking the event loop.
+    """
+    await file.seek(0)
+    return await asyncio.to_thread(_copy_to_store, file.file)
+
+
+# ---------------------------------------------------------------------------
+# Chunked (resumable) uploads
+# ---------------------------------------------------------------------------
+
+def upload_part_path(user_id, session_id) -> Path:
+    """Return the path of the partial file backing an upload session."""
+    parts_dir = user_media_dir(user_id) / ".uploads"
+    parts_dir.mkdir(exist_ok=True)
+    return parts_dir / f"{session_id}.part"
+
+
+def _allocate_part(path: Path, total_size: int) -> None:
+    with open(path, "ab") as f:
+        f.truncate(total_size)
+
+
+async def allocate_part(path: Path, total_size: int) -> None:
+    """Create the (sparse) partial file for an upload session."""
+    await asyncio.to_thread(_allocate_part, path, total_size)
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+async def write_range(path: Path, offset: int, length: int, chunks: AsyncIterator[bytes]) -> int:
+    """
+    Write a byte range of an upload session straight to its partial file.
+    `chunks` is consumed as it arrives and flushed every UPLOAD_CHUNK_SIZE
+    bytes, so a request never holds more than one chunk in memory.
+    Raises ValueError if the body is longer or shorter than `length`.
+    """
+    fd = await asyncio.to_thread(os.open, path, os.O_WRONLY)
+    buffer = bytearray()
+    written = 0
+    try:
+        async for piece in chunks:
+            if written + len(buffer) + len(piece) > length:
+                raise ValueError("Request body is larger than the declared range")
+            buffer += piece
+            if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                await asyncio.to_thread(_pwrite_all, fd, bytes(buffer), offset + written)
+                written += len(buffer)
+                buffer.clear()
+        if buffer:
+            await asyncio.to_thread(_pwrite_all, fd, bytes(buffer), offset + written)
+            written += len(buffer)
+        if written != length:
+            raise ValueError("Request body is shorter than the declared range")
+    finally:
+        await asyncio.to_thread(os.close, fd)
+    return written
+
+
+def merge_ranges(ranges: List[List[int]], start: int, end: int) -> List[List[int]]:
+    """Add the half-open range [start, end) to a sorted list of disjoint ranges."""
+    merged = []
+    for range_start, range_end in sorted(ranges + [[start, end]]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_end)
+        else:
+            merged.append([range_start, range_end])
+    return merged
+
+
+def contiguous_offset(ranges: List[List[int]]) -> int:
+    """Number of bytes received without gaps from the start of the file."""
+    if ranges and ranges[0][0] == 0:
+        return ranges[0][1]
+    return 0
+
+
+def _promote_part(part_path: Path) -> StoredUpload:
+    digest = hashlib.sha256()
+    size = 0
+    with open(part_path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+        os.fsync(f.fileno())
+    path = _store_object(str(part_path), digest.hexdigest())
+    return StoredUpload(path=path, file_size=size, content_hash=digest.hexdigest(), duration=probe_duration(path))
+
+
+async def promote_part(part_path: Path) -> StoredUpload:
+    """Hash a completed partial file and move it into the object store."""
+    return await asyncio.to_thread(_promote_part, part_path)
+
+
+def _stored_object(content_hash: str) -> StoredUpload:
+    path = object_path(content_hash)
+    return StoredUpload(path=path, file_size=path.stat().st_size, content_hash=content_hash, duration=probe_duration(path))
+
+
+async def stored_object(content_hash: str) -> StoredUpload:
+    """An object already in the store, e.g. a part promoted by an earlier attempt."""
+    return await asyncio.to_thread(_stored_object, content_hash)
+
+
+async def discard_part(part_path: Path) -> None:
+    """Remove the partial file of an aborted upload session."""
+    try:
+        await asyncio.to_thread(os.unlink, part_path)
+    except FileNotFoundError:
+        pass
@@ -72,7 +72,11 @@ def decode_token(token: str):
 
 async def get_current_user(session: Annotated[Session, Depends(get_session)], credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)]):
     """Dependency to get the current authenticated user."""
-    token = credentials.credentials
+    return await authenticate(session, credentials.credentials)
+
+
+async def authenticate(session: Session, token: str) -> User:
+    """The user an access token belongs to, for tokens that don't come in the Authorization header."""
     payload = decode_token(token)
 
     # Check if it's an access token
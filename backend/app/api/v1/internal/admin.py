@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
-from typing import Annotated
+from typing import Annotated, List
+import json
 import uuid
 
 from app.api.db import get_session
-from app.api.models import User, UserAdminDisplay, UserStatusUpdate
+from app.api.models import LLMAnalysisStats, LLMBatchStatus, LLMCacheStats, LLMMeetingUsage, LLMQuotaStatus, PIPELINE_STAGES, PipelineRun, PipelineRunPublic, ProcessingJob, QueueDepth, SchedulerLimitUpdate, SchedulerStatus, SchedulerUser, User, UserAdminDisplay, UserStatusUpdate
 from app.api.v1.deps import get_current_superuser
+from app.api.v1.pipelines import queue_run_jobs, schedule_run
 
 router = APIRouter(
     prefix="/admin",
@@ -65,3 +67,156 @@ async def list_all_users(
     result = await session.exec(select(User).offset(skip).limit(limit))
     users = result.all()
     return users
+
+
+@router.get("/llm/quota", response_model=list[LLMQuotaStatus])
+def get_llm_quota():
+    """
+    Get the remaining Gemini quota and last-minute usage per model, as seen
+    by the cluster-wide rate limiter.
+    Only accessible by superusers.
+    """
+    from app.llm.ratelimit import quota_status
+
+    return quota_status()
+
+
+@router.get("/llm/cache", response_model=LLMCacheStats)
+def get_llm_cache_stats():
+    """
+    Get the hit rate, size and saved generation time of the LLM response cache.
+    Only accessible by superusers.
+    """
+    from app.llm import cache
+
+    return cache.stats()
+
+
+@router.get("/llm/analysis", response_model=LLMAnalysisStats)
+def get_llm_analysis_stats():
+    """
+    Get how often analyses were decoded from structured output, and how
+    often they fell back to scraping labelled sections.
+    Only accessible by superusers.
+    """
+    from app.llm.text import analysis_stats
+
+    return analysis_stats()
+
+
+@router.get("/llm/batches", response_model=LLMBatchStatus)
+def get_llm_batches():
+    """
+    Get the number of batch-priority jobs waiting for submission and the
+    Gemini batch jobs still running.
+    Only accessible by superusers.
+    """
+    from app.llm.batch import stats
+
+    return stats()
+
+
+@router.post("/pipelines/{run_id}/resume", response_model=PipelineRunPublic)
+async def resume_pipeline(
+    run_id: uuid.UUID,
+    session: Annotated[Session, Depends(get_session)]
+):
+    """
+    Re-run a failed pipeline from its first unfinished stage; finished
+    stages are not run again. A run has failed when one of its stages
+    failed and none is still queued or running.
+    Only accessible by superusers.
+    """
+    run = await session.get(PipelineRun, run_id)
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pipeline run not found"
+        )
+
+    completed = json.loads(run.completed_stages)
+    if all(stage in completed for stage in PIPELINE_STAGES[run.pipeline]):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Pipeline run already finished"
+        )
+    result = await session.exec(select(ProcessingJob.status).where(ProcessingJob.pipeline_run_id == run.id))
+    job_statuses = set(result.all())
+    if "failed" not in job_statuses or job_statuses & {"queued", "running"}:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only failed pipeline runs can be resumed"
+        )
+
+    await queue_run_jobs(session, run)
+    await session.commit()
+    await schedule_run(run)
+
+    return PipelineRunPublic(
+        **run.model_dump(exclude={"completed_stages"}),
+        completed_stages=json.loads(run.completed_stages)
+    )
+
+
+@router.get("/queues", response_model=List[QueueDepth])
+def get_queue_depths():
+    """
+    Get the number of tasks waiting in every worker queue (audio,
+    transcription, text and the default queue).
+    Only accessible by superusers.
+    """
+    from app.worker.celery_app import queue_depths
+
+    return queue_depths()
+
+
+@router.get("/scheduler", response_model=SchedulerStatus)
+def get_scheduler_status(limit: int = 100):
+    """
+    Get the pipeline runs every user has in flight and waiting, and the
+    first waiting runs in the order they will be admitted to the worker
+    queues (interactive before bulk, taking turns between users).
+    Only accessible by superusers.
+    """
+    from app.worker.scheduler import status
+
+    return status(limit)
+
+
+@router.put("/scheduler/users/{user_id}/limit", response_model=SchedulerUser)
+async def update_scheduler_limit(
+    user_id: uuid.UUID,
+    limit_update: SchedulerLimitUpdate,
+    session: Annotated[Session, Depends(get_session)]
+):
+    """
+    Set how many pipeline runs of a user can be in flight at a time, or go
+    back to the default (SCHED_USER_MAX_IN_FLIGHT) with null.
+    Only accessible by superusers.
+    """
+    result = await session.exec(select(User).where(User.id == user_id))
+    if not result.first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    from app.worker import scheduler
+    from app.worker.tasks import task_dispatch_runs
+
+    scheduler.set_user_limit(user_id, limit_update.in_flight_limit)
+    # A raised limit may let waiting runs in
+    task_dispatch_runs.delay()
+    return scheduler.user_status(user_id)
+
+
+@router.get("/llm/usage/{analysis_id}", response_model=LLMMeetingUsage)
+def get_llm_meeting_usage(analysis_id: uuid.UUID):
+    """
+    Get the tokens (sent, served from a context cache, generated) and model
+    time spent on one meeting, from transcription to markdown notes.
+    Only accessible by superusers.
+    """
+    from app.llm.usage import meeting_usage
+
+    return meeting_usage(analysis_id)
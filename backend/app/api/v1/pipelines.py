@@ -0,0 +1,327 @@
+import json
+import uuid
+from datetime import datetime
+from typing import Callable, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from app.api.models import (
+    User,
+    AudioTranscription,
+    AudioTranslation,
+    MeetingAnalysis,
+    FullPipeline,
+    PIPELINE_STAGES,
+    PipelineRun,
+    ProcessingJob,
+    PENDING_TEXTS,
+)
+from app.api.storage import StoredUpload
+from app.redis_client import BATCH_QUEUE_KEY, NOTES_LOCK_SECONDS, get_async_redis, notes_lock_key
+from app.worker import scheduler
+
+
+async def find_finished_transcription(session: AsyncSession, user_id: uuid.UUID, content_hash: str) -> Optional[AudioTranscription]:
+    """
+    Latest finished transcription of the same audio bytes by the same user,
+    if any. Results are never shared between accounts: the translation,
+    analysis and notes reused along with it would leak into another
+    user's records.
+    """
+    statement = select(AudioTranscription).where(
+        AudioTranscription.user_id == user_id,
+        AudioTranscription.content_hash == content_hash,
+        AudioTranscription.transcription_text.is_not(None),
+        AudioTranscription.transcription_text.not_in(PENDING_TEXTS)
+    ).order_by(AudioTranscription.created_at.desc()).limit(1)
+    result = await session.exec(statement)
+    return result.first()
+
+
+async def find_finished_translation(session: AsyncSession, audio_transcription_id: uuid.UUID) -> Optional[AudioTranslation]:
+    """Latest finished translation of a transcription, if any."""
+    statement = select(AudioTranslation).where(
+        AudioTranslation.audio_transcription_id == audio_transcription_id,
+        AudioTranslation.translated_text.is_not(None),
+        AudioTranslation.translated_text.not_in(PENDING_TEXTS)
+    ).order_by(AudioTranslation.created_at.desc()).limit(1)
+    result = await session.exec(statement)
+    return result.first()
+
+
+async def find_finished_analysis(session: AsyncSession, audio_translation_id: uuid.UUID) -> Optional[MeetingAnalysis]:
+    """Latest finished analysis of a translation, if any."""
+    statement = select(MeetingAnalysis).where(
+        MeetingAnalysis.audio_translation_id == audio_translation_id,
+        MeetingAnalysis.summary.is_not(None),
+        MeetingAnalysis.summary.not_in(PENDING_TEXTS)
+    ).order_by(MeetingAnalysis.created_at.desc()).limit(1)
+    result = await session.exec(statement)
+    return result.first()
+
+
+async def queue_job(session: AsyncSession, user_id: uuid.UUID, stage: str, record_id: uuid.UUID, run_id: Optional[uuid.UUID] = None):
+    """
+    Mark a stage of work on a record as queued (the caller commits). The
+    worker moves the job on to running, then succeeded or failed.
+    """
+    statement = select(ProcessingJob).where(ProcessingJob.record_id == record_id, ProcessingJob.stage == stage)
+    result = await session.exec(statement)
+    job = result.first()
+    if job is None:
+        job = ProcessingJob(user_id=user_id, record_id=record_id, stage=stage)
+    job.status = "queued"
+    job.pipeline_run_id = run_id
+    job.error_message = None
+    job.started_at = None
+    job.finished_at = None
+    job.updated_at = datetime.utcnow()
+    session.add(job)
+
+
+def record_reused_jobs(session: AsyncSession, user_id: uuid.UUID, record_id: uuid.UUID, *stages: str):
+    """
+    Record stages whose results were copied from an earlier record as
+    succeeded, so the record's progress reads as done (the caller commits).
+    """
+    now = datetime.utcnow()
+    for stage in stages:
+        session.add(ProcessingJob(user_id=user_id, record_id=record_id, stage=stage, status="succeeded",
+                                  started_at=now, finished_at=now))
+
+
+async def queue_run_jobs(session: AsyncSession, run: PipelineRun):
+    """Mark the stages a pipeline run hasn't finished as queued (the caller commits)."""
+    completed = json.loads(run.completed_stages)
+    records = {
+        "upload": run.audio_transcription_id,
+        "transcription": run.audio_transcription_id,
+        "translation": run.audio_translation_id,
+        "analysis": run.meeting_analysis_id,
+    }
+    for stage in PIPELINE_STAGES[run.pipeline]:
+        if stage not in completed:
+            await queue_job(session, run.user_id, stage, records[stage], run.id)
+
+
+async def request_notes(analysis_id: uuid.UUID) -> bool:
+    """
+    Queue markdown notes generation for a finished analysis. Concurrent
+    requests for the same analysis queue a single task; returns whether
+    this call was the one that queued it.
+    """
+    queued = await get_async_redis().set(notes_lock_key(analysis_id), "1", nx=True, ex=NOTES_LOCK_SECONDS)
+    if queued:
+        from app.worker.tasks import task_generate_notes
+        task_generate_notes.delay(str(analysis_id))
+    return bool(queued)
+
+
+async def queue_batch(job: dict):
+    """
+    Leave a translation ({"kind": "translation", "id"}) or an analysis
+    ({"kind": "analysis", "id", "generate_markdown"}) for the next Gemini
+    batch submission instead of queueing its task.
+    """
+    await get_async_redis().rpush(BATCH_QUEUE_KEY, json.dumps(job))
+
+
+async def schedule_run(run: PipelineRun, priority: Optional[str] = None):
+    """
+    Leave a pipeline run to the fair scheduler (see app.worker.scheduler)
+    and have a worker admit what fits. Without a priority the scheduler
+    picks interactive or bulk.
+    """
+    await scheduler.enqueue(run.user_id, run.id, priority)
+    from app.worker.tasks import task_dispatch_runs
+    task_dispatch_runs.delay()
+
+
+async def start_transcription(
+    session: AsyncSession,
+    current_user: User,
+    stored: StoredUpload,
+    filename: str,
+    original_filename: str,
+    mime_type: str,
+    priority: Optional[str] = None,
+    on_created: Optional[Callable[[AudioTranscription], None]] = None,
+) -> AudioTranscription:
+    """
+    Create the AudioTranscription record for a stored upload and queue the
+    transcription task. If the same audio was already transcribed, its text
+    is reused and no task is queued.
+    on_created is called with the new record before it is committed, so the
+    caller's own changes are committed with it; the task is only queued
+    after that commit.
+    """
+    existing = await find_finished_transcription(session, current_user.id, stored.content_hash)
+
+    # 1. Create DB record with EMPTY transcription_text
+    audio_transcription = AudioTranscription(
+        id=uuid.uuid4(), # Explicitly generate ID to pass to task
+        filename=filename,
+        original_filename=original_filename,
+        file_size=stored.file_size,
+        mime_type=mime_type,
+        transcription_text=existing.transcription_text if existing else None, # Will be filled by worker
+        duration=stored.duration if stored.duration is not None else (existing.duration if existing else None),
+        content_hash=stored.content_hash,
+        user_id=current_user.id
+    )
+
+    session.add(audio_transcription)
+    await session.flush()
+
+    # 2. Record the run and schedule its stage tasks (upload, then transcription)
+    run = None
+    if existing:
+        record_reused_jobs(session, current_user.id, audio_transcription.id, "upload", "transcription")
+    else:
+        run = PipelineRun(
+            user_id=current_user.id,
+            pipeline="transcribe",
+            file_path=str(stored.path),
+            mime_type=mime_type,
+            audio_transcription_id=audio_transcription.id
+        )
+        session.add(run)
+        await queue_run_jobs(session, run)
+    if on_created is not None:
+        on_created(audio_transcription)
+    await session.commit()
+    await session.refresh(audio_transcription)
+
+    if run is not None:
+        await schedule_run(run, priority)
+
+    return audio_transcription
+
+
+async def start_full_pipeline(
+    session: AsyncSession,
+    current_user: User,
+    stored: StoredUpload,
+    filename: str,
+    original_filename: str,
+    mime_type: str,
+    generate_markdown: bool,
+    priority: Optional[str] = None,
+    on_created: Optional[Callable[[FullPipeline], None]] = None,
+) -> FullPipeline:
+    """
+    Pre-create the transcription, translation and analysis records for a
+    stored upload and queue the full meeting pipeline.
+    Results already produced for the same audio are copied into the new
+    records; the pipeline skips those stages, and is not queued at all when
+    every stage can be reused.
+    Markdown notes are prefetched once the analysis is done, or made on
+    first request when generate_markdown is false.
+    on_created is called with the new records' ids before they are
+    committed, as in start_transcription.
+    """
+    existing_transcription = await find_finished_transcription(session, current_user.id, stored.content_hash)
+    existing_translation = None
+    existing_analysis = None
+    if existing_transcription:
+        existing_translation = await find_finished_translation(session, existing_transcription.id)
+    if existing_translation:
+        existing_analysis = await find_finished_analysis(session, existing_translation.id)
+
+    # A. Transcription
+    audio_transcription = AudioTranscription(
+        id=uuid.uuid4(),
+        filename=filename,
+        original_filename=original_filename,
+        file_size=stored.file_size,
+        mime_type=mime_type,
+        duration=stored.duration,
+        content_hash=stored.content_hash,
+        user_id=current_user.id,
+        transcription_text="Processing..."
+    )
+    if existing_transcription:
+        audio_transcription.transcription_text = existing_transcription.transcription_text
+        if audio_transcription.duration is None:
+            audio_transcription.duration = existing_transcription.duration
+
+    # B. Translation
+    audio_translation = AudioTranslation(
+        id=uuid.uuid4(),
+        audio_transcription_id=audio_transcription.id,
+        source_text="Waiting for transcription...",
+        translated_text="Processing...",
+        user_id=current_user.id
+    )
+    if existing_translation:
+        audio_translation.source_text = existing_translation.source_text
+        audio_translation.translated_text = existing_translation.translated_text
+        audio_translation.confidence_score = existing_translation.confidence_score
+        audio_translation.model_used = existing_translation.model_used
+
+    # C. Analysis
+    meeting_analysis = MeetingAnalysis(
+        id=uuid.uuid4(),
+        audio_translation_id=audio_translation.id,
+        user_id=current_user.id,
+        summary="Processing..."
+    )
+    if existing_analysis:
+        meeting_analysis.content_text = existing_analysis.content_text
+        meeting_analysis.summary = existing_analysis.summary
+        meeting_analysis.business_insights = existing_analysis.business_insights
+        meeting_analysis.technical_insights = existing_analysis.technical_insights
+        meeting_analysis.action_items = existing_analysis.action_items
+        meeting_analysis.key_topics = existing_analysis.key_topics
+        meeting_analysis.notes_markdown = existing_analysis.notes_markdown
+        meeting_analysis.model_used = existing_analysis.model_used
+
+    session.add(audio_transcription)
+    session.add(audio_translation)
+    session.add(meeting_analysis)
+    await session.flush()
+
+    result = FullPipeline(
+        transcription_id=audio_transcription.id,
+        translation_id=audio_translation.id,
+        analysis_id=meeting_analysis.id
+    )
+
+    if existing_transcription:
+        record_reused_jobs(session, current_user.id, audio_transcription.id, "upload", "transcription")
+    if existing_translation:
+        record_reused_jobs(session, current_user.id, audio_translation.id, "translation")
+    if existing_analysis:
+        record_reused_jobs(session, current_user.id, meeting_analysis.id, "analysis")
+
+    # Record the run, with the stages reused above already done, and
+    # schedule the stage tasks of the rest
+    run = None
+    if not existing_analysis:
+        completed_stages = []
+        if existing_transcription:
+            completed_stages += ["upload", "transcription"]
+        if existing_translation:
+            completed_stages.append("translation")
+        run = PipelineRun(
+            user_id=current_user.id,
+            pipeline="full-analysis",
+            file_path=str(stored.path),
+            mime_type=mime_type,
+            generate_markdown=generate_markdown,
+            completed_stages=json.dumps(completed_stages),
+            audio_transcription_id=audio_transcription.id,
+            audio_translation_id=audio_translation.id,
+            meeting_analysis_id=meeting_analysis.id
+        )
+        session.add(run)
+        await queue_run_jobs(session, run)
+    if on_created is not None:
+        on_created(result)
+    await session.commit()
+
+    if run is not None:
+        await schedule_run(run, priority)
+    elif generate_markdown and meeting_analysis.notes_markdown is None:
+        await request_notes(meeting_analysis.id)
+
+    return result
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Response, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 from app.api.db import get_session
+from app.llm.gateway import GEMINI_MODEL
 from app.api.v1.deps import get_current_active_user
 from app.api.models import User
-from typing import Annotated
+from typing import Annotated, Literal, Optional
 from datetime import datetime
 from app.api.models import (
     AudioTranscription,
@@ -13,11 +14,12 @@ from app.api.models import (
     AudioTranslationPublic,
     MeetingAnalysis,
     MeetingAnalysisCreate,
-    MeetingAnalysisPublic
+    MeetingAnalysisPublic,
+    MeetingNotesPublic,
+    is_pending_text,
 )
-from google import genai
-from google.genai import types
-import os
+from app.api.storage import save_upload
+from app.api.v1.pipelines import queue_batch, queue_job, request_notes, start_transcription
 import uuid
 from pathlib import Path
 from typing import List
@@ -27,23 +29,19 @@ router = APIRouter(
     tags=["audios"]
 )
 
-# Configure the Google Generative AI client
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-
-# Ensure media directory exists
-MEDIA_DIR = Path(__file__).parent.parent.parent.parent.parent / "media"
-MEDIA_DIR.mkdir(exist_ok=True)
-
 @router.post("/transcribe", response_model=AudioTranscriptionPublic)
 async def transcribe_audio(
     current_user: Annotated[User, Depends(get_current_active_user)],
     file: UploadFile = File(...),
     title: str = "Untitled",
+    priority: Optional[Literal["interactive", "bulk"]] = None,
     session: AsyncSession = Depends(get_session)
 ):
     """
     Upload an audio file and transcribe it to Banglish (Bangla in Roman alphabet).
     The transcription is stored in the database and returned.
+    Uploads sent as part of a bulk import should pass priority "bulk"; by
+    default a user's uploads turn bulk once several are waiting.
     """
     # Validate file type
     if not file.content_type or not file.content_type.startswith("audio/"):
@@ -58,41 +56,22 @@ async def transcribe_audio(
     ## Should be replaced with the meeting client uuid not with the user uuid who initiated the upload
     unique_filename = f"{clean_title}_{client_uuid}_{timestamp}{file_extension}"
     
-    # Create client-specific directory
-    client_dir = MEDIA_DIR / client_uuid
-    client_dir.mkdir(exist_ok=True)
-    file_path = client_dir / unique_filename
-    
-    # 1. Save locally
+    # 1. Save locally (streamed into the content-addressed store)
     try:
-        contents = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(contents)
+        stored = await save_upload(file)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
     
 
-    # 2. Create DB record with EMPTY transcription_text
-    audio_transcription = AudioTranscription(
-        id=uuid.uuid4(), # Explicitly generate ID to pass to task
+    # 2. Create DB record and trigger the background task
+    audio_transcription = await start_transcription(
+        session,
+        current_user,
+        stored,
         filename=unique_filename,
         original_filename=file.filename,
-        file_size=len(contents),
         mime_type=file.content_type,
-        transcription_text=None, # Will be filled by worker
-        user_id=current_user.id
-    )
-    
-    session.add(audio_transcription)
-    await session.commit()
-    await session.refresh(audio_transcription)
-    
-    # 3. Trigger Background Task
-    from app.worker.tasks import task_transcribe_audio
-    task_transcribe_audio.delay(
-        str(audio_transcription.id), 
-        str(file_path), 
-        file.content_type
+        priority=priority,
     )
     
     return audio_transcription
@@ -134,17 +113,26 @@ async def create_meeting_analysis(
     new_analysis = MeetingAnalysis(
         audio_translation_id=analysis_data.audio_translation_id,
         user_id=current_user.id,
-        model_used="gemini-2.5-flash",
+        model_used=GEMINI_MODEL,
         summary="Processing...",  # Placeholder
         content_text="Processing...",  # Placeholder to satisfy MeetingAnalysisPublic
         business_insights="Processing...",  # Placeholder to satisfy MeetingAnalysisPublic
         technical_insights="Processing..."  # Placeholder to satisfy MeetingAnalysisPublic
     )
     session.add(new_analysis)
+    await queue_job(session, current_user.id, "analysis", new_analysis.id)
     await session.commit()
     await session.refresh(new_analysis)
 
-    # 3. Trigger Celery
+    # 3. Trigger Celery, or leave it for the next batch submission
+    if analysis_data.priority == "batch":
+        await queue_batch({
+            "kind": "analysis",
+            "id": str(new_analysis.id),
+            "generate_markdown": analysis_data.generate_markdown,
+        })
+        return new_analysis
+
     from app.worker.tasks import task_analyze_meeting
     task_analyze_meeting.delay(
         str(new_analysis.id), 
@@ -190,6 +178,34 @@ async def get_analysis_by_id(
     return analysis[0]
 
 
+@router.get("/analyses/{analysis_id}/notes", response_model=MeetingNotesPublic)
+async def get_analysis_notes(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    analysis_id: uuid.UUID,
+    response: Response,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Retrieve the markdown notes of a meeting analysis. They are generated on
+    the first request: until they are ready the response is 202 with status
+    "generating", and the client polls again.
+    """
+    statement = select(MeetingAnalysis).where(MeetingAnalysis.user_id == current_user.id, MeetingAnalysis.id == analysis_id)
+    result = await session.exec(statement)
+    analysis = result.first()
+
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Meeting analysis not found")
+    if analysis.notes_markdown is not None:
+        return MeetingNotesPublic(analysis_id=analysis.id, status="ready", notes_markdown=analysis.notes_markdown)
+    if is_pending_text(analysis.summary):
+        raise HTTPException(status_code=409, detail="Meeting analysis is not finished yet")
+
+    await request_notes(analysis.id)
+    response.status_code = status.HTTP_202_ACCEPTED
+    return MeetingNotesPublic(analysis_id=analysis.id, status="generating")
+
+
 @router.get("/{audio_id}", response_model=AudioTranscriptionPublic)
 async def get_audio_by_id(
     current_user: Annotated[User, Depends(get_current_active_user)],
@@ -0,0 +1,41 @@
+import uuid
+from typing import Annotated, List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.db import get_session
+from app.api.models import ProcessingJob, ProcessingJobPublic, User
+from app.api.v1.deps import get_current_active_user
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"]
+)
+
+
+@router.get("/{record_id}", response_model=List[ProcessingJobPublic])
+async def get_record_jobs(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    record_id: uuid.UUID,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Get the progress of the work on a transcription, translation or
+    analysis: one entry per stage (e.g. "upload" and "transcription" for a
+    transcription), with its status ("queued", "running", "succeeded" or
+    "failed"), attempts, timings and error. Cheap to poll: the record
+    itself is not loaded.
+    """
+    statement = select(ProcessingJob).where(
+        ProcessingJob.record_id == record_id,
+        ProcessingJob.user_id == current_user.id
+    ).order_by(ProcessingJob.created_at)
+    result = await session.exec(statement)
+    jobs = result.all()
+
+    if not jobs:
+        raise HTTPException(status_code=404, detail="No jobs found for this record")
+
+    return jobs
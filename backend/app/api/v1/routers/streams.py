@@ -0,0 +1,203 @@
+import json
+import uuid
+from datetime import datetime
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlmodel import or_, select
+
+from app.api.db import AsyncSessionLocal
+from app.api.models import (
+    AudioTranscription,
+    AudioTranslation,
+    MeetingAnalysis,
+    ProcessingJob,
+    is_pending_text,
+    job_event,
+)
+from app.api.v1.deps import authenticate, security
+from app.llm.stream import StreamKind, status_key, stream_key
+from app.redis_client import get_async_redis, user_events_channel
+
+# Comment lines sent while nothing happens, so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+# Record and column holding the finished text of every stage
+_STAGES = {
+    "transcription": (AudioTranscription, "transcription_text"),
+    "translation": (AudioTranslation, "translated_text"),
+    "analysis": (MeetingAnalysis, "summary"),
+}
+
+router = APIRouter(
+    prefix="/streams",
+    tags=["streams"]
+)
+
+
+def _event(event: dict) -> str:
+    return f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+async def _outcome(kind: StreamKind, record_id: uuid.UUID) -> Optional[str]:
+    """
+    "done" once a stage's record holds its text, "error" once its job
+    failed (or the record is gone), None while it is still pending.
+    """
+    model, column = _STAGES[kind]
+    async with AsyncSessionLocal() as session:
+        record = await session.get(model, record_id)
+        if record is None:
+            return "error"
+        if not is_pending_text(getattr(record, column)):
+            return "done"
+        statement = select(ProcessingJob.status).where(ProcessingJob.record_id == record_id, ProcessingJob.stage == kind)
+        result = await session.exec(statement)
+        return "error" if result.first() == "failed" else None
+
+
+async def _relay(kind: StreamKind, record_id: uuid.UUID):
+    """
+    Subscribe before reading the text so far, so no piece published in
+    between is lost; pieces already covered by the snapshot are skipped by
+    their offset. While nothing is published, the stage's status is checked
+    again, so a stream whose ending was missed (e.g. its status key expired)
+    still ends.
+    """
+    key = stream_key(kind, record_id)
+    r = get_async_redis()
+    pubsub = r.pubsub()
+    await pubsub.subscribe(key)
+    try:
+        text = await r.get(key) or ""
+        received = len(text)
+        if text:
+            yield _event({"type": "delta", "offset": 0, "text": text})
+        outcome = await r.get(status_key(key))
+        if outcome:
+            yield _event({"type": outcome})
+            return
+
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=KEEPALIVE_SECONDS)
+            if message is None:
+                outcome = await r.get(status_key(key)) or await _outcome(kind, record_id)
+                if outcome:
+                    yield _event({"type": outcome})
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            event = json.loads(message["data"])
+            if event["type"] == "delta":
+                skip = received - event["offset"]
+                if skip >= len(event["text"]):
+                    continue
+                event = {"type": "delta", "offset": received, "text": event["text"][max(skip, 0):]}
+                received += len(event["text"])
+            elif event["type"] == "reset":
+                received = 0
+            yield _event(event)
+            if event["type"] in ("done", "error"):
+                return
+    finally:
+        await pubsub.unsubscribe(key)
+        await pubsub.aclose()
+
+
+async def _relay_user_events(user_id: uuid.UUID, since: Optional[datetime]):
+    """
+    Subscribe before reading the current jobs, so no update in between is
+    lost; an update sent twice is harmless, events carry the full state.
+    """
+    channel = user_events_channel(user_id)
+    pubsub = get_async_redis().pubsub()
+    await pubsub.subscribe(channel)
+    try:
+        current = ProcessingJob.status.in_(("queued", "running"))
+        if since is not None:
+            current = or_(current, ProcessingJob.updated_at > since)
+        async with AsyncSessionLocal() as session:
+            statement = select(ProcessingJob).where(ProcessingJob.user_id == user_id, current).order_by(ProcessingJob.updated_at)
+            result = await session.exec(statement)
+            jobs = result.all()
+        for job in jobs:
+            yield _event(job_event(job))
+
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=KEEPALIVE_SECONDS)
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {message['data']}\n\n"
+    finally:
+        await pubsub.unsubscribe(channel)
+        await pubsub.aclose()
+
+
+@router.get("/events")
+async def stream_user_events(token: str, since: Optional[datetime] = None):
+    """
+    Follow the progress of all of the user's work as server-sent events,
+    instead of polling the records. Every event is a job update (JSON,
+    "type": "job") with the record_id and the fields of GET /jobs/{record_id},
+    sent whenever a stage starts, succeeds or fails.
+    On connect, the jobs still queued or running are sent first, plus those
+    updated after `since` when given (e.g. the last event's updated_at,
+    after a reconnect).
+
+    Takes the access token as a query parameter, since browsers' EventSource
+    can't set headers. The token is checked once per connection, and no
+    database session is held while the stream is open.
+    """
+    async with AsyncSessionLocal() as session:
+        user = await authenticate(session, token)
+    if not user.is_active:
+        raise HTTPException(status_code=403, detail="Inactive user")
+
+    return StreamingResponse(
+        _relay_user_events(user.id, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{kind}/{record_id}")
+async def stream_stage(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    kind: StreamKind,
+    record_id: uuid.UUID,
+):
+    """
+    Follow a transcription, translation or analysis while it is generated,
+    as server-sent events. Every event is JSON: "delta" events carry the
+    next piece of text and its offset, "reset" means the stage started over,
+    and "done" / "error" end the stream. Analyses stream the raw model
+    response; read the analysis once it is done for the parsed fields.
+    No database session is held while the stream is open.
+    """
+    model, column = _STAGES[kind]
+    async with AsyncSessionLocal() as session:
+        user = await authenticate(session, credentials.credentials)
+        if not user.is_active:
+            raise HTTPException(status_code=403, detail="Inactive user")
+        statement = select(model).where(model.user_id == user.id, model.id == record_id)
+        result = await session.exec(statement)
+        record = result.first()
+
+    if not record:
+        raise HTTPException(status_code=404, detail=f"{kind.capitalize()} not found")
+
+    if is_pending_text(getattr(record, column)):
+        events = _relay(kind, record_id)
+    else:
+        async def finished():
+            yield _event({"type": "done"})
+        events = finished()
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
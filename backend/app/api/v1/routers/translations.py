@@ -2,7 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 from app.api.db import get_session
+from app.llm.gateway import GEMINI_MODEL
 from app.api.v1.deps import get_current_active_user
+from app.api.v1.pipelines import queue_batch, queue_job
 from app.api.models import User
 from typing import Annotated
 from app.api.models import (
@@ -13,8 +15,6 @@ from app.api.models import (
     MeetingAnalysis,
     MeetingAnalysisPublic
 )
-from google import genai
-import os
 import uuid
 from pathlib import Path
 from typing import List
@@ -25,9 +25,6 @@ router = APIRouter(
     tags=["translations"]
 )
 
-# Configure the Google Generative AI client
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-
 # Ensure media directory exists
 MEDIA_DIR = Path(__file__).parent.parent.parent.parent.parent / "media"
 MEDIA_DIR.mkdir(exist_ok=True)
@@ -65,14 +62,19 @@ async def translate_banglish_to_english(
         source_text=source_text,
         translated_text="Processing...", # Placeholder
         user_id=current_user.id,
-        model_used="gemini-2.5-flash"
+        model_used=GEMINI_MODEL
     )
     
     session.add(translation)
+    await queue_job(session, current_user.id, "translation", translation.id)
     await session.commit()
     await session.refresh(translation)
     
-    # Trigger Task
+    # Trigger Task, or leave it for the next batch submission
+    if translation_data.priority == "batch":
+        await queue_batch({"kind": "translation", "id": str(translation.id)})
+        return translation
+
     from app.worker.tasks import task_translate_audio
     task_translate_audio.delay(str(translation.id), source_text)
     
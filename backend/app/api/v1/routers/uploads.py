@@ -0,0 +1,290 @@
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from app.api.db import get_session
+from app.api.v1.deps import get_current_active_user
+from app.api.models import User
+from typing import Annotated
+from datetime import datetime
+from app.api.models import (
+    UploadSession,
+    UploadSessionCreate,
+    UploadSessionPublic,
+)
+from app.api.storage import (
+    allocate_part,
+    contiguous_offset,
+    discard_part,
+    merge_ranges,
+    promote_part,
+    stored_object,
+    upload_part_path,
+    write_range,
+)
+from app.api.v1.pipelines import start_transcription, start_full_pipeline
+from app.redis_client import UPLOAD_LOCK_SECONDS, get_async_redis, upload_complete_lock_key, upload_writes_key
+import json
+import re
+import uuid
+from pathlib import Path
+
+router = APIRouter(
+    prefix="/uploads",
+    tags=["uploads"]
+)
+
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+def to_public(upload: UploadSession) -> UploadSessionPublic:
+    ranges = json.loads(upload.received_ranges)
+    return UploadSessionPublic(
+        id=upload.id,
+        title=upload.title,
+        original_filename=upload.original_filename,
+        mime_type=upload.mime_type,
+        total_size=upload.total_size,
+        pipeline=upload.pipeline,
+        status=upload.status,
+        offset=contiguous_offset(ranges),
+        received_ranges=ranges,
+        audio_transcription_id=upload.audio_transcription_id,
+        audio_translation_id=upload.audio_translation_id,
+        meeting_analysis_id=upload.meeting_analysis_id,
+        created_at=upload.created_at,
+    )
+
+
+async def get_upload_or_404(
+    session: AsyncSession,
+    current_user: User,
+    upload_id: uuid.UUID,
+    for_update: bool = False
+) -> UploadSession:
+    statement = select(UploadSession).where(UploadSession.user_id == current_user.id, UploadSession.id == upload_id)
+    if for_update:
+        statement = statement.with_for_update()
+    result = await session.exec(statement)
+    upload = result.first()
+
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return upload
+
+
+@router.post("/", response_model=UploadSessionPublic, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    upload_data: UploadSessionCreate,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Start a resumable upload. The file is then sent as byte ranges with
+    PUT /uploads/{upload_id} and finalized with POST /uploads/{upload_id}/complete.
+    """
+    if not upload_data.mime_type.startswith("audio/"):
+        raise HTTPException(status_code=400, detail="File must be an audio file")
+
+    upload = UploadSession(
+        id=uuid.uuid4(),
+        user_id=current_user.id,
+        title=upload_data.title,
+        original_filename=upload_data.original_filename,
+        mime_type=upload_data.mime_type,
+        total_size=upload_data.total_size,
+        pipeline=upload_data.pipeline,
+        generate_markdown=upload_data.generate_markdown,
+    )
+
+    await allocate_part(upload_part_path(current_user.id, upload.id), upload.total_size)
+
+    session.add(upload)
+    await session.commit()
+    await session.refresh(upload)
+
+    return to_public(upload)
+
+
+@router.get("/{upload_id}", response_model=UploadSessionPublic)
+async def get_upload_session(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    upload_id: uuid.UUID,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Retrieve an upload session, including the received byte ranges and the
+    contiguous offset to resume from.
+    """
+    upload = await get_upload_or_404(session, current_user, upload_id)
+    return to_public(upload)
+
+
+@router.put("/{upload_id}", response_model=UploadSessionPublic)
+async def upload_chunk(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    upload_id: uuid.UUID,
+    request: Request,
+    content_range: Annotated[str, Header()],
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Upload one byte range of the file. The range is given by the
+    `Content-Range: bytes <start>-<end>/<total>` header (end inclusive) and the
+    raw bytes are the request body. Ranges can be sent in any order and resent.
+    """
+    match = CONTENT_RANGE_PATTERN.match(content_range.strip())
+    if not match:
+        raise HTTPException(status_code=400, detail="Invalid Content-Range header")
+    start, end, total = (int(value) for value in match.groups())
+
+    # Checked under the row lock that completion takes, so a write is
+    # either counted before completion starts or refused
+    upload = await get_upload_or_404(session, current_user, upload_id, for_update=True)
+    if upload.status != "open":
+        raise HTTPException(status_code=409, detail="Upload session is already completed")
+    if total != upload.total_size or start > end or end >= total:
+        raise HTTPException(status_code=416, detail="Content-Range does not fit the upload")
+
+    redis = get_async_redis()
+    writes_key = upload_writes_key(upload.id)
+    pipe = redis.pipeline()
+    pipe.incr(writes_key)
+    pipe.expire(writes_key, UPLOAD_LOCK_SECONDS)
+    await pipe.execute()
+
+    # Release the row lock while the body streams in
+    await session.commit()
+
+    try:
+        await write_range(
+            upload_part_path(current_user.id, upload.id),
+            start,
+            end - start + 1,
+            request.stream()
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail="Upload data is no longer available")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await redis.decr(writes_key)
+
+    # Record the range under a row lock so concurrent chunks don't lose updates
+    upload = await get_upload_or_404(session, current_user, upload_id, for_update=True)
+    upload.received_ranges = json.dumps(merge_ranges(json.loads(upload.received_ranges), start, end + 1))
+    upload.updated_at = datetime.utcnow()
+    session.add(upload)
+    await session.commit()
+    await session.refresh(upload)
+
+    return to_public(upload)
+
+
+@router.post("/{upload_id}/complete", response_model=UploadSessionPublic)
+async def complete_upload_session(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    upload_id: uuid.UUID,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Finalize an upload once every byte has been received. Creates the
+    AudioTranscription record (and the translation and analysis records for
+    the full-analysis pipeline) and triggers the background tasks.
+    Calling it again on a completed session returns the same result, and
+    retrying one that failed part way picks up where it stopped.
+    """
+    redis = get_async_redis()
+    lock_key = upload_complete_lock_key(upload_id)
+    if not await redis.set(lock_key, "1", nx=True, ex=UPLOAD_LOCK_SECONDS):
+        raise HTTPException(status_code=409, detail="Upload session is already being completed")
+    try:
+        return await _complete_upload(session, current_user, upload_id)
+    finally:
+        await redis.delete(lock_key)
+
+
+async def _complete_upload(session: AsyncSession, current_user: User, upload_id: uuid.UUID) -> UploadSessionPublic:
+    upload = await get_upload_or_404(session, current_user, upload_id, for_update=True)
+    if upload.status == "completed":
+        await session.commit()
+        return to_public(upload)
+
+    if upload.status == "open":
+        ranges = json.loads(upload.received_ranges)
+        if contiguous_offset(ranges) != upload.total_size:
+            raise HTTPException(status_code=409, detail="Upload is incomplete")
+        if int(await get_async_redis().get(upload_writes_key(upload.id)) or 0) > 0:
+            raise HTTPException(status_code=409, detail="Upload has range writes in progress")
+        # From here on range writes are refused
+        upload.status = "completing"
+        upload.updated_at = datetime.utcnow()
+        session.add(upload)
+        await session.commit()
+
+    # The file is promoted, and that recorded, before any record is created,
+    # so a retry after a failure below finds it in the object store
+    if upload.content_hash is None:
+        stored = await promote_part(upload_part_path(current_user.id, upload.id))
+        upload.content_hash = stored.content_hash
+        session.add(upload)
+        await session.commit()
+    else:
+        stored = await stored_object(upload.content_hash)
+
+    safe_title = re.sub(r'_+', '_', re.sub(r'[^A-Za-z0-9_-]', '_', upload.title)).strip('_')
+    unique_filename = f"{safe_title}_{uuid.uuid4().hex[:8]}{Path(upload.original_filename).suffix}"
+
+    def link_records(transcription_id, translation_id=None, analysis_id=None):
+        upload.audio_transcription_id = transcription_id
+        upload.audio_translation_id = translation_id
+        upload.meeting_analysis_id = analysis_id
+        upload.status = "completed"
+        upload.updated_at = datetime.utcnow()
+        session.add(upload)
+
+    # The session is completed, and linked to its records, in the
+    # transaction that creates them; the tasks are queued after it commits
+    if upload.pipeline == "full-analysis":
+        await start_full_pipeline(
+            session,
+            current_user,
+            stored,
+            filename=unique_filename,
+            original_filename=upload.original_filename,
+            mime_type=upload.mime_type,
+            generate_markdown=upload.generate_markdown,
+            on_created=lambda result: link_records(result.transcription_id, result.translation_id, result.analysis_id),
+        )
+    else:
+        await start_transcription(
+            session,
+            current_user,
+            stored,
+            filename=unique_filename,
+            original_filename=upload.original_filename,
+            mime_type=upload.mime_type,
+            on_created=lambda audio_transcription: link_records(audio_transcription.id),
+        )
+    await session.refresh(upload)
+
+    return to_public(upload)
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload_session(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    upload_id: uuid.UUID,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Abort an open upload session and discard the bytes received so far.
+    """
+    upload = await get_upload_or_404(session, current_user, upload_id, for_update=True)
+    if upload.status != "open":
+        raise HTTPException(status_code=409, detail="Upload session is already completed")
+    if int(await get_async_redis().get(upload_writes_key(upload.id)) or 0) > 0:
+        raise HTTPException(status_code=409, detail="Upload has range writes in progress")
+
+    await discard_part(upload_part_path(current_user.id, upload.id))
+    await session.delete(upload)
+    await session.commit()
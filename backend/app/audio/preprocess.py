@@ -0,0 +1,94 @@
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Re-encode audio to a compact speech format before it is sent to Gemini.
+# Gemini resamples audio to 16 kHz mono anyway, so nothing is lost for
+# transcription while uploads and File API processing get much smaller.
+AUDIO_PREPROCESS = os.getenv("AUDIO_PREPROCESS", "false").lower() in ("1", "true", "yes")
+SPEECH_SAMPLE_RATE = int(os.getenv("AUDIO_PREPROCESS_SAMPLE_RATE", "16000"))
+SPEECH_BITRATE = os.getenv("AUDIO_PREPROCESS_BITRATE", "24k")
+SPEECH_SUFFIX = ".speech.ogg"
+SPEECH_MIME_TYPE = "audio/ogg"
+
+# Never let a stuck ffmpeg hold a worker forever
+FFMPEG_TIMEOUT = 600
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def speech_path(file_path: Path) -> Path:
+    """Cached speech version of an audio file, stored next to the original."""
+    return file_path.with_name(file_path.name + SPEECH_SUFFIX)
+
+
+def convert_to_speech(source: Path, destination: Path) -> None:
+    """
+    Downmix to mono, resample and encode as low-bitrate Opus. The output is
+    written to a temp file and renamed into place, so concurrent workers
+    converting the same file never see a partial result.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=destination.parent, prefix=".speech-", suffix=".ogg")
+    os.close(fd)
+    try:
+        subprocess.run(
+            [
+                "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+                "-i", str(source),
+                "-vn",
+                "-ac", "1",
+                "-ar", str(SPEECH_SAMPLE_RATE),
+                "-c:a", "libopus",
+                "-b:a", SPEECH_BITRATE,
+                "-application", "voip",
+                tmp_name,
+            ],
+            check=True,
+            capture_output=True,
+            timeout=FFMPEG_TIMEOUT,
+        )
+        os.replace(tmp_name, destination)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def prepare_for_upload(file_path: str, mime_type: str) -> tuple[str, str]:
+    """
+    Return the (path, mime_type) of the file to send to Gemini.
+    Falls back to the original file when pre-processing is disabled, ffmpeg is
+    missing, the conversion fails or the result would not be smaller.
+    """
+    if not AUDIO_PREPROCESS:
+        return file_path, mime_type
+    if not ffmpeg_available():
+        logger.warning("AUDIO_PREPROCESS is enabled but ffmpeg is not installed; uploading original audio")
+        return file_path, mime_type
+
+    source = Path(file_path)
+    cached = speech_path(source)
+    if not cached.exists():
+        try:
+            convert_to_speech(source, cached)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+            stderr = getattr(e, "stderr", None)
+            logger.warning(f"Audio pre-processing failed for {file_path}: {stderr.decode(errors='replace') if stderr else e}")
+            return file_path, mime_type
+
+    original_size = source.stat().st_size
+    converted_size = cached.stat().st_size
+    if converted_size >= original_size:
+        return file_path, mime_type
+
+    logger.info(f"Pre-processed {source.name}: {original_size} -> {converted_size} bytes")
+    return str(cached), SPEECH_MIME_TYPE
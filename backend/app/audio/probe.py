@@ -0,0 +1,337 @@
+"""
+Cheap audio duration probing from container headers.
+
+Only headers (and, for Ogg/WebM, a small window at the end of the file) are
+read; no audio is decoded. Supported: WAV, MP3, Ogg (Opus/Vorbis), FLAC,
+WebM/Matroska and MP4/M4A. Unknown or malformed files yield None.
+"""
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+logger = logging.getLogger(__name__)
+
+# How much of the file end is read to find the last Ogg page / WebM cluster
+_TAIL_SIZE = 256 * 1024
+
+
+def probe_duration(path) -> Optional[float]:
+    """Return the duration of an audio file in seconds, or None if unknown."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(64)
+            file_size = os.fstat(f.fileno()).st_size
+            if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+                duration = _wav_duration(f, file_size)
+            elif head[:4] == b"OggS":
+                duration = _ogg_duration(f, file_size)
+            elif head[:4] == b"fLaC":
+                duration = _flac_duration(f)
+            elif head[:4] == b"\x1a\x45\xdf\xa3":
+                duration = _matroska_duration(f, file_size)
+            elif head[4:8] == b"ftyp":
+                duration = _mp4_duration(f, file_size)
+            elif head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+                duration = _mp3_duration(f, file_size)
+            else:
+                duration = None
+    except (OSError, ValueError, struct.error, IndexError) as e:
+        logger.warning(f"Could not probe duration of {Path(path).name}: {e}")
+        return None
+    if duration is None or duration <= 0:
+        return None
+    return round(duration, 3)
+
+
+# ---------------------------------------------------------------------------
+# WAV
+# ---------------------------------------------------------------------------
+
+def _wav_duration(f: BinaryIO, file_size: int) -> Optional[float]:
+    f.seek(12)
+    byte_rate = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        chunk_id, chunk_size = struct.unpack("<4sI", header)
+        if chunk_id == b"fmt ":
+            fmt = f.read(chunk_size)
+            byte_rate = struct.unpack_from("<I", fmt, 8)[0]
+            f.seek(chunk_size % 2, os.SEEK_CUR)
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Streaming writers leave the size at 0 or 0xFFFFFFFF
+            available = file_size - f.tell()
+            if chunk_size == 0 or chunk_size > available:
+                chunk_size = available
+            return chunk_size / byte_rate
+        else:
+            f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+
+# ---------------------------------------------------------------------------
+# MP3
+# ---------------------------------------------------------------------------
+
+_MP3_BITRATES = {
+    # (version_bits is MPEG-1, layer) -> kbps by index
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def _mp3_duration(f: BinaryIO, file_size: int) -> Optional[float]:
+    f.seek(0)
+    header = f.read(10)
+    audio_start = 0
+    if header[:3] == b"ID3":
+        # Syncsafe tag size, plus the optional footer
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        audio_start = 10 + size + (10 if header[5] & 0x10 else 0)
+
+    f.seek(audio_start)
+    window = f.read(64 * 1024)
+    for i in range(len(window) - 4):
+        if window[i] != 0xFF or window[i + 1] & 0xE0 != 0xE0:
+            continue
+        version = (window[i + 1] >> 3) & 0x03
+        layer_bits = (window[i + 1] >> 1) & 0x03
+        bitrate_index = window[i + 2] >> 4
+        rate_index = (window[i + 2] >> 2) & 0x03
+        if version == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+        mpeg1 = version == 3
+        layer = 4 - layer_bits
+        bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+        mono = (window[i + 3] >> 6) == 3
+        if layer == 1:
+            samples_per_frame = 384
+        elif layer == 3 and not mpeg1:
+            samples_per_frame = 576
+        else:
+            samples_per_frame = 1152
+
+        frame = window[i:i + 200]
+        # Xing/Info header (VBR) sits right after the side information
+        side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+        xing = frame[4 + side_info:]
+        if xing[:4] in (b"Xing", b"Info") and len(xing) >= 12 and struct.unpack(">I", xing[4:8])[0] & 0x1:
+            frames = struct.unpack(">I", xing[8:12])[0]
+            return frames * samples_per_frame / sample_rate
+        # VBRI header (Fraunhofer encoder) is at a fixed offset
+        if frame[36:40] == b"VBRI" and len(frame) >= 54:
+            frames = struct.unpack(">I", frame[50:54])[0]
+            return frames * samples_per_frame / sample_rate
+        # Constant bitrate: derive from the size of the audio data
+        audio_bytes = file_size - (audio_start + i)
+        if file_size >= 128:
+            f.seek(file_size - 128)
+            if f.read(3) == b"TAG":
+                audio_bytes -= 128
+        return audio_bytes * 8 / bitrate
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Ogg (Opus / Vorbis) and FLAC
+# ---------------------------------------------------------------------------
+
+def _ogg_duration(f: BinaryIO, file_size: int) -> Optional[float]:
+    f.seek(0)
+    first_page = f.read(27)
+    segments = first_page[26]
+    f.seek(27 + segments)
+    packet = f.read(32)
+    if packet[:8] == b"OpusHead":
+        # Opus granule positions always count 48 kHz samples
+        sample_rate = 48000
+        pre_skip = struct.unpack_from("<H", packet, 10)[0]
+    elif packet[:7] == b"\x01vorbis":
+        sample_rate = struct.unpack_from("<I", packet, 12)[0]
+        pre_skip = 0
+    elif packet[:5] == b"\x7fFLAC":
+        sample_rate = (struct.unpack_from(">I", packet, 27)[0] >> 12) & 0xFFFFF if len(packet) >= 31 else 0
+        pre_skip = 0
+    else:
+        return None
+    if not sample_rate:
+        return None
+
+    f.seek(max(0, file_size - _TAIL_SIZE))
+    tail = f.read()
+    position = tail.rfind(b"OggS")
+    while position != -1:
+        granule = struct.unpack_from("<q", tail, position + 6)[0] if position + 14 <= len(tail) else -1
+        if granule > 0:
+            return (granule - pre_skip) / sample_rate
+        position = tail.rfind(b"OggS", 0, position)
+    return None
+
+
+def _flac_duration(f: BinaryIO) -> Optional[float]:
+    f.seek(4)
+    block_header = f.read(4)
+    if block_header[0] & 0x7F != 0:  # STREAMINFO must come first
+        return None
+    info = f.read(34)
+    packed = int.from_bytes(info[10:18], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+# ---------------------------------------------------------------------------
+# WebM / Matroska
+# ---------------------------------------------------------------------------
+
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_CLUSTER = 0x1F43B675
+_EBML_TIMECODE_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+_EBML_CLUSTER_TIMECODE = 0xE7
+_EBML_SIMPLE_BLOCK = 0xA3
+_EBML_BLOCK_GROUP = 0xA0
+_EBML_BLOCK = 0xA1
+_EBML_UNKNOWN_SIZE = -1
+
+
+def _read_vint(data: bytes, pos: int, keep_marker: bool) -> tuple[int, int]:
+    """Read an EBML variable-length integer. Returns (value, new_position)."""
+    first = data[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML variable-length integer")
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = value == mask - 1
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    if len(data) < pos + length:
+        raise ValueError("Truncated EBML element")
+    if not keep_marker and all_ones:
+        value = _EBML_UNKNOWN_SIZE
+    return value, pos + length
+
+
+def _matroska_duration(f: BinaryIO, file_size: int) -> Optional[float]:
+    f.seek(0)
+    head = f.read(64 * 1024)
+
+    # Walk EBML header -> Segment -> Info
+    pos = 0
+    timecode_scale = 1_000_000
+    duration = None
+    segment_end = len(head)
+    while pos < segment_end:
+        element_id, pos = _read_vint(head, pos, keep_marker=True)
+        size, pos = _read_vint(head, pos, keep_marker=False)
+        if element_id in (_EBML_SEGMENT, _EBML_INFO):
+            if element_id == _EBML_INFO and size != _EBML_UNKNOWN_SIZE:
+                segment_end = min(segment_end, pos + size)
+            continue  # Descend into the element
+        if element_id == _EBML_TIMECODE_SCALE:
+            timecode_scale = int.from_bytes(head[pos:pos + size], "big")
+        elif element_id == _EBML_DURATION:
+            duration = struct.unpack(">f" if size == 4 else ">d", head[pos:pos + size])[0]
+        elif element_id == _EBML_CLUSTER or size == _EBML_UNKNOWN_SIZE:
+            break
+        pos += size
+
+    if duration:
+        return duration * timecode_scale / 1e9
+
+    # Live recordings (e.g. browser MediaRecorder) have no Duration element:
+    # use the timestamp of the last block in the last cluster instead.
+    f.seek(max(0, file_size - _TAIL_SIZE))
+    tail = f.read()
+    position = tail.rfind(_EBML_CLUSTER.to_bytes(4, "big"))
+    while position != -1:
+        last_timecode = _last_block_timecode(tail, position + 4)
+        if last_timecode is not None:
+            return last_timecode * timecode_scale / 1e9
+        position = tail.rfind(_EBML_CLUSTER.to_bytes(4, "big"), 0, position)
+    return None
+
+
+def _last_block_timecode(data: bytes, pos: int) -> Optional[int]:
+    try:
+        size, pos = _read_vint(data, pos, keep_marker=False)
+        end = len(data) if size == _EBML_UNKNOWN_SIZE else min(len(data), pos + size)
+        cluster_timecode = None
+        last = None
+        while pos < end:
+            element_id, pos = _read_vint(data, pos, keep_marker=True)
+            size, pos = _read_vint(data, pos, keep_marker=False)
+            if element_id == _EBML_CLUSTER_TIMECODE:
+                cluster_timecode = int.from_bytes(data[pos:pos + size], "big")
+            elif element_id in (_EBML_SIMPLE_BLOCK, _EBML_BLOCK) and cluster_timecode is not None:
+                _, block_pos = _read_vint(data, pos, keep_marker=False)  # track number
+                relative = struct.unpack_from(">h", data, block_pos)[0]
+                last = cluster_timecode + relative
+            elif element_id == _EBML_BLOCK_GROUP:
+                continue  # Descend to find the Block
+            elif element_id == _EBML_CLUSTER or size == _EBML_UNKNOWN_SIZE:
+                break
+            pos += size
+        return last if last is not None else cluster_timecode
+    except (ValueError, IndexError, struct.error):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# MP4 / M4A
+# ---------------------------------------------------------------------------
+
+def _mp4_duration(f: BinaryIO, file_size: int) -> Optional[float]:
+    # Top-level boxes are skipped by seeking, so a trailing 'moov' is cheap
+    offset = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        size, box_type = struct.unpack(">I4s", f.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size:
+            return None
+        if box_type == b"moov":
+            return _mvhd_duration(f, offset + header_size, offset + size)
+        offset += size
+    return None
+
+
+def _mvhd_duration(f: BinaryIO, start: int, end: int) -> Optional[float]:
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, box_type = struct.unpack(">I4s", f.read(8))
+        if size < 8:
+            return None
+        if box_type == b"mvhd":
+            body = f.read(32)
+            if body[0] == 1:
+                timescale, duration = struct.unpack_from(">IQ", body, 20)
+            else:
+                timescale, duration = struct.unpack_from(">II", body, 12)
+            return duration / timescale if timescale else None
+        offset += size
+    return None
@@ -0,0 +1,52 @@
+import os
+import subprocess
+from pathlib import Path
+from typing import List, Tuple
+
+from app.audio.preprocess import SPEECH_BITRATE, SPEECH_SAMPLE_RATE, FFMPEG_TIMEOUT
+
+# Recordings at least this long are transcribed as overlapping segments
+SEGMENT_MIN_DURATION = float(os.getenv("TRANSCRIBE_SEGMENT_MIN_SECONDS", "1800"))
+SEGMENT_LENGTH = float(os.getenv("TRANSCRIBE_SEGMENT_SECONDS", "600"))
+SEGMENT_OVERLAP = float(os.getenv("TRANSCRIBE_SEGMENT_OVERLAP_SECONDS", "20"))
+
+
+def plan_segments(duration: float, length: float = SEGMENT_LENGTH, overlap: float = SEGMENT_OVERLAP) -> List[Tuple[float, float]]:
+    """
+    Split `duration` seconds into (start, length) windows of `length` seconds
+    where each window overlaps the previous one by `overlap` seconds.
+    """
+    if duration <= length:
+        return [(0.0, duration)]
+    step = length - overlap
+    segments = []
+    start = 0.0
+    while start < duration:
+        segments.append((start, min(length, duration - start)))
+        if start + length >= duration:
+            break
+        start += step
+    return segments
+
+
+def extract_segment(source: Path, start: float, length: float, destination: Path) -> Path:
+    """Cut a time window out of an audio file as mono speech-encoded Opus."""
+    subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+            "-ss", f"{start:.3f}",
+            "-t", f"{length:.3f}",
+            "-i", str(source),
+            "-vn",
+            "-ac", "1",
+            "-ar", str(SPEECH_SAMPLE_RATE),
+            "-c:a", "libopus",
+            "-b:a", SPEECH_BITRATE,
+            "-application", "voip",
+            str(destination),
+        ],
+        check=True,
+        capture_output=True,
+        timeout=FFMPEG_TIMEOUT,
+    )
+    return destination
@@ -0,0 +1,219 @@
+"""
+Parsing and stitching of timestamped, speaker-labelled transcripts.
+
+Transcripts are expected as one speaker turn per line, e.g.
+"[01:23] Speaker 2: Amra ajke meeting korsi". Lines that don't start with a
+timestamp are treated as continuations of the previous turn.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+_TURN_PATTERN = re.compile(
+    r"^\s*[\[(]?\s*(?:(\d{1,2}):)?(\d{1,3}):(\d{2})(?:\.\d+)?\s*[\])]?\s*[-–:]?\s*"
+    r"(?:\**\s*(Speaker\s*\d+)\s*\**\s*:?\**)?\s*(.*)$",
+    re.IGNORECASE,
+)
+# "Speaker 2 [01:23]: ..." is accepted as well
+_SPEAKER_FIRST_PATTERN = re.compile(
+    r"^\s*\**\s*(Speaker\s*\d+)\s*\**\s*[\[(]\s*(?:(\d{1,2}):)?(\d{1,3}):(\d{2})(?:\.\d+)?\s*[\])]\s*\**\s*:?\s*(.*)$",
+    re.IGNORECASE,
+)
+_SPEAKER_NUMBER = re.compile(r"\d+")
+# Turns of translated transcripts may have lost their timestamps
+_SPEAKER_LINE = re.compile(r"^\s*\**\s*Speaker\s*\d+", re.IGNORECASE)
+
+# Turns in the overlap of two segments are matched when their words overlap
+# this much and their timestamps are this close (or, for longer overlaps, no
+# further apart than the overlap)
+_MATCH_SIMILARITY = 0.5
+_MATCH_MAX_TIME_DELTA = 8.0
+
+
+@dataclass
+class Turn:
+    start: float  # Seconds from the start of the recording
+    speaker: Optional[int]
+    text: str
+
+
+def parse_timestamp(hours: Optional[str], minutes: str, seconds: str) -> float:
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def format_timestamp(seconds: float) -> str:
+    total = int(round(seconds))
+    return f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+
+
+def parse_turns(text: str, offset: float = 0.0) -> List[Turn]:
+    """Parse a transcript into turns, shifting timestamps by `offset` seconds."""
+    turns: List[Turn] = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        match = _TURN_PATTERN.match(line)
+        speaker_first = None if match else _SPEAKER_FIRST_PATTERN.match(line)
+        if speaker_first:
+            speaker, hours, minutes, seconds, rest = speaker_first.groups()
+        elif match:
+            hours, minutes, seconds, speaker, rest = match.groups()
+        if match or speaker_first:
+            number = int(_SPEAKER_NUMBER.search(speaker).group()) if speaker else None
+            turns.append(Turn(offset + parse_timestamp(hours, minutes, seconds), number, rest.strip()))
+        elif turns:
+            turns[-1].text = f"{turns[-1].text}\n{line.strip()}".strip()
+        else:
+            turns.append(Turn(offset, None, line.strip()))
+    return turns
+
+
+def split_turn_blocks(text: str) -> List[str]:
+    """
+    Split a transcript into the raw text of its speaker turns, keeping
+    continuation lines with their turn. Unlike parse_turns this leaves the
+    text untouched and also recognises turns without a timestamp.
+    """
+    blocks: List[str] = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        starts_turn = _TURN_PATTERN.match(line) or _SPEAKER_FIRST_PATTERN.match(line) or _SPEAKER_LINE.match(line)
+        if starts_turn or not blocks:
+            blocks.append(line)
+        else:
+            blocks[-1] = f"{blocks[-1]}\n{line}"
+    return blocks
+
+
+def format_turns(turns: List[Turn]) -> str:
+    lines = []
+    for turn in turns:
+        label = f" Speaker {turn.speaker}:" if turn.speaker is not None else ""
+        lines.append(f"[{format_timestamp(turn.start)}]{label} {turn.text}".rstrip())
+    return "\n".join(lines)
+
+
+def remap_timestamps(text: str, mapper: Callable[[float], float]) -> str:
+    """Rewrite every turn timestamp of a transcript through `mapper`."""
+    turns = parse_turns(text)
+    if not any(turn.speaker is not None for turn in turns):
+        return text  # Not in the timestamped format; leave it untouched
+    for turn in turns:
+        turn.start = mapper(turn.start)
+    return format_turns(turns)
+
+
+def _similarity(a: str, b: str) -> float:
+    words_a = set(re.findall(r"\w+", a.lower()))
+    words_b = set(re.findall(r"\w+", b.lower()))
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def _match_turns(previous: List[Turn], current: List[Turn], max_delta: float) -> List[Tuple[Turn, Turn]]:
+    """
+    Pair up turns that both segments transcribed in their overlap: close in
+    time and similar in words. Each turn is in at most one pair; the most
+    similar pairs are taken first.
+    """
+    candidates = []
+    for i, earlier in enumerate(previous):
+        for j, turn in enumerate(current):
+            if abs(earlier.start - turn.start) > max_delta:
+                continue
+            similarity = _similarity(earlier.text, turn.text)
+            if similarity >= _MATCH_SIMILARITY:
+                candidates.append((similarity, i, j))
+
+    pairs = []
+    used_previous, used_current = set(), set()
+    for _, i, j in sorted(candidates, key=lambda c: -c[0]):
+        if i in used_previous or j in used_current:
+            continue
+        used_previous.add(i)
+        used_current.add(j)
+        pairs.append((previous[i], current[j]))
+    return pairs
+
+
+def _speaker_mapping(previous: List[Turn], current: List[Turn], pairs: List[Tuple[Turn, Turn]]) -> dict:
+    """
+    Map the speaker numbers of `current` onto those already used in
+    `previous`, voting with the turns paired up in the overlap. Unmatched
+    speakers keep their number unless a matched speaker already took it, in
+    which case they get the next unused one.
+    """
+    votes: dict = {}
+    for earlier, turn in pairs:
+        if earlier.speaker is not None and turn.speaker is not None:
+            votes.setdefault(turn.speaker, Counter())[earlier.speaker] += 1
+
+    mapping = {}
+    taken = set()
+    for speaker, counter in votes.items():
+        for candidate, _ in counter.most_common():
+            if candidate not in taken:
+                mapping[speaker] = candidate
+                taken.add(candidate)
+                break
+
+    known = {turn.speaker for turn in previous if turn.speaker is not None}
+    next_free = max(known | taken | {0}) + 1
+    for speaker in sorted({turn.speaker for turn in current if turn.speaker is not None}):
+        if speaker in mapping:
+            continue
+        if speaker in taken:
+            mapping[speaker] = next_free
+            next_free += 1
+        else:
+            mapping[speaker] = speaker
+        taken.add(mapping[speaker])
+    return mapping
+
+
+def stitch_segments(segments: List[Tuple[float, str]], overlap: float) -> str:
+    """
+    Join the transcripts of overlapping audio segments into one transcript.
+
+    `segments` is a list of (segment start in seconds, transcript with
+    timestamps relative to the segment). Timestamps are shifted to absolute
+    time, speaker labels are reconciled across segments, and turns in each
+    overlap are deduplicated. A turn both segments transcribed is kept once,
+    from the earlier segment if the two timestamps average out before the
+    middle of the overlap and from the later one otherwise, so timestamps
+    that disagree across the middle neither drop nor repeat it. Other turns
+    are taken from the earlier segment before the middle and from the later
+    one after it.
+    """
+    stitched: List[Turn] = []
+    for index, (start, text) in enumerate(sorted(segments, key=lambda s: s[0])):
+        turns = parse_turns(text, offset=start)
+        if index == 0:
+            stitched.extend(turns)
+            continue
+
+        previous_tail = [turn for turn in stitched if turn.start >= start - _MATCH_MAX_TIME_DELTA]
+        current_head = [turn for turn in turns if turn.start < start + overlap + _MATCH_MAX_TIME_DELTA]
+        pairs = _match_turns(previous_tail, current_head, max(_MATCH_MAX_TIME_DELTA, overlap))
+        mapping = _speaker_mapping(previous_tail, turns, pairs)
+        for turn in turns:
+            if turn.speaker is not None:
+                turn.speaker = mapping.get(turn.speaker, turn.speaker)
+
+        boundary = start + overlap / 2
+        keep_earlier = {}
+        for earlier, turn in pairs:
+            keep_earlier[id(earlier)] = keep_earlier[id(turn)] = (earlier.start + turn.start) / 2 < boundary
+        stitched = [
+            turn for turn in stitched
+            if keep_earlier.get(id(turn), turn.start < boundary)
+        ]
+        stitched.extend(
+            turn for turn in turns
+            if not keep_earlier.get(id(turn), turn.start < boundary)
+        )
+        stitched.sort(key=lambda turn: turn.start)
+    return format_turns(stitched)
@@ -0,0 +1,144 @@
+"""
+CPU-only silence trimming before transcription.
+
+Silences are found with ffmpeg's energy-based `silencedetect` filter; long
+ones are cut down to a short pause and the kept spans are re-encoded as one
+speech file. An OffsetMap records where every kept span came from, so
+timestamps in the transcript of the trimmed audio can be mapped back to the
+original recording.
+"""
+import os
+import re
+import subprocess
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from app.audio.preprocess import FFMPEG_TIMEOUT, SPEECH_BITRATE, SPEECH_SAMPLE_RATE
+
+SILENCE_TRIM = os.getenv("AUDIO_SILENCE_TRIM", "false").lower() in ("1", "true", "yes")
+SILENCE_THRESHOLD_DB = float(os.getenv("AUDIO_SILENCE_THRESHOLD_DB", "-40"))
+# Only silences at least this long are shortened ...
+SILENCE_MIN_SECONDS = float(os.getenv("AUDIO_SILENCE_MIN_SECONDS", "2.0"))
+# ... and each of them is replaced by a pause of this length
+SILENCE_KEEP_SECONDS = float(os.getenv("AUDIO_SILENCE_KEEP_SECONDS", "0.5"))
+# Not worth re-encoding the file for less than this
+_MIN_SAVED_SECONDS = 5.0
+
+# Gemini bills audio input at a fixed rate per second
+AUDIO_TOKENS_PER_SECOND = 32
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[0-9.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[0-9.]+)")
+
+
+@dataclass
+class OffsetMap:
+    # (start in trimmed audio, start in original audio, length) per kept span
+    spans: List[Tuple[float, float, float]]
+    original_duration: float
+
+    @property
+    def trimmed_duration(self) -> float:
+        if not self.spans:
+            return 0.0
+        trimmed_start, _, length = self.spans[-1]
+        return trimmed_start + length
+
+    @property
+    def removed_seconds(self) -> float:
+        return self.original_duration - self.trimmed_duration
+
+    @property
+    def removed_tokens(self) -> int:
+        return int(self.removed_seconds * AUDIO_TOKENS_PER_SECOND)
+
+    def to_original(self, seconds: float) -> float:
+        """Translate a time in the trimmed audio to the original recording."""
+        starts = [span[0] for span in self.spans]
+        index = max(0, bisect_right(starts, seconds) - 1)
+        trimmed_start, original_start, length = self.spans[index]
+        return original_start + min(max(seconds - trimmed_start, 0.0), length)
+
+
+def detect_silences(source: Path, duration: float) -> List[Tuple[float, float]]:
+    """Return the (start, end) of every silence of at least SILENCE_MIN_SECONDS."""
+    result = subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-hide_banner", "-nostats",
+            "-i", str(source),
+            "-vn",
+            "-af", f"silencedetect=noise={SILENCE_THRESHOLD_DB}dB:duration={SILENCE_MIN_SECONDS}",
+            "-f", "null", "-",
+        ],
+        check=True,
+        capture_output=True,
+        timeout=FFMPEG_TIMEOUT,
+    )
+    silences = []
+    start = None
+    for line in result.stderr.decode(errors="replace").splitlines():
+        if match := _SILENCE_START.search(line):
+            start = max(0.0, float(match.group(1)))
+        elif (match := _SILENCE_END.search(line)) and start is not None:
+            silences.append((start, min(float(match.group(1)), duration)))
+            start = None
+    if start is not None:
+        silences.append((start, duration))  # Silent until the end
+    return silences
+
+
+def plan_kept_spans(silences: List[Tuple[float, float]], duration: float, keep: float = SILENCE_KEEP_SECONDS) -> List[Tuple[float, float]]:
+    """Original (start, end) spans that remain after shortening each silence to `keep` seconds."""
+    spans = []
+    cursor = 0.0
+    for start, end in silences:
+        cut_start = start + keep / 2
+        cut_end = end - keep / 2
+        if cut_end <= cut_start:
+            continue
+        if cut_start > cursor:
+            spans.append((cursor, cut_start))
+        cursor = max(cursor, cut_end)
+    if cursor < duration:
+        spans.append((cursor, duration))
+    return spans
+
+
+def trim_silences(source: Path, destination: Path, duration: float) -> Optional[OffsetMap]:
+    """
+    Write `source` with long silences shortened to `destination` as speech
+    encoded Opus. Returns the offset map, or None if there was too little
+    silence to be worth it (nothing is written then).
+    """
+    spans = plan_kept_spans(detect_silences(source, duration), duration)
+    kept = sum(end - start for start, end in spans)
+    if not spans or duration - kept < _MIN_SAVED_SECONDS:
+        return None
+
+    selection = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in spans)
+    subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+            "-i", str(source),
+            "-vn",
+            "-af", f"aselect='{selection}',asetpts=N/SR/TB",
+            "-ac", "1",
+            "-ar", str(SPEECH_SAMPLE_RATE),
+            "-c:a", "libopus",
+            "-b:a", SPEECH_BITRATE,
+            "-application", "voip",
+            str(destination),
+        ],
+        check=True,
+        capture_output=True,
+        timeout=FFMPEG_TIMEOUT,
+    )
+
+    offset_spans = []
+    trimmed_start = 0.0
+    for start, end in spans:
+        offset_spans.append((trimmed_start, start, end - start))
+        trimmed_start += end - start
+    return OffsetMap(spans=offset_spans, original_duration=duration)
@@ -0,0 +1,79 @@
+"""
+Gemini Batch API submissions for batch-priority work.
+
+Translations and analyses requested with priority "batch" are not run as
+Celery tasks right away. The API appends them to a Redis list; every
+BATCH_SUBMIT_SECONDS task_submit_batch sends what is pending to Gemini as
+one batch job, and every BATCH_POLL_SECONDS task_poll_batches writes the
+results of finished jobs back to their records. Batch jobs are billed at
+half the interactive price and have a quota of their own, but may take up
+to a day; jobs that fail are run the interactive way instead.
+"""
+import json
+import os
+import time
+
+from app.llm.providers import get_provider
+from app.redis_client import BATCH_QUEUE_KEY, get_redis
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "500"))
+BATCH_SUBMIT_SECONDS = float(os.getenv("BATCH_SUBMIT_SECONDS", "900"))
+BATCH_POLL_SECONDS = float(os.getenv("BATCH_POLL_SECONDS", "60"))
+
+RUNNING_STATES = ("JOB_STATE_PENDING", "JOB_STATE_RUNNING", "JOB_STATE_QUEUED",
+                  "JOB_STATE_CANCELLING", "JOB_STATE_PAUSED", "JOB_STATE_UPDATING")
+SUCCEEDED_STATE = "JOB_STATE_SUCCEEDED"
+# Terminal states with no results, whose jobs are run the interactive way
+FAILED_STATES = ("JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED")
+
+_SUBMITTED_KEY = "batch:submitted"  # Hash of batch name -> JSON list of its jobs
+
+
+def take_pending(limit: int = BATCH_MAX_REQUESTS) -> list[dict]:
+    raw = get_redis().lpop(BATCH_QUEUE_KEY, limit) or []
+    return [json.loads(job) for job in raw]
+
+
+def requeue(jobs: list[dict]):
+    """Put jobs back at the head of the queue, in their order."""
+    if jobs:
+        get_redis().lpush(BATCH_QUEUE_KEY, *[json.dumps(job) for job in reversed(jobs)])
+
+
+def submit(jobs: list[dict], requests: list[tuple]) -> str:
+    """Send one (contents, config) request per job as a batch job."""
+    batch = get_provider().create_batch(requests, display_name=f"asr-middleware-{int(time.time())}")
+    get_redis().hset(_SUBMITTED_KEY, batch.name, json.dumps(jobs))
+    return batch.name
+
+
+def submitted() -> dict[str, list[dict]]:
+    return {name: json.loads(jobs) for name, jobs in get_redis().hgetall(_SUBMITTED_KEY).items()}
+
+
+def claim(name: str) -> bool:
+    """Take a finished batch off the submitted list; False if another poll already did."""
+    return bool(get_redis().hdel(_SUBMITTED_KEY, name))
+
+
+def results(name: str) -> tuple[str, list[str | None] | None]:
+    """
+    State of a batch job and, once it succeeded, the text of every response
+    in request order (None for requests that failed on their own).
+    """
+    batch = get_provider().get_batch(name)
+    state = batch.state.name
+    if state != SUCCEEDED_STATE:
+        return state, None
+    texts = []
+    for response in batch.dest.inlined_responses:
+        texts.append(response.response.text if response.response is not None and response.error is None else None)
+    return state, texts
+
+
+def stats() -> dict:
+    r = get_redis()
+    return {
+        "pending": r.llen(BATCH_QUEUE_KEY),
+        "batches": [{"name": name, "jobs": len(jobs)} for name, jobs in submitted().items()],
+    }
@@ -0,0 +1,147 @@
+"""
+Content-addressed cache of LLM responses in Redis.
+
+Entries are keyed by a hash of the model, the prompt template and its
+version, and the template inputs, so the same text sent through the same
+prompt is only ever generated once. Every entry expires after
+LLM_CACHE_TTL_SECONDS, and once the entries add up to more than
+LLM_CACHE_MAX_BYTES the least recently used ones are evicted.
+"""
+import hashlib
+import json
+import os
+import time
+
+from app.llm.prompts import PromptTemplate
+from app.redis_client import get_redis
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+_ENTRY_PREFIX = "llm:cache:entry:"
+_INDEX_KEY = "llm:cache:index"  # Sorted set of keys by last use
+_SIZES_KEY = "llm:cache:sizes"  # Hash of key -> bytes
+_BYTES_KEY = "llm:cache:bytes"
+_STATS_KEY = "llm:cache:stats"
+
+# Expired entries dropped from the index per put
+_SWEEP_LIMIT = 100
+
+# KEYS: entry, index, sizes, bytes. ARGV: key, value, ttl, max bytes, now,
+# entry key prefix, sweep limit.
+# Drops index entries whose key expired (unused for longer than the TTL,
+# so certainly gone), stores the entry, then evicts least recently used
+# entries over the budget. Entries that expired in the meantime are freed
+# without counting as evictions.
+_PUT_SCRIPT = """
+local function forget(member)
+  local freed = tonumber(redis.call('HGET', KEYS[3], member) or '0')
+  redis.call('HDEL', KEYS[3], member)
+  redis.call('ZREM', KEYS[2], member)
+  return redis.call('INCRBY', KEYS[4], -freed)
+end
+
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', tonumber(ARGV[5]) - tonumber(ARGV[3]), 'LIMIT', 0, tonumber(ARGV[7]))
+for _, member in ipairs(expired) do
+  if member ~= ARGV[1] then
+    forget(member)
+  end
+end
+
+local size = string.len(ARGV[2])
+local previous = tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0')
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+redis.call('ZADD', KEYS[2], ARGV[5], ARGV[1])
+redis.call('HSET', KEYS[3], ARGV[1], size)
+local total = redis.call('INCRBY', KEYS[4], size - previous)
+local evicted = 0
+while total > tonumber(ARGV[4]) do
+  local oldest = redis.call('ZRANGE', KEYS[2], 0, 0)
+  if #oldest == 0 then
+    break
+  end
+  if redis.call('DEL', ARGV[6] .. oldest[1]) == 1 then
+    evicted = evicted + 1
+  end
+  total = forget(oldest[1])
+end
+return evicted
+"""
+
+
+# KEYS: entry, index, sizes, bytes. ARGV: key.
+_FORGET_SCRIPT = """
+local freed = tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0')
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+redis.call('INCRBY', KEYS[4], -freed)
+"""
+
+
+def cache_key(model: str, prompt: PromptTemplate, inputs: dict) -> str:
+    payload = json.dumps(
+        {"model": model, "prompt": prompt.name, "version": prompt.version, "inputs": inputs},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get(key: str) -> str | None:
+    """Return the cached response text, or None on a miss."""
+    if not LLM_CACHE_ENABLED:
+        return None
+    r = get_redis()
+    raw = r.get(_ENTRY_PREFIX + key)
+    if raw is None:
+        r.hincrby(_STATS_KEY, "misses", 1)
+        return None
+
+    entry = json.loads(raw)
+    pipe = r.pipeline()
+    pipe.zadd(_INDEX_KEY, {key: time.time()})
+    pipe.hincrby(_STATS_KEY, "hits", 1)
+    pipe.hincrbyfloat(_STATS_KEY, "latency_saved_seconds", entry["latency"])
+    pipe.execute()
+    return entry["text"]
+
+
+def put(key: str, text: str, latency: float):
+    """Store a response together with how long it took to generate."""
+    if not LLM_CACHE_ENABLED:
+        return
+    value = json.dumps({"text": text, "latency": latency}, ensure_ascii=False)
+    evicted = get_redis().eval(
+        _PUT_SCRIPT, 4,
+        _ENTRY_PREFIX + key, _INDEX_KEY, _SIZES_KEY, _BYTES_KEY,
+        key, value, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_BYTES, time.time(), _ENTRY_PREFIX, _SWEEP_LIMIT,
+    )
+    if evicted:
+        get_redis().hincrby(_STATS_KEY, "evictions", evicted)
+
+
+def forget(key: str):
+    """Drop an entry, e.g. one found unusable."""
+    if not LLM_CACHE_ENABLED:
+        return
+    get_redis().eval(_FORGET_SCRIPT, 4, _ENTRY_PREFIX + key, _INDEX_KEY, _SIZES_KEY, _BYTES_KEY, key)
+
+
+def stats() -> dict:
+    r = get_redis()
+    counters = r.hgetall(_STATS_KEY)
+    hits = int(counters.get("hits", 0))
+    misses = int(counters.get("misses", 0))
+    return {
+        "enabled": LLM_CACHE_ENABLED,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "entries": r.zcard(_INDEX_KEY),
+        "bytes_stored": int(r.get(_BYTES_KEY) or 0),
+        "max_bytes": LLM_CACHE_MAX_BYTES,
+        "evictions": int(counters.get("evictions", 0)),
+        "latency_saved_seconds": float(counters.get("latency_saved_seconds", 0.0)),
+    }
@@ -0,0 +1,71 @@
+"""
+Gemini context caches for meeting transcripts read by more than one call.
+
+The analysis and the markdown notes of a meeting both need its whole
+translated transcript. When the transcript is at least
+CONTEXT_CACHE_MIN_TOKENS long and is going to be read again, it is stored
+once as cached content and later calls reference the cache instead of
+resending the text. Cache names are kept in Redis under a hash of the
+model and the text, for a little less than CONTEXT_CACHE_TTL_SECONDS, after
+which Gemini drops the cache by itself.
+"""
+import hashlib
+import logging
+import os
+import time
+
+from google.genai import errors
+
+from app.llm import usage
+from app.llm.gateway import GEMINI_MODEL
+from app.llm.providers import get_provider
+from app.llm.tokens import estimate_text_tokens
+from app.redis_client import get_redis
+
+CONTEXT_CACHE_ENABLED = os.getenv("CONTEXT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Gemini rejects caches below its minimum size (1024 tokens for Flash,
+# 2048 for Pro); small transcripts aren't worth the storage anyway
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "4096"))
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "900"))
+
+# Stop handing out a cache this long before Gemini expires it
+_EXPIRY_MARGIN_SECONDS = 60
+_KEY_PREFIX = "llm:context:"
+
+logger = logging.getLogger(__name__)
+
+
+def _key(model: str, transcript: str) -> str:
+    return _KEY_PREFIX + hashlib.sha256(f"{model}\n{transcript}".encode()).hexdigest()
+
+
+def transcript_cache(transcript: str, create: bool = False, model: str = GEMINI_MODEL) -> str | None:
+    """
+    Name of the cached content holding `transcript`, or None when it is too
+    short or not cached. With `create`, a missing cache is made first.
+    """
+    if not CONTEXT_CACHE_ENABLED or estimate_text_tokens(transcript) < CONTEXT_CACHE_MIN_TOKENS:
+        return None
+    key = _key(model, transcript)
+    name = get_redis().get(key)
+    if name or not create:
+        return name
+
+    started = time.perf_counter()
+    try:
+        cached = get_provider().create_cached_content(
+            [f"Meeting transcript:\n{transcript}"], model=model, ttl_seconds=CONTEXT_CACHE_TTL_SECONDS
+        )
+    except errors.APIError as e:
+        logger.warning(f"Could not cache the transcript, sending it in full: {e}")
+        return None
+    tokens = getattr(cached.usage_metadata, "total_token_count", None) or estimate_text_tokens(transcript)
+    usage.record_cache_write(tokens, time.perf_counter() - started)
+    get_redis().set(key, cached.name, ex=CONTEXT_CACHE_TTL_SECONDS - _EXPIRY_MARGIN_SECONDS)
+    logger.info(f"Cached transcript as {cached.name}")
+    return cached.name
+
+
+def forget(transcript: str, model: str = GEMINI_MODEL):
+    """Stop referencing a cache Gemini no longer has."""
+    get_redis().delete(_key(model, transcript))
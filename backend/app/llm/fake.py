@@ -0,0 +1,239 @@
+"""
+In-process fake of the Gemini API for load testing.
+
+Imitates the File API (uploads start PROCESSING and turn ACTIVE after a
+delay), call latency, transient errors and canned responses in the formats
+the pipeline parses. It keeps no state: everything needed to answer
+get_file() is encoded in the file name, so a file uploaded by one worker
+process can be polled from another. Cached content and batch jobs work
+the same way; cached tokens are reported as such but add no per-token
+latency, and a batch job succeeds FAKE_LLM_BATCH_SECONDS after submission.
+
+Tuning (environment):
+  FAKE_LLM_LATENCY_SECONDS        mean latency of generate_content (default 2.0)
+  FAKE_LLM_SECONDS_PER_1K_TOKENS  added latency per 1000 prompt tokens (default 0.0)
+  FAKE_LLM_UPLOAD_MBPS            simulated upload bandwidth (default 50)
+  FAKE_LLM_PROCESSING_SECONDS     time a file stays PROCESSING (default 3.0)
+  FAKE_LLM_ERROR_RATE             share of calls failing with 429/503 (default 0.0)
+  FAKE_LLM_TTFT_SECONDS           time to the first streamed chunk (default 0.5)
+  FAKE_LLM_BATCH_SECONDS          time a batch job takes (default 60)
+"""
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from google.genai import errors
+
+from app.llm.providers import LLMProvider
+from app.llm.tokens import estimate_text_tokens
+
+FAKE_LLM_LATENCY_SECONDS = float(os.getenv("FAKE_LLM_LATENCY_SECONDS", "2.0"))
+FAKE_LLM_SECONDS_PER_1K_TOKENS = float(os.getenv("FAKE_LLM_SECONDS_PER_1K_TOKENS", "0.0"))
+FAKE_LLM_UPLOAD_MBPS = float(os.getenv("FAKE_LLM_UPLOAD_MBPS", "50"))
+FAKE_LLM_PROCESSING_SECONDS = float(os.getenv("FAKE_LLM_PROCESSING_SECONDS", "3.0"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0.0"))
+FAKE_LLM_TTFT_SECONDS = float(os.getenv("FAKE_LLM_TTFT_SECONDS", "0.5"))
+FAKE_LLM_BATCH_SECONDS = float(os.getenv("FAKE_LLM_BATCH_SECONDS", "60"))
+
+# Streamed responses are cut into pieces of this many characters
+_STREAM_CHUNK_CHARS = 80
+
+# Gemini keeps uploaded files for 48 hours
+_FILE_TTL = timedelta(hours=48)
+
+_TRANSCRIPT = """[00:00] Speaker 1: Assalamu alaikum, amra ajke quarterly planning meeting shuru korchi.
+[00:12] Speaker 2: Thik ache. Ami prothome last quarter er sales report ta share kori.
+[00:41] Speaker 1: Backend migration ta kobe nagad shesh hobe?
+[01:05] Speaker 2: Next sprint er moddhe API deploy kore felbo, tarpor load test korbo."""
+
+_TRANSLATION = """Speaker 1: Peace be upon you, we are starting the quarterly planning meeting today.
+Speaker 2: Okay. Let me first share last quarter's sales report.
+Speaker 1: When will the backend migration be finished?
+Speaker 2: We will deploy the API within the next sprint and then run a load test.
+
+Confidence: 0.91"""
+
+_ANALYSIS = """SUMMARY:
+The team opened quarterly planning, reviewed last quarter's sales and agreed on a timeline for the backend migration.
+
+BUSINESS_INSIGHTS:
+Sales results from last quarter frame the targets for the next quarter.
+
+TECHNICAL_INSIGHTS:
+The backend API will be deployed next sprint, followed by a load test.
+
+ACTION_ITEMS:
+- Speaker 2: deploy the API next sprint
+- Speaker 2: run a load test after deployment
+
+KEY_TOPICS:
+Quarterly planning, sales report, backend migration"""
+
+_ANALYSIS_JSON = json.dumps({
+    "summary": "The team opened quarterly planning, reviewed last quarter's sales and agreed on a timeline for the backend migration.",
+    "business_insights": "Sales results from last quarter frame the targets for the next quarter.",
+    "technical_insights": "The backend API will be deployed next sprint, followed by a load test.",
+    "action_items": ["Speaker 2: deploy the API next sprint", "Speaker 2: run a load test after deployment"],
+    "key_topics": ["Quarterly planning", "Sales report", "Backend migration"],
+})
+
+_FUSED_JSON = json.dumps({
+    "transcript": _TRANSCRIPT,
+    "translation": """[00:00] Speaker 1: Peace be upon you, we are starting the quarterly planning meeting today.
+[00:12] Speaker 2: Okay. Let me first share last quarter's sales report.
+[00:41] Speaker 1: When will the backend migration be finished?
+[01:05] Speaker 2: We will deploy the API within the next sprint and then run a load test.""",
+    "confidence": 0.91,
+})
+
+_NOTES = """# Meeting Notes
+
+## Summary
+The team opened quarterly planning and agreed on the backend migration timeline.
+
+## Action Items
+- Deploy the API next sprint
+- Run a load test after deployment"""
+
+
+def _text_of(contents) -> str:
+    parts = contents if isinstance(contents, list) else [contents]
+    return "\n".join(part for part in parts if isinstance(part, str))
+
+
+def _cached_tokens(config) -> int:
+    # cachedContents/fake-<tokens>
+    name = getattr(config, "cached_content", None)
+    return int(name.rsplit("-", 1)[1]) if name else 0
+
+
+def _usage(prompt_tokens: int, cached_tokens: int, text: str):
+    return SimpleNamespace(
+        prompt_token_count=prompt_tokens + cached_tokens,
+        cached_content_token_count=cached_tokens or None,
+        candidates_token_count=len(text) // 4,
+        total_token_count=prompt_tokens + cached_tokens + len(text) // 4,
+    )
+
+
+_CANNED = {
+    "j": _ANALYSIS_JSON,
+    "f": _FUSED_JSON,
+    "x": _TRANSCRIPT,
+    "t": _TRANSLATION,
+    "n": _NOTES,
+    "a": _ANALYSIS,
+}
+
+
+def _canned_kind(contents, config=None) -> str:
+    prompt = _text_of(contents)
+    has_audio = isinstance(contents, list) and any(not isinstance(part, str) for part in contents)
+    if getattr(config, "response_schema", None) is not None:
+        return "f" if has_audio else "j"
+    if has_audio:
+        return "x"
+    if "Banglish text" in prompt:
+        return "t"
+    if "markdown" in prompt.lower():
+        return "n"
+    return "a"
+
+
+def _canned_response(contents, config=None) -> str:
+    return _CANNED[_canned_kind(contents, config)]
+
+
+class FakeProvider(LLMProvider):
+
+    def _maybe_fail(self):
+        if FAKE_LLM_ERROR_RATE and random.random() < FAKE_LLM_ERROR_RATE:
+            if random.random() < 0.5:
+                raise errors.ClientError(429, {"error": {"code": 429, "message": "Resource has been exhausted (fake).", "status": "RESOURCE_EXHAUSTED"}})
+            raise errors.ServerError(503, {"error": {"code": 503, "message": "The model is overloaded (fake).", "status": "UNAVAILABLE"}})
+
+    def _file(self, name: str, mime_type: str):
+        # files/fake-<id>-<ready at, ms>-<created at, ms>
+        _, ready_ms, created_ms = name.rsplit("-", 2)
+        now_ms = time.time() * 1000
+        state = "ACTIVE" if now_ms >= int(ready_ms) else "PROCESSING"
+        created = datetime.fromtimestamp(int(created_ms) / 1000, tz=timezone.utc)
+        return SimpleNamespace(
+            name=name,
+            uri=f"https://fake-llm.local/v1beta/{name}",
+            mime_type=mime_type,
+            state=SimpleNamespace(name=state),
+            create_time=created,
+            expiration_time=created + _FILE_TTL,
+        )
+
+    def upload_file(self, file_path: str, mime_type: str):
+        self._maybe_fail()
+        size = os.path.getsize(file_path)
+        time.sleep(size / (FAKE_LLM_UPLOAD_MBPS * 125_000))
+        now_ms = int(time.time() * 1000)
+        ready_ms = now_ms + int(FAKE_LLM_PROCESSING_SECONDS * 1000)
+        return self._file(f"files/fake-{uuid.uuid4().hex}-{ready_ms}-{now_ms}", mime_type)
+
+    def get_file(self, name: str):
+        return self._file(name, "audio/ogg")
+
+    def delete_file(self, name: str):
+        return None
+
+    def generate_content(self, contents, model: str | None = None, config=None, estimated_tokens: int | None = None):
+        self._maybe_fail()
+        prompt_tokens = estimate_text_tokens(_text_of(contents))
+        latency = random.gauss(FAKE_LLM_LATENCY_SECONDS, FAKE_LLM_LATENCY_SECONDS / 4)
+        time.sleep(max(0.0, latency) + prompt_tokens / 1000 * FAKE_LLM_SECONDS_PER_1K_TOKENS)
+        text = _canned_response(contents, config)
+        return SimpleNamespace(text=text, usage_metadata=_usage(prompt_tokens, _cached_tokens(config), text))
+
+    def generate_content_stream(self, contents, model: str | None = None, config=None, estimated_tokens: int | None = None):
+        self._maybe_fail()
+        prompt_tokens = estimate_text_tokens(_text_of(contents))
+        text = _canned_response(contents, config)
+        pieces = [text[i:i + _STREAM_CHUNK_CHARS] for i in range(0, len(text), _STREAM_CHUNK_CHARS)]
+        # The whole call takes as long as generate_content; the rest is spread over the pieces
+        total = max(0.0, random.gauss(FAKE_LLM_LATENCY_SECONDS, FAKE_LLM_LATENCY_SECONDS / 4))
+        total += prompt_tokens / 1000 * FAKE_LLM_SECONDS_PER_1K_TOKENS
+        time.sleep(min(FAKE_LLM_TTFT_SECONDS, total))
+        for index, piece in enumerate(pieces):
+            if index:
+                time.sleep(max(0.0, total - FAKE_LLM_TTFT_SECONDS) / len(pieces))
+            last = index == len(pieces) - 1
+            yield SimpleNamespace(
+                text=piece,
+                usage_metadata=_usage(prompt_tokens, _cached_tokens(config), text) if last else None,
+            )
+
+    def create_cached_content(self, contents, model: str | None = None, ttl_seconds: int = 600):
+        self._maybe_fail()
+        tokens = estimate_text_tokens(_text_of(contents))
+        return SimpleNamespace(
+            name=f"cachedContents/fake-{tokens}",
+            expire_time=datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+            usage_metadata=SimpleNamespace(total_token_count=tokens),
+        )
+
+    def create_batch(self, requests, model: str | None = None, display_name: str | None = None):
+        self._maybe_fail()
+        # batches/fake-<done at, ms>-<canned response kind of every request>
+        done_ms = int((time.time() + FAKE_LLM_BATCH_SECONDS) * 1000)
+        kinds = "".join(_canned_kind(contents, config) for contents, config in requests)
+        return self.get_batch(f"batches/fake-{done_ms}-{kinds}")
+
+    def get_batch(self, name: str):
+        _, done_ms, kinds = name.rsplit("-", 2)
+        done = time.time() * 1000 >= int(done_ms)
+        return SimpleNamespace(
+            name=name,
+            state=SimpleNamespace(name="JOB_STATE_SUCCEEDED" if done else "JOB_STATE_RUNNING"),
+            dest=SimpleNamespace(inlined_responses=[
+                SimpleNamespace(response=SimpleNamespace(text=_CANNED[kind]), error=None) for kind in kinds
+            ]) if done else None,
+        )
@@ -0,0 +1,107 @@
+"""
+Process-wide gateway to the Gemini API.
+
+Owns the single genai.Client of the process (created lazily, recreated after
+fork so Celery prefork children never share sockets with their parent), its
+HTTP connection pool and timeouts, and the limit on concurrent calls.
+Routers and Celery tasks must call Gemini through these functions instead
+of building their own clients.
+"""
+import os
+import threading
+
+import httpx
+from google import genai
+from google.genai import types
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "600"))
+# HTTP connections kept open to Gemini per process
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "20"))
+GEMINI_KEEPALIVE_SECONDS = float(os.getenv("GEMINI_KEEPALIVE_SECONDS", "120"))
+# Gemini calls (uploads and generations) in flight at once per process
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+
+_client = None
+_client_lock = threading.Lock()
+_sync_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=GEMINI_MAX_CONNECTIONS,
+        max_keepalive_connections=GEMINI_MAX_CONNECTIONS,
+        keepalive_expiry=GEMINI_KEEPALIVE_SECONDS,
+    )
+
+
+def get_client() -> genai.Client:
+    """Return the shared client of this process, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = genai.Client(
+                    api_key=os.getenv("GEMINI_API_KEY"),
+                    http_options=types.HttpOptions(
+                        timeout=int(GEMINI_TIMEOUT_SECONDS * 1000),
+                        client_args={"limits": _http_limits()},
+                    ),
+                )
+    return _client
+
+
+def _reset_after_fork():
+    global _client, _client_lock, _sync_slots
+    _client = None
+    _client_lock = threading.Lock()
+    _sync_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def generate_content(contents, model: str = GEMINI_MODEL, config=None):
+    with _sync_slots:
+        return get_client().models.generate_content(model=model, contents=contents, config=config)
+
+
+def generate_content_stream(contents, model: str = GEMINI_MODEL, config=None):
+    """Yield response chunks as they arrive; the call holds its slot until fully consumed."""
+    with _sync_slots:
+        yield from get_client().models.generate_content_stream(model=model, contents=contents, config=config)
+
+
+def create_cached_content(contents, model: str = GEMINI_MODEL, ttl_seconds: int = 600):
+    with _sync_slots:
+        return get_client().caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(contents=contents, ttl=f"{ttl_seconds}s"),
+        )
+
+
+def create_batch(requests, model: str = GEMINI_MODEL, display_name: str | None = None):
+    """Submit (contents, config) pairs as one batch job; results keep their order."""
+    return get_client().batches.create(
+        model=model,
+        src=[types.InlinedRequest(contents=contents, config=config) for contents, config in requests],
+        config=types.CreateBatchJobConfig(display_name=display_name),
+    )
+
+
+def get_batch(name: str):
+    return get_client().batches.get(name=name)
+
+
+def upload_file(file_path: str, mime_type: str):
+    with _sync_slots:
+        with open(file_path, "rb") as f:
+            return get_client().files.upload(file=f, config={"mime_type": mime_type})
+
+
+def get_file(name: str):
+    return get_client().files.get(name=name)
+
+
+def delete_file(name: str):
+    return get_client().files.delete(name=name)
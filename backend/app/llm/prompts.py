@@ -0,0 +1,137 @@
+"""
+Prompt templates for the text stages of the pipeline.
+
+Bump a template's version whenever its wording changes: the version is part
+of the response cache key, so answers to the old wording stop being reused.
+
+Templates put their fixed instructions first and the meeting text last, so
+calls share the longest possible prefix for Gemini's implicit caching, and
+a transcript held in an explicit context cache can stand in for the tail.
+"""
+from dataclasses import dataclass
+
+# Rendered in place of a transcript that is sent as cached content instead
+CACHED_TRANSCRIPT = "(the meeting transcript provided above)"
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    name: str
+    version: int
+    template: str
+
+    def render(self, **values) -> str:
+        return self.template.format(**values)
+
+
+TRANSLATE_PROMPT = PromptTemplate(
+    name="translate",
+    version=2,
+    template="""You are an expert translator specializing in Banglish to English translation.
+
+Banglish is Bangla language written in Roman/Latin script. Your task is to translate the Banglish text below into proper, natural English.
+
+Provide ONLY the English translation. Be accurate and natural.
+
+After the translation, on a new line, also provide your confidence score (0.0 to 1.0) in the format: 'Confidence: 0.95'
+
+Banglish text:
+{source_text}""",
+)
+
+_ANALYSIS_INSTRUCTIONS = """You are an expert meeting analyst. Analyze the meeting transcript and provide:
+
+1. **SUMMARY**: A brief 2-3 sentence summary of the meeting
+2. **BUSINESS INSIGHTS**: Key business implications, decisions, goals, and strategic points
+3. **TECHNICAL INSIGHTS**: Technical discussions, implementation details, technologies mentioned, and technical decisions
+4. **ACTION ITEMS**: Specific tasks, assignments, and follow-ups mentioned (if any)
+5. **KEY TOPICS**: Main topics and themes discussed
+"""
+
+_ANALYSIS_INPUT = """
+Transcript:
+{transcript}
+"""
+
+# Map-reduce analysis of long meetings: every part of the transcript is
+# analysed on its own, then the partial analyses are merged
+_ANALYSIS_MAP_INSTRUCTIONS = """You are an expert meeting analyst. You are given one part of a long meeting transcript. Analyze only this part and provide:
+
+1. **SUMMARY**: A brief summary of what was discussed in this part
+2. **BUSINESS INSIGHTS**: Key business implications, decisions, goals, and strategic points
+3. **TECHNICAL INSIGHTS**: Technical discussions, implementation details, technologies mentioned, and technical decisions
+4. **ACTION ITEMS**: Specific tasks, assignments, and follow-ups mentioned (if any), with the responsible speaker
+5. **KEY TOPICS**: Main topics and themes discussed
+"""
+
+_ANALYSIS_MAP_INPUT = """
+Transcript part {part} of {parts}:
+{transcript}
+"""
+
+_ANALYSIS_REDUCE_INSTRUCTIONS = """You are an expert meeting analyst. A long meeting was analyzed in consecutive parts. Merge the partial analyses into one analysis of the whole meeting:
+
+1. **SUMMARY**: A brief 2-3 sentence summary of the whole meeting
+2. **BUSINESS INSIGHTS**: Key business implications, decisions, goals, and strategic points, without repetition
+3. **TECHNICAL INSIGHTS**: Technical discussions, implementation details, technologies mentioned, and technical decisions, without repetition
+4. **ACTION ITEMS**: Every action item from all parts; merge duplicates and keep the latest version of items that changed during the meeting
+5. **KEY TOPICS**: Main topics and themes of the whole meeting
+"""
+
+_ANALYSIS_REDUCE_INPUT = """
+Partial analyses of all {parts} parts:
+{partial_analyses}
+"""
+
+# Models with structured output get the instructions alone plus a response
+# schema; the others are asked for labelled sections
+_JSON_FORMAT = """
+Respond with JSON only. Give action items and key topics as lists with one entry per item or topic.
+"""
+
+_SECTION_FORMAT = """
+Provide your response in this exact format:
+
+SUMMARY:
+[Your summary here]
+
+BUSINESS_INSIGHTS:
+[Your business insights here]
+
+TECHNICAL_INSIGHTS:
+[Your technical insights here]
+
+ACTION_ITEMS:
+[Your action items here, or 'None identified' if there are none]
+
+KEY_TOPICS:
+[Your key topics here]
+"""
+
+ANALYSIS_PROMPT = PromptTemplate(name="analysis", version=3, template=_ANALYSIS_INSTRUCTIONS + _JSON_FORMAT + _ANALYSIS_INPUT)
+ANALYSIS_MAP_PROMPT = PromptTemplate(name="analysis-map", version=3, template=_ANALYSIS_MAP_INSTRUCTIONS + _JSON_FORMAT + _ANALYSIS_MAP_INPUT)
+ANALYSIS_REDUCE_PROMPT = PromptTemplate(name="analysis-reduce", version=3, template=_ANALYSIS_REDUCE_INSTRUCTIONS + _JSON_FORMAT + _ANALYSIS_REDUCE_INPUT)
+
+ANALYSIS_SECTIONS_PROMPT = PromptTemplate(name="analysis-sections", version=2, template=_ANALYSIS_INSTRUCTIONS + _SECTION_FORMAT + _ANALYSIS_INPUT)
+ANALYSIS_MAP_SECTIONS_PROMPT = PromptTemplate(name="analysis-map-sections", version=2, template=_ANALYSIS_MAP_INSTRUCTIONS + _SECTION_FORMAT + _ANALYSIS_MAP_INPUT)
+ANALYSIS_REDUCE_SECTIONS_PROMPT = PromptTemplate(name="analysis-reduce-sections", version=2, template=_ANALYSIS_REDUCE_INSTRUCTIONS + _SECTION_FORMAT + _ANALYSIS_REDUCE_INPUT)
+
+MARKDOWN_PROMPT = PromptTemplate(
+    name="markdown",
+    version=2,
+    template="""Convert the following meeting analysis into a professional markdown document.
+Create a well-formatted markdown document with proper headings, bullet points, and sections.
+Use the provided meeting date in your document and organize information clearly.
+
+Meeting Date: {meeting_date}
+
+Analysis:
+- Summary: {summary}
+- Business Insights: {business_insights}
+- Technical Insights: {technical_insights}
+- Action Items: {action_items}
+- Key Topics: {key_topics}
+
+Meeting Content:
+{transcript}""",
+)
@@ -0,0 +1,134 @@
+"""
+LLM provider interface used by the worker tasks.
+
+LLM_PROVIDER selects the implementation:
+  - "gemini" (default): the real Gemini API through app.llm.gateway
+  - "fake": an in-process stand-in (app.llm.fake) for load testing without
+    network access or quota
+
+Either way, generate_content calls go through the cluster-wide rate limiter
+(app.llm.ratelimit) and are metered per meeting (app.llm.usage).
+"""
+import os
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from app.llm import gateway, ratelimit, usage
+
+
+class LLMProvider(ABC):
+    """
+    The subset of the Gemini API the pipeline uses. Files returned by
+    upload_file/get_file expose `name`, `uri`, `mime_type` and `state.name`
+    ("PROCESSING", "ACTIVE" or "FAILED"); responses expose `text` and
+    `usage_metadata`. generate_content_stream yields responses holding the
+    next piece of text, the last one carrying the usage of the whole call.
+    """
+
+    @abstractmethod
+    def upload_file(self, file_path: str, mime_type: str): ...
+
+    @abstractmethod
+    def get_file(self, name: str): ...
+
+    @abstractmethod
+    def delete_file(self, name: str): ...
+
+    @abstractmethod
+    def generate_content(self, contents, model: str | None = None, config=None, estimated_tokens: int | None = None): ...
+
+    @abstractmethod
+    def generate_content_stream(self, contents, model: str | None = None, config=None, estimated_tokens: int | None = None): ...
+
+    @abstractmethod
+    def create_cached_content(self, contents, model: str | None = None, ttl_seconds: int = 600): ...
+
+    @abstractmethod
+    def create_batch(self, requests, model: str | None = None, display_name: str | None = None): ...
+
+    @abstractmethod
+    def get_batch(self, name: str): ...
+
+
+class GeminiProvider(LLMProvider):
+
+    def upload_file(self, file_path: str, mime_type: str):
+        return gateway.upload_file(file_path, mime_type)
+
+    def get_file(self, name: str):
+        return gateway.get_file(name)
+
+    def delete_file(self, name: str):
+        return gateway.delete_file(name)
+
+    def generate_content(self, contents, model: str | None = None, config=None, estimated_tokens: int | None = None):
+        return gateway.generate_content(contents, model=model or gateway.GEMINI_MODEL, config=config)
+
+    def generate_content_stream(self, contents, model: str | None = None, config=None, estimated_tokens: int | None = None):
+        return gateway.generate_content_stream(contents, model=model or gateway.GEMINI_MODEL, config=config)
+
+    def create_cached_content(self, contents, model: str | None = None, ttl_seconds: int = 600):
+        return gateway.create_cached_content(contents, model=model or gateway.GEMINI_MODEL, ttl_seconds=ttl_seconds)
+
+    def create_batch(self, requests, model: str | None = None, display_name: str | None = None):
+        return gateway.create_batch(requests, model=model or gateway.GEMINI_MODEL, display_name=display_name)
+
+    def get_batch(self, name: str):
+        return gateway.get_batch(name)
+
+
+class RateLimitedProvider(LLMProvider):
+    """
+    Makes generate_content wait for the model's quota, shared by all
+    workers. `estimated_tokens` defaults to an estimate from the prompt text.
+    Calls that go through are metered for the meeting being processed.
+    """
+
+    def __init__(self, provider: LLMProvider):
+        self.provider = provider
+
+    def upload_file(self, file_path: str, mime_type: str):
+        return self.provider.upload_file(file_path, mime_type)
+
+    def get_file(self, name: str):
+        return self.provider.get_file(name)
+
+    def delete_file(self, name: str):
+        return self.provider.delete_file(name)
+
+    def generate_content(self, contents, model: str | None = None, config=None, estimated_tokens: int | None = None):
+        model = model or gateway.GEMINI_MODEL
+        return ratelimit.call_with_quota(
+            model,
+            estimated_tokens or ratelimit.estimate_tokens(contents),
+            lambda: usage.timed(lambda: self.provider.generate_content(contents, model=model, config=config)),
+        )
+
+    def generate_content_stream(self, contents, model: str | None = None, config=None, estimated_tokens: int | None = None):
+        model = model or gateway.GEMINI_MODEL
+        return ratelimit.stream_with_quota(
+            model,
+            estimated_tokens or ratelimit.estimate_tokens(contents),
+            lambda: usage.timed_stream(self.provider.generate_content_stream(contents, model=model, config=config)),
+        )
+
+    def create_cached_content(self, contents, model: str | None = None, ttl_seconds: int = 600):
+        return self.provider.create_cached_content(contents, model=model, ttl_seconds=ttl_seconds)
+
+    # Batch jobs have a quota of their own
+    def create_batch(self, requests, model: str | None = None, display_name: str | None = None):
+        return self.provider.create_batch(requests, model=model, display_name=display_name)
+
+    def get_batch(self, name: str):
+        return self.provider.get_batch(name)
+
+
+@lru_cache(maxsize=None)
+def get_provider() -> LLMProvider:
+    name = os.getenv("LLM_PROVIDER", "gemini").lower()
+    if name == "fake":
+        from app.llm.fake import FakeProvider
+        return RateLimitedProvider(FakeProvider())
+    if name != "gemini":
+        raise ValueError(f"Unknown LLM_PROVIDER '{name}'")
+    return RateLimitedProvider(GeminiProvider())
@@ -0,0 +1,247 @@
+"""
+Cluster-wide rate limiting of LLM calls.
+
+Every worker process draws from the same two token buckets per model in
+Redis: one for requests per minute and one for (estimated) tokens per
+minute. A call waits until both buckets can cover it, so bursts are queued
+instead of running into 429s. Estimates are corrected with the token count
+Gemini reports, and a 429 that still gets through empties the buckets so
+every worker backs off together.
+
+Limits (environment):
+  GEMINI_RPM_LIMIT / GEMINI_TPM_LIMIT  defaults for every model (0 disables)
+  GEMINI_RATE_LIMITS                   per-model overrides as JSON, e.g.
+                                       {"gemini-2.5-pro": {"rpm": 150, "tpm": 2000000}}
+"""
+import json
+import logging
+import os
+import random
+import time
+
+from google.genai import errors
+
+from app.llm.tokens import estimate_text_tokens
+from app.redis_client import get_redis
+
+GEMINI_RPM_LIMIT = int(os.getenv("GEMINI_RPM_LIMIT", "1000"))
+GEMINI_TPM_LIMIT = int(os.getenv("GEMINI_TPM_LIMIT", "1000000"))
+GEMINI_RATE_LIMITS = json.loads(os.getenv("GEMINI_RATE_LIMITS") or "{}")
+# Longest a call waits for capacity before giving up
+GEMINI_RATE_LIMIT_MAX_WAIT = float(os.getenv("GEMINI_RATE_LIMIT_MAX_WAIT", "600"))
+# Attempts after a 429/503 from Gemini
+GEMINI_RATE_LIMIT_RETRIES = int(os.getenv("GEMINI_RATE_LIMIT_RETRIES", "5"))
+
+_BACKOFF_BASE = 2.0
+_BACKOFF_MAX = 60.0
+
+# Rough token costs used until Gemini reports the real count
+_AUDIO_TOKENS_PER_SECOND = 32
+_TRANSCRIPT_TOKENS_PER_SECOND = 4
+
+_MODELS_KEY = "llm:models"
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: bucket hash. ARGV: rpm, tpm, token cost.
+# Returns {acquired, seconds to wait}.
+_ACQUIRE_SCRIPT = """
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local cost = math.min(tonumber(ARGV[3]), tpm)
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'ts')
+local requests = tonumber(state[1]) or rpm
+local tokens = tonumber(state[2]) or tpm
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+requests = math.min(rpm, requests + elapsed * rpm / 60)
+tokens = math.min(tpm, tokens + elapsed * tpm / 60)
+local wait = 0
+if requests < 1 then
+  wait = (1 - requests) * 60 / rpm
+end
+if tokens < cost then
+  wait = math.max(wait, (cost - tokens) * 60 / tpm)
+end
+if wait == 0 then
+  requests = requests - 1
+  tokens = tokens - cost
+end
+redis.call('HSET', KEYS[1], 'requests', requests, 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+return {wait == 0 and 1 or 0, tostring(wait)}
+"""
+
+# KEYS[1]: bucket hash. ARGV: tokens to give back (negative to take more).
+_ADJUST_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  redis.call('HINCRBYFLOAT', KEYS[1], 'tokens', ARGV[1])
+end
+"""
+
+# KEYS[1]: bucket hash. Empties both buckets.
+_DRAIN_SCRIPT = """
+local clock = redis.call('TIME')
+redis.call('HSET', KEYS[1], 'requests', 0, 'tokens', 0, 'ts', tonumber(clock[1]) + tonumber(clock[2]) / 1000000)
+redis.call('EXPIRE', KEYS[1], 120)
+"""
+
+
+def limits_for(model: str) -> tuple[int, int]:
+    override = GEMINI_RATE_LIMITS.get(model, {})
+    return int(override.get("rpm", GEMINI_RPM_LIMIT)), int(override.get("tpm", GEMINI_TPM_LIMIT))
+
+
+def _bucket_key(model: str) -> str:
+    return f"ratelimit:{model}"
+
+
+def _usage_key(model: str, minute: int) -> str:
+    return f"llm:usage:{model}:{minute}"
+
+
+def estimate_tokens(contents, audio_seconds: float | None = None) -> int:
+    """
+    Estimate the tokens a call will use: the text of the prompt, plus the
+    audio and its transcript when `audio_seconds` is given. Text output is
+    assumed to be about as long as the text input.
+    """
+    parts = contents if isinstance(contents, list) else [contents]
+    text_tokens = sum(estimate_text_tokens(part) for part in parts if isinstance(part, str))
+    if audio_seconds:
+        return text_tokens + int(audio_seconds * (_AUDIO_TOKENS_PER_SECOND + _TRANSCRIPT_TOKENS_PER_SECOND))
+    return 2 * text_tokens
+
+
+def _record(model: str, field: str, amount: int):
+    minute = int(time.time() // 60)
+    key = _usage_key(model, minute)
+    pipe = get_redis().pipeline()
+    pipe.sadd(_MODELS_KEY, model)
+    pipe.hincrby(key, field, amount)
+    pipe.expire(key, 180)
+    pipe.execute()
+
+
+def acquire(model: str, tokens: int):
+    """Block until the model's buckets can cover one request of `tokens` tokens."""
+    rpm, tpm = limits_for(model)
+    waited = 0.0
+    while True:
+        acquired, wait = get_redis().eval(_ACQUIRE_SCRIPT, 1, _bucket_key(model), rpm, tpm, tokens)
+        if int(acquired):
+            if waited:
+                logger.info(f"Waited {waited:.1f}s for {model} quota ({tokens} tokens)")
+            return
+        # Jitter keeps waiting workers from retrying in lockstep
+        wait = float(wait) + random.uniform(0, 0.25)
+        if waited + wait > GEMINI_RATE_LIMIT_MAX_WAIT:
+            raise TimeoutError(f"No {model} quota available within {GEMINI_RATE_LIMIT_MAX_WAIT:.0f}s")
+        time.sleep(wait)
+        waited += wait
+
+
+def settle(model: str, estimated_tokens: int, actual_tokens: int | None):
+    """Correct the token bucket with the count Gemini reported and record usage."""
+    if actual_tokens is not None:
+        get_redis().eval(_ADJUST_SCRIPT, 1, _bucket_key(model), estimated_tokens - actual_tokens)
+    _record(model, "requests", 1)
+    _record(model, "tokens", actual_tokens if actual_tokens is not None else estimated_tokens)
+
+
+def throttled(model: str):
+    """Gemini answered 429: make every worker wait for the buckets to refill."""
+    get_redis().eval(_DRAIN_SCRIPT, 1, _bucket_key(model))
+    _record(model, "throttled", 1)
+
+
+def call_with_quota(model: str, estimated_tokens: int, call):
+    """
+    Run `call` once quota is available (unless the model's limits are
+    disabled). 429s and 503s are retried with exponential backoff instead
+    of failing the task.
+    """
+    rpm, tpm = limits_for(model)
+    limited = rpm > 0 and tpm > 0
+    for attempt in range(GEMINI_RATE_LIMIT_RETRIES + 1):
+        if limited:
+            acquire(model, estimated_tokens)
+        try:
+            response = call()
+        except errors.APIError as e:
+            if e.code not in (429, 503) or attempt == GEMINI_RATE_LIMIT_RETRIES:
+                raise
+            if e.code == 429 and limited:
+                throttled(model)
+            delay = min(_BACKOFF_BASE * 2 ** attempt, _BACKOFF_MAX) * random.uniform(0.5, 1.0)
+            logger.warning(f"Gemini returned {e.code} for {model}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        if limited:
+            usage = getattr(response, "usage_metadata", None)
+            settle(model, estimated_tokens, getattr(usage, "total_token_count", None))
+        return response
+
+
+def stream_with_quota(model: str, estimated_tokens: int, open_stream):
+    """
+    Streaming counterpart of call_with_quota. A 429/503 is only retried
+    before the first chunk arrived; after that the error is raised.
+    """
+    rpm, tpm = limits_for(model)
+    limited = rpm > 0 and tpm > 0
+    for attempt in range(GEMINI_RATE_LIMIT_RETRIES + 1):
+        if limited:
+            acquire(model, estimated_tokens)
+        started = False
+        usage = None
+        try:
+            for chunk in open_stream():
+                started = True
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                yield chunk
+        except errors.APIError as e:
+            if started or e.code not in (429, 503) or attempt == GEMINI_RATE_LIMIT_RETRIES:
+                raise
+            if e.code == 429 and limited:
+                throttled(model)
+            delay = min(_BACKOFF_BASE * 2 ** attempt, _BACKOFF_MAX) * random.uniform(0.5, 1.0)
+            logger.warning(f"Gemini returned {e.code} for {model}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        if limited:
+            settle(model, estimated_tokens, getattr(usage, "total_token_count", None))
+        return
+
+
+def quota_status() -> list[dict]:
+    """Current headroom and last-minute usage for every model seen."""
+    r = get_redis()
+    models = sorted(r.smembers(_MODELS_KEY) | set(GEMINI_RATE_LIMITS))
+    previous_minute = int(time.time() // 60) - 1
+    status = []
+    for model in models:
+        rpm, tpm = limits_for(model)
+        bucket = r.hgetall(_bucket_key(model))
+        usage = r.hgetall(_usage_key(model, previous_minute))
+        elapsed = max(0.0, time.time() - float(bucket.get("ts", time.time())))
+        requests_available = min(rpm, float(bucket.get("requests", rpm)) + elapsed * rpm / 60)
+        tokens_available = min(tpm, float(bucket.get("tokens", tpm)) + elapsed * tpm / 60)
+        requests_last_minute = int(usage.get("requests", 0))
+        tokens_last_minute = int(usage.get("tokens", 0))
+        status.append({
+            "model": model,
+            "rpm_limit": rpm,
+            "tpm_limit": tpm,
+            "requests_available": int(requests_available),
+            "tokens_available": int(tokens_available),
+            "requests_last_minute": requests_last_minute,
+            "tokens_last_minute": tokens_last_minute,
+            "throttled_last_minute": int(usage.get("throttled", 0)),
+            "rpm_utilization": requests_last_minute / rpm if rpm > 0 else 0.0,
+            "tpm_utilization": tokens_last_minute / tpm if tpm > 0 else 0.0,
+        })
+    return status
@@ -0,0 +1,110 @@
+"""
+Live partial output of streaming generations.
+
+While a stage streams from the model, its text so far is kept in a Redis
+string and every appended piece is published on a channel of the same
+name, so the API can relay it to clients as it arrives. Appends are
+coalesced to at most one Redis round-trip per STREAM_FLUSH_SECONDS, and
+the database row is still written once, when the stage finishes.
+
+Events published (JSON):
+  {"type": "delta", "offset": <chars before this piece>, "text": "..."}
+  {"type": "reset"}    the stage restarted; drop what was received
+  {"type": "done"}     the stage finished; read the record for the result
+  {"type": "error"}    the stage failed
+"""
+import json
+import logging
+import os
+import time
+from typing import Literal
+
+from app.redis_client import get_redis
+
+STREAM_FLUSH_SECONDS = float(os.getenv("STREAM_FLUSH_SECONDS", "0.5"))
+# Buffers of stages that are still running / that finished
+_ACTIVE_TTL_SECONDS = 3600
+_FINISHED_TTL_SECONDS = 300
+
+StreamKind = Literal["transcription", "translation", "analysis"]
+
+logger = logging.getLogger(__name__)
+
+
+def stream_key(kind: StreamKind, record_id) -> str:
+    return f"stream:{kind}:{record_id}"
+
+
+def status_key(key: str) -> str:
+    """Holds "done" or "error" once the stage behind a stream finished."""
+    return f"{key}:status"
+
+
+class StreamBuffer:
+    """
+    Collects the streamed text of one stage for one record. Use as a
+    context manager: leaving it publishes "done", or "error" if the block
+    raised.
+    """
+
+    def __init__(self, kind: StreamKind, record_id):
+        self.key = stream_key(kind, record_id)
+        self.length = 0
+        self._pending: list[str] = []
+        self._last_flush = 0.0
+
+    def __enter__(self):
+        try:
+            self.reset()
+        except Exception as e:
+            logger.warning(f"Could not open stream {self.key}: {e}")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.flush()
+            outcome = "done" if exc_type is None else "error"
+            get_redis().set(status_key(self.key), outcome, ex=_FINISHED_TTL_SECONDS)
+            self._publish({"type": outcome}, ttl=_FINISHED_TTL_SECONDS)
+        except Exception as e:
+            # Live output is best effort; never fail the stage over it
+            logger.warning(f"Could not close stream {self.key}: {e}")
+        return False
+
+    def _publish(self, event: dict, ttl: int = _ACTIVE_TTL_SECONDS, append: str | None = None):
+        pipe = get_redis().pipeline()
+        if append is not None:
+            pipe.append(self.key, append)
+        pipe.expire(self.key, ttl)
+        pipe.publish(self.key, json.dumps(event, ensure_ascii=False))
+        pipe.execute()
+
+    def reset(self):
+        """Start over, e.g. when a stage is retried."""
+        self.length = 0
+        self._pending.clear()
+        pipe = get_redis().pipeline()
+        pipe.set(self.key, "", ex=_ACTIVE_TTL_SECONDS)
+        pipe.delete(status_key(self.key))
+        pipe.execute()
+        self._publish({"type": "reset"})
+
+    def write(self, text: str):
+        if not text:
+            return
+        self._pending.append(text)
+        if time.monotonic() - self._last_flush >= STREAM_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        delta = "".join(self._pending)
+        self._pending.clear()
+        self._last_flush = time.monotonic()
+        try:
+            self._publish({"type": "delta", "offset": self.length, "text": delta}, append=delta)
+        except Exception as e:
+            logger.warning(f"Could not write to stream {self.key}: {e}")
+        self.length += len(delta)
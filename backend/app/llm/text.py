@@ -0,0 +1,345 @@
+"""
+Text generation for the translation and analysis stages.
+
+Meetings whose transcript is estimated above ANALYSIS_MAP_REDUCE_TOKENS are
+analysed map-reduce style: the transcript is cut into chunks of at most
+ANALYSIS_CHUNK_TOKENS on speaker-turn boundaries, the chunks are analysed in
+parallel and a final call merges the partial analyses. Shorter transcripts
+are analysed in a single call. scripts/bench_analysis.py compares the two
+paths to pick the cutoff.
+
+Analyses are requested as JSON matching AnalysisResult. For models without
+structured output (ANALYSIS_STRUCTURED_OUTPUT=false), or when a response
+doesn't fit the schema, the labelled-section format is requested and
+scraped instead; both cases are counted in analysis_stats().
+
+A transcript that is also needed for the markdown notes is put in a Gemini
+context cache by the analysis (see app.llm.context), and both calls
+reference the cache instead of sending the text.
+"""
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, List
+
+import redis
+from google.genai import errors, types
+from pydantic import BaseModel, ValidationError
+
+from app.audio.transcript import split_turn_blocks
+from app.llm import cache, context, usage
+from app.llm.gateway import GEMINI_MODEL
+from app.llm.prompts import (
+    ANALYSIS_MAP_PROMPT,
+    ANALYSIS_MAP_SECTIONS_PROMPT,
+    ANALYSIS_PROMPT,
+    ANALYSIS_REDUCE_PROMPT,
+    ANALYSIS_REDUCE_SECTIONS_PROMPT,
+    ANALYSIS_SECTIONS_PROMPT,
+    CACHED_TRANSCRIPT,
+    MARKDOWN_PROMPT,
+    PromptTemplate,
+)
+from app.llm.providers import get_provider
+from app.llm.stream import StreamBuffer
+from app.llm.tokens import estimate_text_tokens
+from app.redis_client import get_redis
+
+ANALYSIS_MAP_REDUCE_TOKENS = int(os.getenv("ANALYSIS_MAP_REDUCE_TOKENS", "24000"))
+ANALYSIS_CHUNK_TOKENS = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "8000"))
+# Chunks of one transcript analysed at the same time
+ANALYSIS_PARALLELISM = int(os.getenv("ANALYSIS_PARALLELISM", "4"))
+ANALYSIS_STRUCTURED_OUTPUT = os.getenv("ANALYSIS_STRUCTURED_OUTPUT", "true").lower() in ("1", "true", "yes")
+
+ANALYSIS_SECTIONS = {
+    "summary": "SUMMARY",
+    "business_insights": "BUSINESS_INSIGHTS",
+    "technical_insights": "TECHNICAL_INSIGHTS",
+    "action_items": "ACTION_ITEMS",
+    "key_topics": "KEY_TOPICS",
+}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+_STATS_KEY = "llm:analysis:stats"
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisResult(BaseModel):
+    """Response schema of the analysis prompts."""
+    summary: str
+    business_insights: str
+    technical_insights: str
+    action_items: List[str]
+    key_topics: List[str]
+
+    def to_fields(self) -> dict:
+        """
+        MeetingAnalysis columns are rendered as plain text, so lists become
+        one "- item" line per action item and comma-separated topics.
+        """
+        return {
+            "summary": self.summary,
+            "business_insights": self.business_insights,
+            "technical_insights": self.technical_insights,
+            "action_items": "\n".join(f"- {item}" for item in self.action_items) or None,
+            "key_topics": ", ".join(self.key_topics) or None,
+        }
+
+
+_ANALYSIS_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=AnalysisResult,
+)
+
+
+def _count(field: str):
+    try:
+        get_redis().hincrby(_STATS_KEY, field, 1)
+    except redis.RedisError as e:
+        logger.warning(f"Could not record analysis metric {field}: {e}")
+
+
+def analysis_stats() -> dict:
+    counters = get_redis().hgetall(_STATS_KEY)
+    return {
+        "structured_output": ANALYSIS_STRUCTURED_OUTPUT,
+        "structured": int(counters.get("structured", 0)),
+        "schema_failures": int(counters.get("schema_failures", 0)),
+        "section_fallbacks": int(counters.get("section_fallbacks", 0)),
+        "missing_sections": int(counters.get("missing_sections", 0)),
+    }
+
+
+def generate_text(
+    prompt: PromptTemplate,
+    config=None,
+    buffer: StreamBuffer | None = None,
+    cached_content: str | None = None,
+    validate: Callable[[str], bool] | None = None,
+    **inputs,
+) -> str:
+    """
+    Generate from a prompt template, reusing the cached answer for the same
+    inputs. With a buffer the answer is streamed into it as it arrives.
+    `cached_content` names a context cache holding the "transcript" input,
+    which is then left out of the prompt. Answers `validate` rejects are
+    returned but not cached.
+    """
+    key = cache.cache_key(GEMINI_MODEL, prompt, inputs)
+    cached = cache.get(key)
+    if cached is not None and validate and not validate(cached):
+        # Cached before answers were validated
+        cache.forget(key)
+        cached = None
+    if cached is not None:
+        logger.info(f"Cache hit for the {prompt.name} prompt")
+        if buffer:
+            buffer.write(cached)
+        return cached
+
+    started = time.perf_counter()
+    text = None
+    if cached_content:
+        try:
+            text = _generate(
+                [prompt.render(**{**inputs, "transcript": CACHED_TRANSCRIPT})],
+                config.model_copy(update={"cached_content": cached_content}) if config else types.GenerateContentConfig(cached_content=cached_content),
+                buffer,
+            )
+        except errors.ClientError as e:
+            if e.code not in (400, 403, 404):
+                raise
+            logger.warning(f"Context cache {cached_content} unusable, sending the transcript: {e}")
+            context.forget(inputs["transcript"])
+            if buffer:
+                buffer.reset()
+    if text is None:
+        text = _generate([prompt.render(**inputs)], config, buffer)
+    if validate is None or validate(text):
+        cache.put(key, text, time.perf_counter() - started)
+    return text
+
+
+def _generate(contents, config, buffer: StreamBuffer | None) -> str:
+    if buffer:
+        return stream_text(get_provider().generate_content_stream(contents=contents, config=config), buffer)
+    return get_provider().generate_content(contents=contents, config=config).text
+
+
+def stream_text(chunks, buffer: StreamBuffer) -> str:
+    """Consume a response stream into `buffer` and return the whole text."""
+    pieces = []
+    for chunk in chunks:
+        if chunk.text:
+            pieces.append(chunk.text)
+            buffer.write(chunk.text)
+    buffer.flush()
+    return "".join(pieces)
+
+
+def extract_section(text: str, section_name: str) -> str:
+    pattern = rf"{section_name}:\s*(.+?)(?=\n[A-Z_]+:|$)"
+    match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
+    if match:
+        return match.group(1).strip()
+    return "Not available"
+
+
+def parse_analysis(response_text: str) -> dict:
+    analysis = {field: extract_section(response_text, section) for field, section in ANALYSIS_SECTIONS.items()}
+    for value in analysis.values():
+        if value == "Not available":
+            _count("missing_sections")
+    return analysis
+
+
+def _matches_schema(response_text: str) -> bool:
+    try:
+        AnalysisResult.model_validate_json(response_text)
+    except ValidationError:
+        return False
+    return True
+
+
+def run_analysis(
+    prompt: PromptTemplate,
+    sections_prompt: PromptTemplate,
+    buffer: StreamBuffer | None = None,
+    cached_content: str | None = None,
+    **inputs,
+) -> dict:
+    """
+    Run an analysis prompt with the response schema, falling back to the
+    labelled-section variant of the prompt when that isn't possible.
+    Streamed output is the raw response: JSON with the summary first, or
+    the labelled sections.
+    """
+    if ANALYSIS_STRUCTURED_OUTPUT:
+        response_text = generate_text(
+            prompt, config=_ANALYSIS_CONFIG, buffer=buffer, cached_content=cached_content,
+            validate=_matches_schema, **inputs,
+        )
+        try:
+            result = AnalysisResult.model_validate_json(response_text)
+            _count("structured")
+            return result.to_fields()
+        except ValidationError as e:
+            _count("schema_failures")
+            logger.warning(f"Analysis response did not match the schema, retrying with sections: {e}")
+
+    _count("section_fallbacks")
+    if buffer and ANALYSIS_STRUCTURED_OUTPUT:
+        buffer.reset()
+    return parse_analysis(generate_text(sections_prompt, buffer=buffer, cached_content=cached_content, **inputs).strip())
+
+
+def analysis_request() -> tuple[PromptTemplate, object]:
+    """Prompt and config of a single-call analysis, for batch submissions."""
+    if ANALYSIS_STRUCTURED_OUTPUT:
+        return ANALYSIS_PROMPT, _ANALYSIS_CONFIG
+    return ANALYSIS_SECTIONS_PROMPT, None
+
+
+def decode_analysis(structured: bool, response_text: str) -> dict | None:
+    """
+    Fields of an analysis response made with analysis_request(), or None
+    when structured output doesn't match the schema.
+    """
+    if not structured:
+        return parse_analysis(response_text.strip())
+    try:
+        result = AnalysisResult.model_validate_json(response_text)
+    except ValidationError as e:
+        _count("schema_failures")
+        logger.warning(f"Batch analysis response did not match the schema: {e}")
+        return None
+    _count("structured")
+    return result.to_fields()
+
+
+def _split_long_turn(turn: str, max_tokens: int) -> List[str]:
+    """Split one oversized turn on sentence boundaries."""
+    pieces: List[str] = []
+    for sentence in _SENTENCE_END.split(turn):
+        if pieces and estimate_text_tokens(pieces[-1]) + estimate_text_tokens(sentence) <= max_tokens:
+            pieces[-1] = f"{pieces[-1]} {sentence}"
+        else:
+            pieces.append(sentence)
+    return pieces
+
+
+def chunk_transcript(transcript: str, max_tokens: int = ANALYSIS_CHUNK_TOKENS) -> List[str]:
+    """Cut a transcript into chunks of at most `max_tokens`, between speaker turns."""
+    chunks: List[str] = []
+    chunk_tokens = 0
+    for block in split_turn_blocks(transcript):
+        for piece in _split_long_turn(block, max_tokens) if estimate_text_tokens(block) > max_tokens else [block]:
+            tokens = estimate_text_tokens(piece)
+            if chunks and chunk_tokens + tokens <= max_tokens:
+                chunks[-1] = f"{chunks[-1]}\n{piece}"
+                chunk_tokens += tokens
+            else:
+                chunks.append(piece)
+                chunk_tokens = tokens
+    return chunks
+
+
+def analyze_single(transcript: str, buffer: StreamBuffer | None = None, share_context: bool = False) -> dict:
+    """`share_context`: the notes will read the transcript too, so cache it."""
+    cached_content = context.transcript_cache(transcript, create=share_context)
+    return run_analysis(
+        ANALYSIS_PROMPT, ANALYSIS_SECTIONS_PROMPT, buffer=buffer, cached_content=cached_content,
+        transcript=transcript,
+    )
+
+
+def analyze_map_reduce(transcript: str, buffer: StreamBuffer | None = None) -> dict:
+    """Only the reduce step is streamed; partial analyses aren't shown."""
+    chunks = chunk_transcript(transcript)
+    logger.info(f"Analyzing transcript in {len(chunks)} chunks")
+
+    # Partial analyses only feed the reduce prompt, so they are passed on
+    # as returned (JSON or sections) without being parsed
+    def analyze_chunk(index: int) -> str:
+        inputs = {"part": index + 1, "parts": len(chunks), "transcript": chunks[index]}
+        if ANALYSIS_STRUCTURED_OUTPUT:
+            return generate_text(ANALYSIS_MAP_PROMPT, config=_ANALYSIS_CONFIG, **inputs).strip()
+        return generate_text(ANALYSIS_MAP_SECTIONS_PROMPT, **inputs).strip()
+
+    with ThreadPoolExecutor(max_workers=ANALYSIS_PARALLELISM) as pool:
+        partials = list(pool.map(usage.bind(analyze_chunk), range(len(chunks))))
+
+    partial_analyses = "\n\n".join(f"--- Part {index + 1} ---\n{partial}" for index, partial in enumerate(partials))
+    return run_analysis(
+        ANALYSIS_REDUCE_PROMPT, ANALYSIS_REDUCE_SECTIONS_PROMPT, buffer=buffer,
+        parts=len(chunks), partial_analyses=partial_analyses,
+    )
+
+
+def analyze_transcript(transcript: str, buffer: StreamBuffer | None = None, share_context: bool = False) -> dict:
+    """
+    Analyze a meeting transcript into its summary, insights, action items and
+    key topics. Pass `share_context` when the notes will be written next.
+    """
+    if estimate_text_tokens(transcript) <= ANALYSIS_MAP_REDUCE_TOKENS:
+        return analyze_single(transcript, buffer, share_context)
+    return analyze_map_reduce(transcript, buffer)
+
+
+def write_notes(transcript: str, analysis: dict) -> str:
+    """
+    Turn an analysis into a markdown meeting document. Transcripts too long
+    for a single analysis call are left out; the analysis covers them.
+    """
+    if estimate_text_tokens(transcript) > ANALYSIS_MAP_REDUCE_TOKENS:
+        transcript = "(Omitted because of its length; use the analysis below.)"
+    current_date = datetime.utcnow().strftime("%B %d, %Y")
+    cached_content = context.transcript_cache(transcript)
+    return generate_text(
+        MARKDOWN_PROMPT, cached_content=cached_content,
+        meeting_date=current_date, transcript=transcript, **analysis,
+    ).strip()
@@ -0,0 +1,17 @@
+"""
+Token estimates for budgeting prompts before they are sent.
+
+Gemini's tokenizer isn't available offline, so text is estimated from its
+length: English and Banglish average about four characters per token, text
+in other scripts (e.g. Bangla) closer to two.
+"""
+import math
+
+_ASCII_CHARS_PER_TOKEN = 4.0
+_OTHER_CHARS_PER_TOKEN = 2.0
+
+
+def estimate_text_tokens(text: str) -> int:
+    ascii_chars = sum(1 for char in text if char.isascii())
+    other_chars = len(text) - ascii_chars
+    return math.ceil(ascii_chars / _ASCII_CHARS_PER_TOKEN + other_chars / _OTHER_CHARS_PER_TOKEN)
@@ -0,0 +1,110 @@
+"""
+Token and latency accounting of LLM calls per meeting.
+
+Tasks working on a meeting run inside track(analysis_id). Every call made
+meanwhile adds its token counts and duration to the meeting's totals in
+Redis, including calls from worker threads started through bind(). Stages
+that run again (retries, notes generated later) add to the same totals.
+"""
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import redis
+
+from app.redis_client import get_redis
+
+_KEY_PREFIX = "llm:usage:meeting:"
+_TTL_SECONDS = 30 * 24 * 3600
+
+_meeting: ContextVar[str | None] = ContextVar("llm_meeting", default=None)
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def track(meeting_id):
+    """Count calls towards `meeting_id` (nothing is counted for None)."""
+    token = _meeting.set(str(meeting_id) if meeting_id is not None else None)
+    try:
+        yield
+    finally:
+        _meeting.reset(token)
+
+
+def bind(fn):
+    """Make `fn` count towards the current meeting when run in another thread."""
+    meeting_id = _meeting.get()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        token = _meeting.set(meeting_id)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _meeting.reset(token)
+    return run
+
+
+def _add(prompt_tokens: int, cached_tokens: int, output_tokens: int, seconds: float):
+    meeting_id = _meeting.get()
+    if meeting_id is None:
+        return
+    key = _KEY_PREFIX + meeting_id
+    pipe = get_redis().pipeline()
+    pipe.hincrby(key, "calls", 1)
+    pipe.hincrby(key, "prompt_tokens", prompt_tokens)
+    pipe.hincrby(key, "cached_tokens", cached_tokens)
+    pipe.hincrby(key, "output_tokens", output_tokens)
+    pipe.hincrbyfloat(key, "seconds", seconds)
+    pipe.expire(key, _TTL_SECONDS)
+    try:
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not record LLM usage of meeting {meeting_id}: {e}")
+
+
+def record(usage_metadata, seconds: float):
+    _add(
+        getattr(usage_metadata, "prompt_token_count", None) or 0,
+        getattr(usage_metadata, "cached_content_token_count", None) or 0,
+        getattr(usage_metadata, "candidates_token_count", None) or 0,
+        seconds,
+    )
+
+
+def record_cache_write(tokens: int, seconds: float):
+    """Creating a context cache sends its contents once, like a prompt."""
+    _add(tokens, 0, 0, seconds)
+
+
+def timed(call):
+    """Run one generate_content call and record it."""
+    started = time.perf_counter()
+    response = call()
+    record(getattr(response, "usage_metadata", None), time.perf_counter() - started)
+    return response
+
+
+def timed_stream(chunks):
+    """Pass a response stream through, recording it once consumed."""
+    started = time.perf_counter()
+    usage = None
+    for chunk in chunks:
+        usage = getattr(chunk, "usage_metadata", None) or usage
+        yield chunk
+    record(usage, time.perf_counter() - started)
+
+
+def meeting_usage(meeting_id) -> dict:
+    counters = get_redis().hgetall(_KEY_PREFIX + str(meeting_id))
+    return {
+        "analysis_id": str(meeting_id),
+        "calls": int(counters.get("calls", 0)),
+        "prompt_tokens": int(counters.get("prompt_tokens", 0)),
+        "cached_tokens": int(counters.get("cached_tokens", 0)),
+        "output_tokens": int(counters.get("output_tokens", 0)),
+        "seconds": float(counters.get("seconds", 0.0)),
+    }
@@ -0,0 +1,55 @@
+"""
+Redis connections shared by the API and the workers. It is the same Redis
+that serves as the Celery broker.
+"""
+import os
+
+import redis
+import redis.asyncio
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Expires a notes lock whose worker died before releasing it
+NOTES_LOCK_SECONDS = 600
+# List of batch-priority jobs waiting for the next batch submission
+BATCH_QUEUE_KEY = "batch:pending"
+# Expires the write count / completion lock of an upload whose request died
+UPLOAD_LOCK_SECONDS = 3600
+
+_client = None
+_async_client = None
+
+
+def get_redis() -> redis.Redis:
+    """Process-wide client (redis-py's pool reconnects by itself after fork)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    return _client
+
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """Client for the API's event loop."""
+    global _async_client
+    if _async_client is None:
+        _async_client = redis.asyncio.Redis.from_url(REDIS_URL, decode_responses=True)
+    return _async_client
+
+
+def user_events_channel(user_id) -> str:
+    """Pub/sub channel of the job updates of one user (see GET /streams/events)."""
+    return f"events:user:{user_id}"
+
+
+def upload_writes_key(upload_id) -> str:
+    """Number of range writes in progress on an upload session."""
+    return f"upload:writes:{upload_id}"
+
+
+def upload_complete_lock_key(upload_id) -> str:
+    """Held while an upload session is being completed."""
+    return f"lock:upload:complete:{upload_id}"
+
+
+def notes_lock_key(analysis_id) -> str:
+    """Held while the markdown notes of an analysis are queued or being generated."""
+    return f"lock:notes:{analysis_id}"
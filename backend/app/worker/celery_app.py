@@ -1,7 +1,65 @@
 import os
 from celery import Celery
+from celery.signals import celeryd_init
+from app.llm.batch import BATCH_POLL_SECONDS, BATCH_SUBMIT_SECONDS
+from app.redis_client import REDIS_URL, get_redis
+from app.worker.scheduler import SCHED_DISPATCH_SECONDS, TASK_PRIORITIES
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# With CELERY_STAGE_QUEUES set, pipeline stages have queues of their own,
+# so each can be scaled alone:
+#   audio          uploads to Gemini and waiting for processing (I/O)
+#   transcription  multimodal calls on the audio
+#   text           translation, analysis, notes and batch jobs
+# Run one worker per queue, e.g.
+#   celery -A app.worker.celery_app worker -Q transcription -n transcription@%h
+# A worker consuming a single stage queue takes that queue's concurrency
+# and prefetch below, unless they are given on the command line.
+# Without CELERY_STAGE_QUEUES every task goes to the default queue, which
+# a plain `celery -A app.worker.celery_app worker` consumes.
+AUDIO_QUEUE = "audio"
+TRANSCRIPTION_QUEUE = "transcription"
+TEXT_QUEUE = "text"
+DEFAULT_QUEUE = "celery"
+CELERY_STAGE_QUEUES = os.getenv("CELERY_STAGE_QUEUES", "false").lower() in ("1", "true", "yes")
+
+STAGE_QUEUES = {
+    AUDIO_QUEUE: {
+        "concurrency": int(os.getenv("CELERY_AUDIO_CONCURRENCY", "8")),
+        "prefetch_multiplier": int(os.getenv("CELERY_AUDIO_PREFETCH", "4")),
+    },
+    TRANSCRIPTION_QUEUE: {
+        "concurrency": int(os.getenv("CELERY_TRANSCRIPTION_CONCURRENCY", "4")),
+        "prefetch_multiplier": int(os.getenv("CELERY_TRANSCRIPTION_PREFETCH", "1")),
+    },
+    TEXT_QUEUE: {
+        "concurrency": int(os.getenv("CELERY_TEXT_CONCURRENCY", "8")),
+        "prefetch_multiplier": int(os.getenv("CELERY_TEXT_PREFETCH", "1")),
+    },
+}
+
+STAGE_ROUTES = {
+    "task_transcribe_audio": {"queue": AUDIO_QUEUE},
+    "task_full_meeting_pipeline": {"queue": AUDIO_QUEUE},
+    "task_pipeline_upload": {"queue": AUDIO_QUEUE},
+    "task_delete_gemini_upload": {"queue": AUDIO_QUEUE},
+    "task_dispatch_runs": {"queue": AUDIO_QUEUE},
+    "task_release_run": {"queue": AUDIO_QUEUE},
+    "task_pipeline_transcribe": {"queue": TRANSCRIPTION_QUEUE},
+    "task_pipeline_translate": {"queue": TEXT_QUEUE},
+    "task_pipeline_analyze": {"queue": TEXT_QUEUE},
+    "task_translate_audio": {"queue": TEXT_QUEUE},
+    "task_analyze_meeting": {"queue": TEXT_QUEUE},
+    "task_generate_notes": {"queue": TEXT_QUEUE},
+    "task_submit_batch": {"queue": TEXT_QUEUE},
+    "task_poll_batches": {"queue": TEXT_QUEUE},
+}
+
+# Messages of each priority have a list of their own, named
+# "<queue>:<priority>" (plain "<queue>" for 0); workers take from the
+# lowest number first. Prefetched messages can't be overtaken, which is
+# why the model queues prefetch one.
+PRIORITY_STEPS = [0, 3, 6, 9]
+PRIORITY_SEP = ":"
 
 celery_app = Celery(
     "worker",
@@ -13,4 +71,49 @@ celery_app = Celery(
 celery_app.conf.update(
     task_track_started=True,
     timezone="Asia/Dhaka",
-)
\ No newline at end of file
+    broker_transport_options={
+        "priority_steps": PRIORITY_STEPS,
+        "sep": PRIORITY_SEP,
+        "queue_order_strategy": "priority",
+    },
+    task_routes=STAGE_ROUTES if CELERY_STAGE_QUEUES else {},
+)
+
+# Batch-priority submissions; needs a beat process next to the workers:
+#   celery -A app.worker.celery_app beat
+celery_app.conf.beat_schedule = {
+    "submit-batch": {"task": "task_submit_batch", "schedule": BATCH_SUBMIT_SECONDS},
+    "poll-batches": {"task": "task_poll_batches", "schedule": BATCH_POLL_SECONDS},
+    "dispatch-runs": {"task": "task_dispatch_runs", "schedule": SCHED_DISPATCH_SECONDS},
+}
+
+
+@celeryd_init.connect
+def configure_stage_worker(conf=None, options=None, **kwargs):
+    queues = (options or {}).get("queues") or []
+    if isinstance(queues, str):
+        queues = queues.split(",")
+    if len(queues) != 1 or queues[0] not in STAGE_QUEUES:
+        return
+    settings = STAGE_QUEUES[queues[0]]
+    conf.worker_concurrency = settings["concurrency"]
+    conf.worker_prefetch_multiplier = settings["prefetch_multiplier"]
+
+
+def priority_queue(queue: str, priority: int) -> str:
+    """Redis list holding the messages of one priority of a queue."""
+    return f"{queue}{PRIORITY_SEP}{priority}" if priority else queue
+
+
+def queue_depths() -> list[dict]:
+    """Messages waiting in every stage queue (not yet taken by a worker)."""
+    r = get_redis()
+    depths = []
+    for queue in [*STAGE_QUEUES, DEFAULT_QUEUE]:
+        by_priority = {priority: r.llen(priority_queue(queue, priority)) for priority in PRIORITY_STEPS}
+        depths.append({
+            "queue": queue,
+            "depth": sum(by_priority.values()),
+            "bulk": sum(depth for priority, depth in by_priority.items() if priority >= TASK_PRIORITIES["bulk"]),
+        })
+    return depths
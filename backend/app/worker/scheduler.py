@@ -0,0 +1,224 @@
+"""
+Fair scheduling of pipeline runs between users.
+
+Celery's queues are first in, first out, so a user who uploads a few
+hundred recordings would hold up everyone uploading after them for hours.
+Pipeline runs are therefore not sent to Celery when they are started: the
+API leaves them on a waiting list of their user, and the workers admit
+them from there, as slots free up:
+
+  - a user has at most SCHED_USER_MAX_IN_FLIGHT runs admitted at a time
+    (admins can change this per user)
+  - interactive runs are admitted before bulk ones, and their tasks carry
+    a higher Celery priority, so they also overtake bulk tasks already
+    waiting on the stage queues
+  - among the users with runs waiting, the one who was admitted a run
+    longest ago goes next (round robin)
+
+Runs are interactive unless requested as bulk, or their user already has
+SCHED_BULK_AFTER runs waiting as interactive or in flight (of either
+class). Admission is tried whenever a run is started and whenever one
+finishes or fails, and every SCHED_DISPATCH_SECONDS, which also covers
+dispatches skipped while another held the lock and runs whose worker died.
+"""
+import os
+import time
+
+from app.redis_client import get_async_redis, get_redis
+
+SCHED_USER_MAX_IN_FLIGHT = int(os.getenv("SCHED_USER_MAX_IN_FLIGHT", "2"))
+SCHED_BULK_AFTER = int(os.getenv("SCHED_BULK_AFTER", "3"))
+SCHED_DISPATCH_SECONDS = float(os.getenv("SCHED_DISPATCH_SECONDS", "60"))
+# Admitted runs still in flight after this long are assumed lost
+SCHED_RUN_TIMEOUT_SECONDS = int(os.getenv("SCHED_RUN_TIMEOUT_SECONDS", "21600"))
+
+# In admission order
+PRIORITY_CLASSES = ("interactive", "bulk")
+# Celery priority of the tasks of each class (with Redis as broker, 0 is taken first)
+TASK_PRIORITIES = {"interactive": 0, "bulk": 6}
+
+_LIMITS_KEY = "sched:limits"  # Hash of user id -> in-flight limit, where it isn't the default
+_LOCK_KEY = "lock:sched:dispatch"
+
+
+def waiting_key(priority: str, user_id) -> str:
+    """List of a user's run ids waiting in one class, oldest first."""
+    return f"sched:waiting:{priority}:{user_id}"
+
+
+def users_key(priority: str) -> str:
+    """Sorted set of the users with runs waiting in one class, by when they were last admitted one."""
+    return f"sched:users:{priority}"
+
+
+def in_flight_key(user_id) -> str:
+    """Sorted set of a user's admitted run ids, by admission time."""
+    return f"sched:in_flight:{user_id}"
+
+
+def _load(pipe, user_id):
+    """Queue the reads _classify() takes: interactive runs waiting, runs in flight."""
+    pipe.llen(waiting_key("interactive", user_id))
+    pipe.zcard(in_flight_key(user_id))
+
+
+def _classify(waiting: int, in_flight: int) -> str:
+    """
+    Class of a run enqueued without one: bulk once its user's interactive
+    runs waiting plus all of its runs in flight, bulk ones included, reach
+    SCHED_BULK_AFTER; interactive otherwise.
+    """
+    return "bulk" if waiting + in_flight >= SCHED_BULK_AFTER else "interactive"
+
+
+def _push(pipe, user_id, run_id, priority: str):
+    pipe.rpush(waiting_key(priority, user_id), str(run_id))
+    # Users joining wait behind those already waiting
+    pipe.zadd(users_key(priority), {str(user_id): time.time()}, nx=True)
+
+
+async def enqueue(user_id, run_id, priority: str | None = None) -> str:
+    """Leave a run waiting for admission; returns the class it waits in."""
+    r = get_async_redis()
+    if priority is None:
+        pipe = r.pipeline()
+        _load(pipe, user_id)
+        priority = _classify(*await pipe.execute())
+    pipe = r.pipeline()
+    _push(pipe, user_id, run_id, priority)
+    await pipe.execute()
+    return priority
+
+
+def enqueue_sync(user_id, run_id, priority: str | None = None) -> str:
+    """enqueue(), for the workers."""
+    r = get_redis()
+    if priority is None:
+        pipe = r.pipeline()
+        _load(pipe, user_id)
+        priority = _classify(*pipe.execute())
+    pipe = r.pipeline()
+    _push(pipe, user_id, run_id, priority)
+    pipe.execute()
+    return priority
+
+
+def user_limit(user_id) -> int:
+    limit = get_redis().hget(_LIMITS_KEY, str(user_id))
+    return int(limit) if limit is not None else SCHED_USER_MAX_IN_FLIGHT
+
+
+def set_user_limit(user_id, limit: int | None):
+    """Set a user's in-flight limit, or go back to the default with None."""
+    if limit is None:
+        get_redis().hdel(_LIMITS_KEY, str(user_id))
+    else:
+        get_redis().hset(_LIMITS_KEY, str(user_id), limit)
+
+
+def in_flight(user_id) -> int:
+    r = get_redis()
+    r.zremrangebyscore(in_flight_key(user_id), 0, time.time() - SCHED_RUN_TIMEOUT_SECONDS)
+    return r.zcard(in_flight_key(user_id))
+
+
+def release(user_id, run_id):
+    """Free the slot of a run that finished or failed (a no-op if it had none)."""
+    get_redis().zrem(in_flight_key(user_id), str(run_id))
+
+
+def dispatch(start) -> int:
+    """
+    Admit every waiting run that fits in its user's limit, taking turns
+    between users. start(run_id, priority) queues a run's tasks and returns
+    False if there was nothing to run. Returns the number of runs admitted,
+    0 if another dispatch is under way (it, or the next one by beat, admits
+    what is waiting).
+    """
+    r = get_redis()
+    lock = r.lock(_LOCK_KEY, timeout=60)
+    if not lock.acquire(blocking=False):
+        return 0
+    runs = []
+    try:
+        for priority in PRIORITY_CLASSES:
+            progressed = True
+            # One run per user per round, until nobody can be admitted one
+            while progressed:
+                progressed = False
+                for user_id in r.zrange(users_key(priority), 0, -1):
+                    if in_flight(user_id) >= user_limit(user_id):
+                        continue
+                    run_id = r.lpop(waiting_key(priority, user_id))
+                    if run_id is None:
+                        r.zrem(users_key(priority), user_id)
+                        continue
+                    now = time.time()
+                    r.zadd(in_flight_key(user_id), {run_id: now})
+                    r.zadd(users_key(priority), {user_id: now})
+                    runs.append((user_id, run_id, priority))
+                    progressed = True
+    finally:
+        lock.release()
+
+    # Queueing the tasks takes a broker round trip per run, so it is left
+    # out of the lock: the slots are already taken
+    admitted = 0
+    for index, (user_id, run_id, priority) in enumerate(runs):
+        try:
+            started = start(run_id, priority)
+        except Exception:
+            # Back to the head of the line for the next dispatch
+            for user_id, run_id, priority in reversed(runs[index:]):
+                release(user_id, run_id)
+                r.lpush(waiting_key(priority, user_id), run_id)
+                r.zadd(users_key(priority), {user_id: time.time()}, nx=True)
+            raise
+        if started:
+            admitted += 1
+        else:
+            release(user_id, run_id)
+    if admitted < len(runs):
+        # Slots of runs with nothing to run are free again
+        admitted += dispatch(start)
+    return admitted
+
+
+def user_status(user_id) -> dict:
+    r = get_redis()
+    return {
+        "user_id": str(user_id),
+        "in_flight": in_flight(user_id),
+        "in_flight_limit": user_limit(user_id),
+        "waiting_interactive": r.llen(waiting_key("interactive", user_id)),
+        "waiting_bulk": r.llen(waiting_key("bulk", user_id)),
+    }
+
+
+def status(limit: int = 100) -> dict:
+    """
+    Every user with runs waiting or in flight, and the first `limit`
+    waiting runs in the order they will be admitted if slots free up
+    evenly between users.
+    """
+    r = get_redis()
+    user_ids = {key.rsplit(":", 1)[1] for key in r.scan_iter(match=in_flight_key("*"))}
+    queues = {}
+    for priority in PRIORITY_CLASSES:
+        queues[priority] = [(user_id, r.lrange(waiting_key(priority, user_id), 0, limit - 1))
+                            for user_id in r.zrange(users_key(priority), 0, -1)]
+        user_ids.update(user_id for user_id, _ in queues[priority])
+
+    waiting = []
+    for priority in PRIORITY_CLASSES:
+        depth = max((len(run_ids) for _, run_ids in queues[priority]), default=0)
+        for turn in range(depth):
+            for user_id, run_ids in queues[priority]:
+                if turn < len(run_ids) and len(waiting) < limit:
+                    waiting.append({"position": len(waiting) + 1, "run_id": run_ids[turn],
+                                    "user_id": user_id, "priority": priority})
+    return {
+        "default_in_flight_limit": SCHED_USER_MAX_IN_FLIGHT,
+        "users": [user_status(user_id) for user_id in sorted(user_ids)],
+        "waiting": waiting,
+    }
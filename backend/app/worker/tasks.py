@@ -1,20 +1,106 @@
+import json
 import os
 import re
+import subprocess
+import tempfile
 import time
 import uuid
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from celery import chain
+from celery.exceptions import Ignore, Retry
 from celery.utils.log import get_task_logger
 from dotenv import load_dotenv
-from google import genai
-from google.genai import types
+from google.genai import errors, types
+from pydantic import BaseModel, ValidationError
 from app.worker.celery_app import celery_app
+from app.worker import scheduler
+from app.llm import batch, cache, usage
+from app.llm.gateway import GEMINI_MODEL
+from app.llm.prompts import TRANSLATE_PROMPT
+from app.llm.providers import get_provider
+from app.llm.ratelimit import estimate_tokens
+from app.llm.stream import StreamBuffer
+from app.llm.text import (
+    ANALYSIS_MAP_REDUCE_TOKENS,
+    analysis_request,
+    analyze_transcript,
+    decode_analysis,
+    generate_text,
+    stream_text,
+    write_notes,
+)
+from app.llm.tokens import estimate_text_tokens
+from app.audio.preprocess import SPEECH_MIME_TYPE, ffmpeg_available, prepare_for_upload
+from app.audio.probe import probe_duration
+from app.audio.segment import SEGMENT_MIN_DURATION, SEGMENT_OVERLAP, extract_segment, plan_segments
+from app.audio.transcript import remap_timestamps, stitch_segments
+from app.audio.vad import SILENCE_TRIM, OffsetMap, trim_silences
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from app.api.models import AudioTranscription, AudioTranslation, MeetingAnalysis
+from app.api.models import AudioTranscription, AudioTranslation, MeetingAnalysis, PIPELINE_STAGES, PipelineRun, ProcessingJob, is_pending_text, job_event
+from app.redis_client import NOTES_LOCK_SECONDS, get_redis, notes_lock_key, user_events_channel
 
-# Maximum time (in seconds) to wait for Gemini file processing before giving up
-_GEMINI_POLL_TIMEOUT = 120
+# Gemini file processing is awaited by rescheduling the task rather than
+# sleeping in it: first after _GEMINI_POLL_INTERVAL seconds, then doubling
+# up to _GEMINI_POLL_MAX_INTERVAL
 _GEMINI_POLL_INTERVAL = 2
+_GEMINI_POLL_MAX_INTERVAL = 30
+# Time (in seconds) allowed for processing before giving up: a base plus an
+# allowance per minute of audio
+_GEMINI_PROCESSING_TIMEOUT = int(os.getenv("GEMINI_PROCESSING_TIMEOUT_SECONDS", "120"))
+_GEMINI_PROCESSING_SECONDS_PER_MINUTE = float(os.getenv("GEMINI_PROCESSING_SECONDS_PER_MINUTE", "5"))
+
+# Gemini keeps uploaded files for 48 hours. An earlier upload is only
+# reused when it outlives the transcription by this margin
+_GEMINI_FILE_TTL = timedelta(hours=48)
+_GEMINI_REUSE_MARGIN = timedelta(hours=1)
+
+# Audio length assumed for quota purposes when it couldn't be probed
+_UNKNOWN_AUDIO_SECONDS = 600
+
+# Segments of one long recording that are transcribed at the same time
+_SEGMENT_PARALLELISM = int(os.getenv("TRANSCRIBE_SEGMENT_PARALLELISM", "4"))
+
+TRANSCRIBE_PROMPT = (
+    "You are an expert transcriber. The audio contains a mix of Bangla and English. "
+    "Transcribe the audio exactly as spoken but use the Roman alphabet (Banglish). "
+    "Example: 'Amra ajke meeting korsi'. Please transcribe this audio into Banglish text."
+    "Identify the different speakers and label them as 'Speaker 1', 'Speaker 2', etc. Include timestamps for whenever the speaker changes."
+)
+
+# Used whenever timestamps are post-processed (segment stitching, silence
+# trimming), so the transcript format must be parseable
+TIMESTAMPED_TRANSCRIBE_PROMPT = TRANSCRIBE_PROMPT + (
+    " Write every speaker turn on its own line as '[MM:SS] Speaker N: text', "
+    "with timestamps measured from the start of this audio clip."
+)
+
+# Full pipeline only: transcribe and translate in one multimodal call
+# instead of sending the transcript back for a second, text-only call
+PIPELINE_FUSED_TRANSLATION = os.getenv("PIPELINE_FUSED_TRANSLATION", "false").lower() in ("1", "true", "yes")
+
+FUSED_TRANSLATE_INSTRUCTIONS = (
+    " Then translate the transcript into proper, natural English, turn by turn, "
+    "keeping the speaker label and timestamp of every turn. "
+    "Respond with JSON: the Banglish transcript, the English translation and your "
+    "confidence in the translation as a score from 0.0 to 1.0."
+)
+
+
+class FusedTranscription(BaseModel):
+    """Response schema of the fused transcribe+translate call."""
+    transcript: str
+    translation: str
+    confidence: float
+
+
+_FUSED_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=FusedTranscription,
+)
 
 load_dotenv()
 
@@ -22,119 +108,721 @@ load_dotenv()
 engine = create_engine(os.getenv("SYNC_DATABASE_URL")) 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+# LLM backend (Gemini, or the fake one for load tests; see LLM_PROVIDER)
+llm = get_provider()
 
 # 1. Initialize the Celery logger
 logger = get_task_logger(__name__)
 
+def delete_gemini_file(name: str):
+    """Remove an uploaded file from Gemini storage (the local file is kept for the user)."""
+    try:
+        llm.delete_file(name)
+    except Exception as cleanup_err:
+        logger.warning(f"Failed to delete Gemini file {name}: {cleanup_err}")
+
+
+def upload_audio(file_path: str, mime_type: str, start: float = 0.0, duration: float | None = None, preprocess: bool = True) -> dict:
+    """
+    Upload an audio file to the Gemini File API without waiting for it to be
+    processed. Returns what later steps need as a JSON-serializable dict.
+    """
+    if preprocess:
+        # Re-encoded for speech when enabled
+        file_path, mime_type = prepare_for_upload(file_path, mime_type)
+    audio_file = llm.upload_file(file_path, mime_type)
+    expires = getattr(audio_file, "expiration_time", None)
+    return {
+        "name": audio_file.name,
+        "uri": audio_file.uri,
+        "mime_type": audio_file.mime_type or mime_type,
+        "start": start,
+        "duration": duration,
+        "active": audio_file.state.name == "ACTIVE",
+        "expires_at": expires.timestamp() if expires else time.time() + _GEMINI_FILE_TTL.total_seconds(),
+    }
+
+
+def delete_upload_files(upload: dict):
+    for file in upload["files"]:
+        delete_gemini_file(file["name"])
+
+
+def processing_timeout(duration: float | None) -> float:
+    """How long Gemini may take to process an upload of `duration` seconds."""
+    return _GEMINI_PROCESSING_TIMEOUT + (duration or 0) / 60 * _GEMINI_PROCESSING_SECONDS_PER_MINUTE
+
+
+def poll_countdown(polls: int) -> float:
+    return min(_GEMINI_POLL_INTERVAL * 2 ** polls, _GEMINI_POLL_MAX_INTERVAL)
+
+
+def upload_for_transcription(audio_id: str, file_path: str, mime_type: str, duration: float | None) -> dict:
+    """
+    Prepare a local audio file for transcription and upload it. Long
+    silences are trimmed first when enabled, and long recordings are split
+    into overlapping segments that are uploaded in parallel.
+
+    The returned upload state is passed along when the task is rescheduled
+    to wait for processing, so it only holds JSON-serializable values.
+    """
+    original_duration = duration
+    with tempfile.TemporaryDirectory(prefix="transcribe-") as tmp_dir:
+        offset_map = None
+        if SILENCE_TRIM and duration and ffmpeg_available():
+            trimmed_path = Path(tmp_dir) / "trimmed.ogg"
+            try:
+                offset_map = trim_silences(Path(file_path), trimmed_path, duration)
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+                # Trimming only saves tokens; the untrimmed audio transcribes just as well
+                stderr = getattr(e, "stderr", None)
+                logger.warning(f"Silence trimming failed for {audio_id}: {stderr.decode(errors='replace') if stderr else e}")
+            if offset_map:
+                logger.info(
+                    f"Silence trimming for {audio_id}: removed {offset_map.removed_seconds:.1f}s "
+                    f"of {duration:.1f}s (~{offset_map.removed_tokens} audio tokens)"
+                )
+                file_path, mime_type, duration = str(trimmed_path), SPEECH_MIME_TYPE, offset_map.trimmed_duration
+
+        segmented = bool(duration and duration >= SEGMENT_MIN_DURATION and ffmpeg_available())
+        if segmented:
+            segments = plan_segments(duration)
+            logger.info(f"Transcribing {audio_id} as {len(segments)} segments ({duration:.0f}s)")
+
+            def upload_segment(index: int, start: float, length: float) -> dict:
+                segment_path = extract_segment(Path(file_path), start, length, Path(tmp_dir) / f"{index}.ogg")
+                return upload_audio(str(segment_path), SPEECH_MIME_TYPE, start, length, preprocess=False)
+
+            with ThreadPoolExecutor(max_workers=_SEGMENT_PARALLELISM) as pool:
+                futures = [
+                    pool.submit(upload_segment, index, start, length)
+                    for index, (start, length) in enumerate(segments)
+                ]
+            files = [future.result() for future in futures if future.exception() is None]
+            if len(files) < len(futures):
+                delete_upload_files({"files": files})
+                error = next(future.exception() for future in futures if future.exception() is not None)
+                if not isinstance(error, (subprocess.CalledProcessError, subprocess.TimeoutExpired)):
+                    raise error
+                # ffmpeg could not cut the recording; Gemini still takes it whole
+                stderr = getattr(error, "stderr", None)
+                logger.warning(f"Segment extraction failed for {audio_id}, uploading it unsegmented: "
+                               f"{stderr.decode(errors='replace') if stderr else error}")
+                segmented = False
+        if not segmented:
+            files = [upload_audio(file_path, mime_type, duration=duration, preprocess=offset_map is None)]
+
+    return {
+        "files": files,
+        "segmented": segmented,
+        "offset_map": {"spans": offset_map.spans, "original_duration": offset_map.original_duration} if offset_map else None,
+        "deadline": time.time() + processing_timeout(original_duration),
+    }
+
+
+def remember_upload(db, audio_record: AudioTranscription, upload: dict):
+    """Keep the upload on the record, so a later attempt can reuse it."""
+    audio_record.gemini_upload = json.dumps(upload)
+    audio_record.gemini_upload_expires_at = datetime.utcfromtimestamp(min(file["expires_at"] for file in upload["files"]))
+    db.commit()
+
+
+def reusable_upload(audio_record: AudioTranscription) -> dict | None:
+    """
+    The record's earlier upload if all of its files are still on Gemini
+    (ACTIVE, or PROCESSING) for long enough, otherwise None.
+    """
+    if not audio_record.gemini_upload or audio_record.gemini_upload_expires_at is None:
+        return None
+    if audio_record.gemini_upload_expires_at - _GEMINI_REUSE_MARGIN <= datetime.utcnow():
+        return None
+
+    upload = json.loads(audio_record.gemini_upload)
+    try:
+        for file in upload["files"]:
+            state = llm.get_file(file["name"]).state.name
+            if state not in ("ACTIVE", "PROCESSING"):
+                logger.info(f"Earlier upload of {audio_record.id} is {state}, uploading again")
+                delete_upload_files(upload)
+                return None
+            file["active"] = state == "ACTIVE"
+    except errors.APIError as e:
+        logger.info(f"Earlier upload of {audio_record.id} is gone, uploading again: {e}")
+        return None
+    upload["deadline"] = time.time() + processing_timeout(audio_record.duration)
+    return upload
+
+
+def prepare_upload(db, audio_record: AudioTranscription, file_path: str, mime_type: str) -> dict:
+    """Reuse the record's upload from an earlier attempt, or upload the audio."""
+    upload = reusable_upload(audio_record)
+    if upload is not None:
+        logger.info(f"Reusing the Gemini upload of {audio_record.id}")
+        return upload
+    upload = upload_for_transcription(str(audio_record.id), file_path, mime_type, audio_record.duration)
+    if upload["offset_map"]:
+        offset_map = OffsetMap(**upload["offset_map"])
+        audio_record.silence_trimmed_seconds = offset_map.removed_seconds
+        audio_record.silence_trimmed_tokens = offset_map.removed_tokens
+    remember_upload(db, audio_record, upload)
+    return upload
+
+
+def upload_ready(audio_id: str, upload: dict) -> bool:
+    """
+    Refresh the processing state of the uploaded files and return whether
+    all of them are ACTIVE. If one failed, or processing took longer than
+    allowed, the files are deleted and an error is raised.
+    """
+    try:
+        for file in upload["files"]:
+            if file["active"]:
+                continue
+            state = llm.get_file(file["name"]).state.name
+            if state == "ACTIVE":
+                file["active"] = True
+            elif state == "FAILED":
+                raise ValueError(f"Gemini file processing failed for audio_id={audio_id}")
+            elif state != "PROCESSING":
+                raise ValueError(f"Gemini file in unexpected state '{state}' for audio_id={audio_id}")
+
+        if all(file["active"] for file in upload["files"]):
+            return True
+        if time.time() >= upload["deadline"]:
+            raise TimeoutError(f"Gemini file processing timed out for audio_id={audio_id}")
+        return False
+    except Exception:
+        delete_upload_files(upload)
+        raise
+
+
+def transcribe_uploaded(file: dict, prompt: str = TRANSCRIBE_PROMPT, buffer: StreamBuffer | None = None) -> str:
+    contents = [
+        types.Part.from_uri(file_uri=file["uri"], mime_type=file["mime_type"]),
+        prompt
+    ]
+    estimated = estimate_tokens(prompt, audio_seconds=file.get("duration") or _UNKNOWN_AUDIO_SECONDS)
+    if buffer:
+        return stream_text(llm.generate_content_stream(contents=contents, estimated_tokens=estimated), buffer)
+    return llm.generate_content(contents=contents, estimated_tokens=estimated).text
+
+
+def transcribe_upload(upload: dict, buffer: StreamBuffer | None = None) -> str:
+    """
+    Transcribe processed uploads (segments in parallel). Segments are
+    stitched into one transcript, and timestamps always refer to the
+    original recording. Only unsegmented uploads are streamed into
+    `buffer`; segments finish out of order.
+
+    The files are kept for retries; release_upload deletes them once the
+    transcript is stored.
+    """
+    offset_map = upload["offset_map"]
+    prompt = TIMESTAMPED_TRANSCRIBE_PROMPT if upload["segmented"] or offset_map else TRANSCRIBE_PROMPT
+    if upload["segmented"]:
+        with ThreadPoolExecutor(max_workers=_SEGMENT_PARALLELISM) as pool:
+            texts = list(pool.map(usage.bind(lambda file: transcribe_uploaded(file, prompt)), upload["files"]))
+    else:
+        texts = [transcribe_uploaded(upload["files"][0], prompt, buffer)]
+
+    if upload["segmented"]:
+        text = stitch_segments([(file["start"], text) for file, text in zip(upload["files"], texts)], SEGMENT_OVERLAP)
+    else:
+        text = texts[0]
+    return original_timestamps(text, offset_map)
+
+
+def original_timestamps(text: str, offset_map: dict | None) -> str:
+    """Map the timestamps of a transcript of trimmed audio back to the recording."""
+    if not offset_map:
+        return text
+    spans = [tuple(span) for span in offset_map["spans"]]
+    return remap_timestamps(text, OffsetMap(spans, offset_map["original_duration"]).to_original)
+
+
+def transcribe_and_translate(upload: dict) -> tuple[str, str, float] | None:
+    """
+    Transcribe an unsegmented upload and translate it to English in one
+    call. Returns (transcription_text, translated_text, confidence_score),
+    or None when the response doesn't match the schema and the stages
+    have to run one after the other. Not streamed: the response is JSON.
+    """
+    file = upload["files"][0]
+    offset_map = upload["offset_map"]
+    prompt = (TIMESTAMPED_TRANSCRIBE_PROMPT if offset_map else TRANSCRIBE_PROMPT) + FUSED_TRANSLATE_INSTRUCTIONS
+    contents = [
+        types.Part.from_uri(file_uri=file["uri"], mime_type=file["mime_type"]),
+        prompt
+    ]
+    estimated = estimate_tokens(prompt, audio_seconds=file.get("duration") or _UNKNOWN_AUDIO_SECONDS)
+    response = llm.generate_content(contents=contents, config=_FUSED_CONFIG, estimated_tokens=estimated)
+    try:
+        result = FusedTranscription.model_validate_json(response.text)
+    except ValidationError as e:
+        logger.warning(f"Fused transcription did not match the schema, transcribing and translating separately: {e}")
+        return None
+    return (
+        original_timestamps(result.transcript, offset_map),
+        original_timestamps(result.translation, offset_map),
+        min(max(result.confidence, 0.0), 1.0),
+    )
+
+
+def translate_banglish(source_text: str, buffer: StreamBuffer | None = None) -> tuple[str, float]:
+    """Translate Banglish text to English. Returns (translated_text, confidence_score)."""
+    return parse_translation(generate_text(TRANSLATE_PROMPT, buffer=buffer, source_text=source_text))
+
+
+def parse_translation(full_text: str) -> tuple[str, float]:
+    """Split a translation response into (translated_text, confidence_score)."""
+    full_text = full_text.strip()
+
+    # Parsing logic (reused from your original router)
+    confidence_score = 0.85
+    translated_text = full_text
+    confidence_match = re.search(r'Confidence:\s*([0-9]*\.?[0-9]+)', full_text, re.IGNORECASE)
+    
+    if confidence_match:
+        confidence_score = float(confidence_match.group(1))
+        translated_text = re.sub(r'\n?Confidence:.*$', '', full_text, flags=re.IGNORECASE | re.MULTILINE).strip()
+
+    return translated_text, confidence_score
+
+
+def apply_analysis(analysis_rec: MeetingAnalysis, analysis: dict, content_text: str):
+    analysis_rec.summary = analysis["summary"]
+    analysis_rec.business_insights = analysis["business_insights"]
+    analysis_rec.technical_insights = analysis["technical_insights"]
+    analysis_rec.action_items = analysis["action_items"] if analysis["action_items"] != "Not available" else None
+    analysis_rec.key_topics = analysis["key_topics"] if analysis["key_topics"] != "Not available" else None
+    analysis_rec.content_text = content_text # Store the source text used
+
+
+def release_upload(audio_id: str):
+    """Queue the deletion of a transcription's Gemini files."""
+    task_delete_gemini_upload.delay(audio_id)
+
+
+def queue_notes(analysis_id: str):
+    """Prefetch the markdown notes of a finished analysis (once, however often asked)."""
+    if get_redis().set(notes_lock_key(analysis_id), "1", nx=True, ex=NOTES_LOCK_SECONDS):
+        task_generate_notes.delay(analysis_id)
+
+
+def update_job(stage: str, record_id, user_id=None, run_id=None, new_attempt: bool = False, **fields):
+    """
+    Update (or create) the ProcessingJob of a stage of a record. Written in
+    a session of its own, so a failure is recorded even though the stage's
+    own changes are rolled back. Best effort: the stage never fails over it.
+    """
+    db = SessionLocal()
+    try:
+        record_id = uuid.UUID(str(record_id))
+        job = db.query(ProcessingJob).filter(ProcessingJob.record_id == record_id, ProcessingJob.stage == stage).first()
+        if job is None:
+            if user_id is None:
+                return
+            job = ProcessingJob(user_id=user_id, record_id=record_id, stage=stage, pipeline_run_id=run_id)
+            db.add(job)
+        for name, value in fields.items():
+            setattr(job, name, value)
+        if new_attempt:
+            job.attempts += 1
+        job.updated_at = datetime.utcnow()
+        db.commit()
+        # Pushed to the user's event stream, if they are listening
+        get_redis().publish(user_events_channel(job.user_id), json.dumps(job_event(job)))
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Could not update the {stage} job of {record_id}: {e}")
+    finally:
+        db.close()
+
+
+@contextmanager
+def tracked_job(stage: str, record_id, user_id, run_id=None, new_attempt: bool = True):
+    """
+    Mark a stage's job running for the duration of the block, then
+    succeeded, or failed with the error if the block raised. Rescheduling
+    (Retry) leaves it running.
+    """
+    if new_attempt:
+        update_job(stage, record_id, user_id, run_id, new_attempt=True,
+                   status="running", started_at=datetime.utcnow(), finished_at=None, error_message=None)
+    try:
+        yield
+    except Retry:
+        raise
+    except Exception as e:
+        update_job(stage, record_id, user_id, run_id, status="failed", finished_at=datetime.utcnow(), error_message=str(e))
+        raise
+    update_job(stage, record_id, user_id, run_id, status="succeeded", finished_at=datetime.utcnow())
+
+
+def complete_stage(run: PipelineRun, *stages: str):
+    """Checkpoint finished stages; committed together with their output."""
+    completed = json.loads(run.completed_stages)
+    completed += [stage for stage in stages if stage not in completed]
+    run.completed_stages = json.dumps(completed)
+    run.updated_at = datetime.utcnow()
+
+
+def load_run(db, run_id: str) -> PipelineRun:
+    run = db.query(PipelineRun).filter(PipelineRun.id == uuid.UUID(run_id)).first()
+    if run is None:
+        logger.error(f"PipelineRun record not found for id={run_id}")
+        raise ValueError(f"PipelineRun record not found for id={run_id}")
+    return run
+
+
+def records_gone(run_id: str, stage: str, **records) -> bool:
+    """
+    Whether a record a stage needs was deleted meanwhile; the stage is then
+    skipped, so the run still ends cleanly and gives up its slot.
+    """
+    missing = [name for name, record in records.items() if record is None]
+    if missing:
+        logger.warning(f"Pipeline run {run_id}: {', '.join(missing)} not found, skipping the {stage} stage")
+    return bool(missing)
+
+
+def pipeline_chain(run: PipelineRun, priority: str = "interactive"):
+    """
+    Chain of the stage tasks a run hasn't finished yet, or None if it is
+    done. Stages run on their own queues: upload on audio, transcription
+    on transcription, translation and analysis on text. Gemini files
+    expire, so until the transcription is done the upload stage always
+    runs again; it reuses the files while they last.
+    The chain ends, or fails, by giving up the run's scheduler slot.
+    """
+    completed = set(json.loads(run.completed_stages))
+    if "transcription" not in completed:
+        completed.discard("upload")
+    stages = [
+        _STAGE_TASKS[stage].si(str(run.id))
+        .set(priority=scheduler.TASK_PRIORITIES[priority])
+        .on_error(release_signature(run))
+        for stage in PIPELINE_STAGES[run.pipeline]
+        if stage not in completed
+    ]
+    return chain(*stages, release_signature(run)) if stages else None
+
+
+def release_signature(run: PipelineRun):
+    return task_release_run.si(str(run.user_id), str(run.id)).set(priority=scheduler.TASK_PRIORITIES["interactive"])
+
+
+def start_scheduled_run(run_id: str, priority: str) -> bool:
+    """Queue the stage tasks of a run the scheduler admitted."""
+    db = SessionLocal()
+    try:
+        run = db.query(PipelineRun).filter(PipelineRun.id == uuid.UUID(run_id)).first()
+        stages = pipeline_chain(run, priority) if run is not None else None
+        if stages is None:
+            logger.warning(f"Pipeline run {run_id} has nothing left to run")
+            return False
+        stages.delay()
+        return True
+    finally:
+        db.close()
+
+
+def start_pipeline(db, pipeline: str, audio_id: str, file_path: str, mime_type: str, translation_id: str | None = None, analysis_id: str | None = None, generate_markdown: bool = False):
+    """Create the run of a legacy pipeline task and leave it to the scheduler."""
+    audio_rec = db.query(AudioTranscription).filter(AudioTranscription.id == uuid.UUID(audio_id)).first()
+    run = PipelineRun(
+        user_id=audio_rec.user_id,
+        pipeline=pipeline,
+        file_path=file_path,
+        mime_type=mime_type,
+        generate_markdown=generate_markdown,
+        audio_transcription_id=audio_rec.id,
+        audio_translation_id=uuid.UUID(translation_id) if translation_id else None,
+        meeting_analysis_id=uuid.UUID(analysis_id) if analysis_id else None,
+    )
+    db.add(run)
+    db.commit()
+    scheduler.enqueue_sync(run.user_id, run.id)
+    task_dispatch_runs.delay()
+
+
 @celery_app.task(name="task_transcribe_audio")
 def task_transcribe_audio(audio_id: str, file_path: str, mime_type: str):
-    # 2. Create a FRESH session inside the task
+    """Schedules transcriptions queued before they were split into stages."""
+    db = SessionLocal()
+    try:
+        start_pipeline(db, "transcribe", audio_id, file_path, mime_type)
+    finally:
+        db.close()
+
+
+@celery_app.task(name="task_full_meeting_pipeline")
+def task_full_meeting_pipeline(audio_id: str, translation_id: str, analysis_id: str, file_path: str, mime_type: str, generate_markdown: bool):
+    """Schedules pipelines queued before they were split into stages."""
     db = SessionLocal()
+    try:
+        start_pipeline(db, "full-analysis", audio_id, file_path, mime_type, translation_id, analysis_id, generate_markdown)
+    finally:
+        db.close()
 
+
+@celery_app.task(name="task_pipeline_upload", bind=True)
+def task_pipeline_upload(self, run_id: str, polls: int = 0, upload: dict | None = None):
+    """
+    Upload the audio to Gemini, or reuse an earlier upload, and wait for
+    Gemini to process it. Nothing is uploaded when the transcription
+    already exists (reused from an earlier upload of the same audio).
+    """
+    db = SessionLocal()
     try:
-        logger.info(f"Starting Gemini processing for audio_id: {audio_id}")
-        # 1. Upload to Gemini File API
-        with open(file_path, 'rb') as f:
-            audio_file = client.files.upload(file=f, config={'mime_type': mime_type})
-
-            # Wait for the file to be 'ACTIVE'
-            elapsed = 0
-            while audio_file.state.name == "PROCESSING":
-                if elapsed >= _GEMINI_POLL_TIMEOUT:
-                    raise TimeoutError(
-                        f"Gemini file processing timed out after {_GEMINI_POLL_TIMEOUT}s "
-                        f"for audio_id={audio_id}"
-                    )
-                time.sleep(_GEMINI_POLL_INTERVAL)
-                elapsed += _GEMINI_POLL_INTERVAL
-                audio_file = client.files.get(name=audio_file.name)
-
-            if audio_file.state.name == "FAILED":
-                raise ValueError(f"Gemini file processing failed for audio_id={audio_id}")
-            if audio_file.state.name != "ACTIVE":
-                raise ValueError(
-                    f"Gemini file in unexpected state '{audio_file.state.name}' "
-                    f"for audio_id={audio_id}"
+        run = load_run(db, run_id)
+        audio_rec = db.query(AudioTranscription).filter(AudioTranscription.id == run.audio_transcription_id).first()
+        if records_gone(run_id, "upload", transcription=audio_rec):
+            return
+        audio_id = str(audio_rec.id)
+
+        # Polls for processing belong to the attempt that uploaded
+        with tracked_job("upload", audio_id, run.user_id, run.id, new_attempt=polls == 0):
+            if not is_pending_text(audio_rec.transcription_text):
+                logger.info(f"Reusing transcription for {audio_id}, nothing to upload")
+                complete_stage(run, "upload", "transcription")
+                db.commit()
+                return
+
+            # Cheap header probe for uploads that arrived without a duration
+            if audio_rec.duration is None:
+                audio_rec.duration = probe_duration(run.file_path)
+                db.commit()
+
+            upload = upload or prepare_upload(db, audio_rec, run.file_path, run.mime_type)
+            if not upload_ready(audio_id, upload):
+                # Check back later instead of holding the worker while Gemini processes the file
+                raise self.retry(
+                    kwargs={"polls": polls + 1, "upload": upload},
+                    countdown=poll_countdown(polls),
+                    max_retries=None,
                 )
-        
-        # 2. Generate Content (Transcription)
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[
-                types.Part.from_uri(file_uri=audio_file.uri, mime_type=audio_file.mime_type),
-                "You are an expert transcriber. The audio contains a mix of Bangla and English. "
-                "Transcribe the audio exactly as spoken but use the Roman alphabet (Banglish). "
-                "Example: 'Amra ajke meeting korsi'. Please transcribe this audio into Banglish text."
-                "Identify the different speakers and label them as 'Speaker 1', 'Speaker 2', etc. Include timestamps for whenever the speaker changes."
-            ]
-        )
-        
-        # 3. Update DB
-        audio_record = db.query(AudioTranscription).filter(AudioTranscription.id == uuid.UUID(audio_id)).first()
-        if audio_record:
-            audio_record.transcription_text = response.text
-            db.commit()
-            logger.info(f"SUCCESS: Database updated for {audio_id}")
-        else:
-            logger.error(f"FAIL: Could not find record {audio_id} in the database!")
-            
-        # Clean up Gemini Cloud Storage (not local file, keep that for the user)
-        client.files.delete(name=audio_file.name)
-        
+
+            # The transcription stage picks the processed upload up from the record
+            complete_stage(run, "upload")
+            remember_upload(db, audio_rec, upload)
+
+    except Retry:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Pipeline run {run_id} failed at upload: {str(e)}")
+        raise e
+    finally:
+        db.close()
+
+
+@celery_app.task(name="task_pipeline_transcribe", bind=True)
+def task_pipeline_transcribe(self, run_id: str):
+    """
+    Transcribe the processed upload, streamed to listening clients. In a
+    full pipeline with PIPELINE_FUSED_TRANSLATION, unsegmented audio is
+    translated by the same call. When the upload is gone (released or
+    never recorded), the upload stage runs again first.
+    """
+    db = SessionLocal()
+    try:
+        run = load_run(db, run_id)
+        audio_rec = db.query(AudioTranscription).filter(AudioTranscription.id == run.audio_transcription_id).first()
+        if records_gone(run_id, "transcription", transcription=audio_rec):
+            return
+        audio_id = str(audio_rec.id)
+
+        if is_pending_text(audio_rec.transcription_text) and audio_rec.gemini_upload is None:
+            logger.warning(f"No upload to transcribe for {audio_id}, uploading again")
+            update_job("upload", audio_id, run.user_id, run.id, status="queued")
+            # The rest of the chain follows the replacement
+            priority = (self.request.delivery_info or {}).get("priority")
+            raise self.replace(chain(*[
+                _STAGE_TASKS[stage].si(run_id).set(priority=priority).on_error(release_signature(run))
+                for stage in ("upload", "transcription")
+            ]))
+
+        with tracked_job("transcription", audio_id, run.user_id, run.id), usage.track(run.meeting_analysis_id):
+            if not is_pending_text(audio_rec.transcription_text):
+                complete_stage(run, "transcription")
+                db.commit()
+                return
+
+            upload = json.loads(audio_rec.gemini_upload)
+            trans_rec = None
+            if run.audio_translation_id:
+                trans_rec = db.query(AudioTranslation).filter(AudioTranslation.id == run.audio_translation_id).first()
+
+            fused = None
+            started = datetime.utcnow()
+            if (PIPELINE_FUSED_TRANSLATION and trans_rec is not None and not upload["segmented"]
+                    and is_pending_text(trans_rec.translated_text)):
+                fused = transcribe_and_translate(upload)
+            if fused:
+                logger.info(f"Transcribed and translated {audio_id} in one call")
+                transcription_text, translated_text, confidence = fused
+                with StreamBuffer("transcription", audio_id), StreamBuffer("translation", trans_rec.id):
+                    # Update Transcription and Translation Records
+                    audio_rec.transcription_text = transcription_text
+                    trans_rec.source_text = transcription_text
+                    trans_rec.translated_text = translated_text
+                    trans_rec.confidence_score = confidence
+                    complete_stage(run, "transcription", "translation")
+                    db.commit()
+                update_job("translation", trans_rec.id, run.user_id, run.id, new_attempt=True,
+                           status="succeeded", started_at=started, finished_at=datetime.utcnow())
+            else:
+                with StreamBuffer("transcription", audio_id) as buffer:
+                    transcription_text = transcribe_upload(upload, buffer)
+
+                    # Update Transcription Record
+                    audio_rec.transcription_text = transcription_text
+                    complete_stage(run, "transcription")
+                    db.commit()
+            logger.info(f"SUCCESS: Transcription {audio_id} stored.")
+
+        # Later stages only read the transcript; the files can go
+        release_upload(audio_id)
+
+    except Ignore:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Pipeline run {run_id} failed at transcription: {str(e)}")
+        raise e
+    finally:
+        db.close()
+
+
+@celery_app.task(name="task_pipeline_translate")
+def task_pipeline_translate(run_id: str):
+    """Translate the transcription of a full pipeline."""
+    db = SessionLocal()
+    try:
+        run = load_run(db, run_id)
+        trans_rec = db.query(AudioTranslation).filter(AudioTranslation.id == run.audio_translation_id).first()
+        audio_rec = db.query(AudioTranscription).filter(AudioTranscription.id == run.audio_transcription_id).first()
+        if records_gone(run_id, "translation", translation=trans_rec, transcription=audio_rec):
+            return
+
+        with tracked_job("translation", trans_rec.id, run.user_id, run.id), usage.track(run.meeting_analysis_id):
+            if not is_pending_text(trans_rec.translated_text):
+                # Reused from an earlier upload of the same audio, or translated along with the transcription
+                logger.info(f"Translation {trans_rec.id} already done")
+                complete_stage(run, "translation")
+                db.commit()
+                return
+
+            transcription_text = audio_rec.transcription_text
+            with StreamBuffer("translation", trans_rec.id) as buffer:
+                translated_text, confidence = translate_banglish(transcription_text, buffer)
+
+                # Update Translation Record
+                trans_rec.source_text = transcription_text
+                trans_rec.translated_text = translated_text
+                trans_rec.confidence_score = confidence
+                complete_stage(run, "translation")
+                db.commit()
+            logger.info(f"SUCCESS: Translation {trans_rec.id} stored.")
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Pipeline run {run_id} failed at translation: {str(e)}")
+        raise e
+    finally:
+        db.close()
+
+
+@celery_app.task(name="task_pipeline_analyze")
+def task_pipeline_analyze(run_id: str):
+    """Analyze the translation of a full pipeline; prefetch the notes if asked to."""
+    db = SessionLocal()
+    try:
+        run = load_run(db, run_id)
+        analysis_id = str(run.meeting_analysis_id)
+        trans_rec = db.query(AudioTranslation).filter(AudioTranslation.id == run.audio_translation_id).first()
+        analysis_rec = db.query(MeetingAnalysis).filter(MeetingAnalysis.id == run.meeting_analysis_id).first()
+        if records_gone(run_id, "analysis", translation=trans_rec, analysis=analysis_rec):
+            return
+
+        with tracked_job("analysis", analysis_id, run.user_id, run.id), usage.track(analysis_id):
+            translated_text = trans_rec.translated_text
+            with StreamBuffer("analysis", analysis_id) as buffer:
+                analysis = analyze_transcript(translated_text, buffer, share_context=run.generate_markdown)
+
+                # Update Analysis Record
+                apply_analysis(analysis_rec, analysis, translated_text)
+                complete_stage(run, "analysis")
+                db.commit()
+
+            logger.info("Full Pipeline Completed Successfully")
+
+        # Markdown notes are made on first request, or prefetched now
+        if run.generate_markdown:
+            queue_notes(analysis_id)
+
     except Exception as e:
-        db.rollback() # Undo any pending changes if it crashes
-        logger.error(f"CRITICAL ERROR in task: {str(e)}")
+        db.rollback()
+        logger.error(f"Pipeline run {run_id} failed at analysis: {str(e)}")
         raise e
     finally:
         db.close()
 
+
+_STAGE_TASKS = {
+    "upload": task_pipeline_upload,
+    "transcription": task_pipeline_transcribe,
+    "translation": task_pipeline_translate,
+    "analysis": task_pipeline_analyze,
+}
+
+
+@celery_app.task(name="task_dispatch_runs")
+def task_dispatch_runs():
+    """Admit the waiting pipeline runs that fit in their users' limits."""
+    admitted = scheduler.dispatch(start_scheduled_run)
+    if admitted:
+        logger.info(f"Admitted {admitted} pipeline runs")
+
+
+@celery_app.task(name="task_release_run")
+def task_release_run(user_id: str, run_id: str):
+    """Give up the slot of a pipeline run that finished or failed, and queue a dispatch to admit the next."""
+    scheduler.release(user_id, run_id)
+    task_dispatch_runs.delay()
+
+
 @celery_app.task(name="task_translate_audio")
 def task_translate_audio(translation_id: str, source_text: str):
     db = SessionLocal()
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[
-                f"""You are an expert translator specializing in Banglish to English translation.
-                
-Banglish is Bangla language written in Roman/Latin script. Your task is to translate the following Banglish text into proper, natural English.
-                
-Banglish text: {source_text}
-                
-Provide ONLY the English translation. Be accurate and natural.
-                
-After the translation, on a new line, also provide your confidence score (0.0 to 1.0) in the format: 'Confidence: 0.95'"""
-            ]
-        )
-        
-        full_text = response.text.strip()
-        
-        # Parsing logic (reused from your original router)
-        confidence_score = 0.85
-        translated_text = full_text
-        confidence_match = re.search(r'Confidence:\s*([0-9]*\.?[0-9]+)', full_text, re.IGNORECASE)
-        
-        if confidence_match:
-            confidence_score = float(confidence_match.group(1))
-            translated_text = re.sub(r'\n?Confidence:.*$', '', full_text, flags=re.IGNORECASE | re.MULTILINE).strip()
-
         try:
             translation_uuid = uuid.UUID(translation_id)
         except (ValueError, TypeError):
             translation_uuid = None
 
+        translation_record = None
         if translation_uuid is not None:
             translation_record = (
                 db.query(AudioTranslation)
                 .filter(AudioTranslation.id == translation_uuid)
                 .first()
             )
+
+        user_id = translation_record.user_id if translation_record else None
+        with tracked_job("translation", translation_id, user_id), StreamBuffer("translation", translation_id) as buffer:
+            translated_text, confidence_score = translate_banglish(source_text, buffer)
+
             if translation_record:
                 translation_record.translated_text = translated_text
                 translation_record.confidence_score = confidence_score
                 db.commit()
-            
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Translation Task Failed: {str(e)}")
+        raise e
     finally:
         db.close()
 
@@ -143,305 +831,242 @@ After the translation, on a new line, also provide your confidence score (0.0 to
 def task_analyze_meeting(analysis_id: str, audio_translation_id: str, generate_markdown: bool):
     db = SessionLocal()
     try:
-        logger.info(f"Starting analysis for analysis_id: {analysis_id}")
+        with usage.track(analysis_id):
+            logger.info(f"Starting analysis for analysis_id: {analysis_id}")
         
-        # 1. Fetch the translation text
-        translation = db.query(AudioTranslation).filter(
-            AudioTranslation.id == uuid.UUID(audio_translation_id)
-        ).first()
+            # 1. Fetch the translation text
+            translation = db.query(AudioTranslation).filter(
+                AudioTranslation.id == uuid.UUID(audio_translation_id)
+            ).first()
         
-        if not translation or not translation.translated_text:
-            logger.error(f"Translation {audio_translation_id} not found or empty.")
-            return
-
-        content_text = translation.translated_text
-
-        # 2. Generate Analysis
-        analysis_prompt = f"""You are an expert meeting analyst. Analyze the following meeting transcript and provide:
+            if not translation or not translation.translated_text:
+                logger.error(f"Translation {audio_translation_id} not found or empty.")
+                return
 
-        1. **SUMMARY**: A brief 2-3 sentence summary of the meeting
-        2. **BUSINESS INSIGHTS**: Key business implications, decisions, goals, and strategic points
-        3. **TECHNICAL INSIGHTS**: Technical discussions, implementation details, technologies mentioned, and technical decisions
-        4. **ACTION ITEMS**: Specific tasks, assignments, and follow-ups mentioned (if any)
-        5. **KEY TOPICS**: Main topics and themes discussed
+            content_text = translation.translated_text
 
-        Transcript:
-        {content_text}
+            with tracked_job("analysis", analysis_id, translation.user_id), StreamBuffer("analysis", analysis_id) as buffer:
+                # 2. Generate Analysis
+                analysis = analyze_transcript(content_text, buffer, share_context=generate_markdown)
 
-        Provide your response in this exact format:
+                # 3. Update the Analysis Record
+                analysis_record = db.query(MeetingAnalysis).filter(
+                    MeetingAnalysis.id == uuid.UUID(analysis_id)
+                ).first()
 
-        SUMMARY:
-        [Your summary here]
+                if analysis_record:
+                    apply_analysis(analysis_record, analysis, content_text)
+                    db.commit()
+                    logger.info(f"SUCCESS: Analysis {analysis_id} updated.")
 
-        BUSINESS_INSIGHTS:
-        [Your business insights here]
+            # 4. Markdown notes are made on first request, or prefetched now
+            if analysis_record and generate_markdown:
+                queue_notes(analysis_id)
 
-        TECHNICAL_INSIGHTS:
-        [Your technical insights here]
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Analysis Task Failed: {str(e)}")
+        raise e
+    finally:
+        db.close()
 
-        ACTION_ITEMS:
-        [Your action items here, or 'None identified' if there are none]
 
-        KEY_TOPICS:
-        [Your key topics here]
-        """
-        
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[analysis_prompt]
-        )
-        response_text = response.text.strip()
-
-        # Parse the response
-        def extract_section(text: str, section_name: str) -> str:
-            import re
-            pattern = rf"{section_name}:\s*(.+?)(?=\n[A-Z_]+:|$)"
-            match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-            return "Not available"
-        
-        summary = extract_section(response_text, "SUMMARY")
-        business_insights = extract_section(response_text, "BUSINESS_INSIGHTS")
-        technical_insights = extract_section(response_text, "TECHNICAL_INSIGHTS")
-        action_items = extract_section(response_text, "ACTION_ITEMS")
-        key_topics = extract_section(response_text, "KEY_TOPICS")
-
-        # 3. Optional Markdown Generation
-        notes_markdown = None
-        if generate_markdown:
-            current_date = datetime.utcnow().strftime("%B %d, %Y")
-            markdown_prompt = f"""Convert the following meeting analysis into a professional markdown document.
-
-            Meeting Date: {current_date}
-            Meeting Content: {content_text}
-
-            Analysis:
-            - Summary: {summary}
-            - Business Insights: {business_insights}
-            - Technical Insights: {technical_insights}
-            - Action Items: {action_items}
-            - Key Topics: {key_topics}
-
-            Create a well-formatted markdown document with proper headings, bullet points, and sections.
-            Use the provided date ({current_date}) in your document and organize information clearly."""
-            
-            
-            mk_response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[markdown_prompt]
-            )
-            notes_markdown = mk_response.text.strip()
+@celery_app.task(name="task_generate_notes")
+def task_generate_notes(analysis_id: str):
+    """
+    Generate the markdown notes of a finished analysis and store them on the
+    row. Queued through queue_notes / the notes endpoint, which hold the
+    notes lock so concurrent requests don't generate them twice.
+    """
+    db = SessionLocal()
+    try:
+        with usage.track(analysis_id):
+            analysis_rec = db.query(MeetingAnalysis).filter(MeetingAnalysis.id == uuid.UUID(analysis_id)).first()
+            if analysis_rec is None:
+                logger.error(f"MeetingAnalysis record not found for id={analysis_id} in task_generate_notes")
+                return
+            if analysis_rec.notes_markdown is not None:
+                return
 
-        # 4. Update the Analysis Record
-        analysis_record = db.query(MeetingAnalysis).filter(
-            MeetingAnalysis.id == uuid.UUID(analysis_id)
-        ).first()
-        
-        if analysis_record:
-            analysis_record.summary = summary
-            analysis_record.business_insights = business_insights
-            analysis_record.technical_insights = technical_insights
-            analysis_record.action_items = action_items if action_items != "Not available" else None
-            analysis_record.key_topics = key_topics if key_topics != "Not available" else None
-            analysis_record.notes_markdown = notes_markdown
-            analysis_record.content_text = content_text # Store the source text used
-            
-            db.commit()
-            logger.info(f"SUCCESS: Analysis {analysis_id} updated.")
+            logger.info(f"Generating notes for {analysis_id}")
+            with tracked_job("notes", analysis_id, analysis_rec.user_id):
+                analysis = {
+                    "summary": analysis_rec.summary,
+                    "business_insights": analysis_rec.business_insights,
+                    "technical_insights": analysis_rec.technical_insights,
+                    "action_items": analysis_rec.action_items,
+                    "key_topics": analysis_rec.key_topics,
+                }
+                analysis_rec.notes_markdown = write_notes(analysis_rec.content_text or "", analysis)
+                db.commit()
+            logger.info(f"SUCCESS: Notes for {analysis_id} stored.")
 
     except Exception as e:
         db.rollback()
-        logger.error(f"Analysis Task Failed: {str(e)}")
+        logger.error(f"Notes Task Failed: {str(e)}")
         raise e
     finally:
+        get_redis().delete(notes_lock_key(analysis_id))
         db.close()
 
 
-@celery_app.task(name="task_full_meeting_pipeline")
-def task_full_meeting_pipeline(audio_id: str, translation_id: str, analysis_id: str, file_path: str, mime_type: str, generate_markdown: bool):
+@celery_app.task(name="task_delete_gemini_upload")
+def task_delete_gemini_upload(audio_id: str):
+    """
+    Delete the Gemini files of a transcription once it has been stored
+    (see release_upload). Files that are never released
+    are dropped by Gemini when they expire.
+    """
     db = SessionLocal()
-    uploaded_gemini_file_name = None
     try:
-        # --- STEP 1: TRANSCRIBE ---
-        logger.info(f"Pipeline Step 1: Transcribing {audio_id}")
-        with open(file_path, 'rb') as f:
-            audio_file = client.files.upload(file=f, config={'mime_type': mime_type})
-            uploaded_gemini_file_name = audio_file.name
-            elapsed = 0
-            while audio_file.state.name == "PROCESSING":
-                if elapsed >= _GEMINI_POLL_TIMEOUT:
-                    raise TimeoutError(
-                        f"Gemini file processing timed out after {_GEMINI_POLL_TIMEOUT}s "
-                        f"for audio_id={audio_id}"
-                    )
-                time.sleep(_GEMINI_POLL_INTERVAL)
-                elapsed += _GEMINI_POLL_INTERVAL
-                audio_file = client.files.get(name=audio_file.name)
-
-            if audio_file.state.name == "FAILED":
-                raise ValueError(f"Gemini file processing failed for audio_id={audio_id}")
-            if audio_file.state.name != "ACTIVE":
-                raise ValueError(
-                    f"Gemini file in unexpected state '{audio_file.state.name}' "
-                    f"for audio_id={audio_id}"
-                )
-
-        transcribe_resp = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[
-                types.Part.from_uri(file_uri=audio_file.uri, mime_type=audio_file.mime_type),
-                "You are an expert transcriber. The audio contains a mix of Bangla and English. "
-                "Transcribe the audio exactly as spoken but use the Roman alphabet (Banglish). "
-                "Example: 'Amra ajke meeting korsi'. Please transcribe this audio into Banglish text."
-                "Identify the different speakers and label them as 'Speaker 1', 'Speaker 2', etc. Include timestamps for whenever the speaker changes."
-            ]
-        )
-        transcription_text = transcribe_resp.text
-        
-        # Update Transcription Record
         audio_rec = db.query(AudioTranscription).filter(AudioTranscription.id == uuid.UUID(audio_id)).first()
-        if audio_rec is None:
-            logger.error(f"AudioTranscription record not found for id={audio_id} in task_full_meeting_pipeline")
-            db.rollback()
-            raise ValueError(f"AudioTranscription record not found for id={audio_id}")
-        audio_rec.transcription_text = transcription_text
+        if audio_rec is None or not audio_rec.gemini_upload:
+            return
+        delete_upload_files(json.loads(audio_rec.gemini_upload))
+        audio_rec.gemini_upload = None
+        audio_rec.gemini_upload_expires_at = None
         db.commit()
+        logger.info(f"Deleted the Gemini upload of {audio_id}")
+    finally:
+        db.close()
 
-        # --- STEP 2: TRANSLATE ---
-        logger.info(f"Pipeline Step 2: Translating {translation_id}")
-        translate_resp = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[
-                f"""You are an expert translator specializing in Banglish to English translation.
-                
-Banglish is Bangla language written in Roman/Latin script. Your task is to translate the following Banglish text into proper, natural English.
-                
-Banglish text: {transcription_text}
-                
-Provide ONLY the English translation. Be accurate and natural.
-                
-After the translation, on a new line, also provide your confidence score (0.0 to 1.0) in the format: 'Confidence: 0.95'"""
-            ]
-        )
-        full_translate_text = translate_resp.text.strip()
-        
-        # Parsing confidence
-        confidence = 0.85
-        translated_text = full_translate_text
-        conf_match = re.search(r'Confidence:\s*([0-9]*\.?[0-9]+)', full_translate_text, re.IGNORECASE)
-        if conf_match:
-            confidence = float(conf_match.group(1))
-            translated_text = re.sub(r'\n?Confidence:.*$', '', full_translate_text, flags=re.IGNORECASE).strip()
-
-        # Update Translation Record
-        trans_rec = db.query(AudioTranslation).filter(AudioTranslation.id == uuid.UUID(translation_id)).first()
-        if trans_rec is None:
-            logger.error(f"AudioTranslation record not found for id={translation_id} in task_full_meeting_pipeline")
-            db.rollback()
-            raise ValueError(f"AudioTranslation record not found for id={translation_id}")
-        trans_rec.source_text = transcription_text
-        trans_rec.translated_text = translated_text
-        trans_rec.confidence_score = confidence
-        db.commit()
 
-        # --- STEP 3: ANALYZE ---
-        logger.info(f"Pipeline Step 3: Analyzing {analysis_id}")
-        analysis_prompt = f"""You are an expert meeting analyst. Analyze the following meeting transcript and provide:
-
-        1. **SUMMARY**: A brief 2-3 sentence summary of the meeting
-        2. **BUSINESS INSIGHTS**: Key business implications, decisions, goals, and strategic points
-        3. **TECHNICAL INSIGHTS**: Technical discussions, implementation details, technologies mentioned, and technical decisions
-        4. **ACTION ITEMS**: Specific tasks, assignments, and follow-ups mentioned (if any)
-        5. **KEY TOPICS**: Main topics and themes discussed
-
-        Transcript:
-        {translated_text}
-
-        Provide your response in this exact format:
-
-        SUMMARY:
-        [Your summary here]
-
-        BUSINESS_INSIGHTS:
-        [Your business insights here]
-
-        TECHNICAL_INSIGHTS:
-        [Your technical insights here]
-
-        ACTION_ITEMS:
-        [Your action items here, or 'None identified' if there are none]
-
-        KEY_TOPICS:
-        [Your key topics here]
-        """
-        analysis_resp = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[analysis_prompt]
-        )
-        analysis_text = analysis_resp.text
-
-        def extract(name):
-            pattern = rf"{name}:\s*(.+?)(?=\n[A-Z_]+:|$)"
-            m = re.search(pattern, analysis_text, re.DOTALL | re.IGNORECASE)
-            return m.group(1).strip() if m else "Not available"
-
-        summary = extract("SUMMARY")
-        business_insights = extract("BUSINESS_INSIGHTS")
-        technical_insights = extract("TECHNICAL_INSIGHTS")
-        action_items = extract("ACTION_ITEMS")
-        key_topics = extract("KEY_TOPICS")
-
-        # Optional Markdown
-        notes_md = None
-        if generate_markdown:
-            current_date = datetime.utcnow().strftime("%B %d, %Y")
-            markdown_prompt = f"""Convert the following meeting analysis into a professional markdown document.
-
-            Meeting Date: {current_date}
-            Meeting Content: {translated_text}
-
-            Analysis:
-            - Summary: {summary}
-            - Business Insights: {business_insights}
-            - Technical Insights: {technical_insights}
-            - Action Items: {action_items}
-            - Key Topics: {key_topics}
-
-            Create a well-formatted markdown document with proper headings, bullet points, and sections.
-            Use the provided date ({current_date}) in your document and organize information clearly."""
-            
-            mk_resp = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[markdown_prompt]
-            )
-            notes_md = mk_resp.text.strip()
-
-        # Update Analysis Record
-        analysis_rec = db.query(MeetingAnalysis).filter(MeetingAnalysis.id == uuid.UUID(analysis_id)).first()
-        if analysis_rec is None:
-            logger.error(f"MeetingAnalysis record not found for id={analysis_id} in task_full_meeting_pipeline")
-            db.rollback()
-            raise ValueError(f"MeetingAnalysis record not found for id={analysis_id}")
-        analysis_rec.summary = summary
-        analysis_rec.business_insights = business_insights
-        analysis_rec.technical_insights = technical_insights
-        analysis_rec.action_items = action_items if action_items != "Not available" else None
-        analysis_rec.key_topics = key_topics if key_topics != "Not available" else None
-        analysis_rec.content_text = translated_text
-        analysis_rec.notes_markdown = notes_md
+# ---------------------------------------------------------------------------
+# Batch priority (see app.llm.batch)
+# ---------------------------------------------------------------------------
+
+def run_interactive(db, job: dict):
+    """Run a batch-priority job as a regular task instead."""
+    if job["kind"] == "translation":
+        translation_rec = db.query(AudioTranslation).filter(AudioTranslation.id == uuid.UUID(job["id"])).first()
+        if translation_rec:
+            task_translate_audio.delay(job["id"], translation_rec.source_text)
+    else:
+        analysis_rec = db.query(MeetingAnalysis).filter(MeetingAnalysis.id == uuid.UUID(job["id"])).first()
+        if analysis_rec:
+            task_analyze_meeting.delay(job["id"], str(analysis_rec.audio_translation_id), job["generate_markdown"])
+
+
+def batch_request(db, job: dict):
+    """
+    The (prompt, config, inputs) to send for a batch job, or None when the
+    job has nothing left to do or is too big for one call and was handed to
+    the regular task.
+    """
+    if job["kind"] == "translation":
+        translation_rec = db.query(AudioTranslation).filter(AudioTranslation.id == uuid.UUID(job["id"])).first()
+        if not translation_rec or not is_pending_text(translation_rec.translated_text):
+            return None
+        return TRANSLATE_PROMPT, None, {"source_text": translation_rec.source_text}
+
+    analysis_rec = db.query(MeetingAnalysis).filter(MeetingAnalysis.id == uuid.UUID(job["id"])).first()
+    if not analysis_rec or not is_pending_text(analysis_rec.summary):
+        return None
+    translation = db.query(AudioTranslation).filter(AudioTranslation.id == analysis_rec.audio_translation_id).first()
+    if not translation or is_pending_text(translation.translated_text):
+        logger.error(f"Translation {analysis_rec.audio_translation_id} not found or empty.")
+        return None
+    if estimate_text_tokens(translation.translated_text) > ANALYSIS_MAP_REDUCE_TOKENS:
+        # Map-reduce needs several rounds of calls
+        run_interactive(db, job)
+        return None
+    prompt, config = analysis_request()
+    return prompt, config, {"transcript": translation.translated_text}
+
+
+def finish_batch_job(db, job: dict, response_text: str) -> bool:
+    """Store the response of a batch job; False if it couldn't be used."""
+    if job["kind"] == "translation":
+        translation_rec = db.query(AudioTranslation).filter(AudioTranslation.id == uuid.UUID(job["id"])).first()
+        if translation_rec and is_pending_text(translation_rec.translated_text):
+            translation_rec.translated_text, translation_rec.confidence_score = parse_translation(response_text)
+            db.commit()
+            update_job("translation", job["id"], status="succeeded", finished_at=datetime.utcnow())
+        return True
+
+    analysis = decode_analysis(job["structured"], response_text)
+    if analysis is None:
+        return False
+    analysis_rec = db.query(MeetingAnalysis).filter(MeetingAnalysis.id == uuid.UUID(job["id"])).first()
+    if analysis_rec and is_pending_text(analysis_rec.summary):
+        translation = db.query(AudioTranslation).filter(AudioTranslation.id == analysis_rec.audio_translation_id).first()
+        apply_analysis(analysis_rec, analysis, translation.translated_text)
         db.commit()
+        update_job("analysis", job["id"], status="succeeded", finished_at=datetime.utcnow())
+        if job["generate_markdown"]:
+            queue_notes(job["id"])
+    return True
+
 
-        logger.info("Full Pipeline Completed Successfully")
+@celery_app.task(name="task_submit_batch")
+def task_submit_batch():
+    """Send the pending batch-priority jobs to Gemini as one batch job (run by beat)."""
+    jobs = batch.take_pending()
+    if not jobs:
+        return
+    db = SessionLocal()
+    try:
+        submitted, requests = [], []
+        for job in jobs:
+            request = batch_request(db, job)
+            if request is None:
+                continue
+            prompt, config, inputs = request
+            job["cache_key"] = cache.cache_key(GEMINI_MODEL, prompt, inputs)
+            job["structured"] = config is not None
+            cached = cache.get(job["cache_key"])
+            if cached is not None and finish_batch_job(db, job, cached):
+                continue
+            submitted.append(job)
+            requests.append(([prompt.render(**inputs)], config))
 
+        if requests:
+            name = batch.submit(submitted, requests)
+            logger.info(f"Submitted {len(requests)} jobs as batch {name}")
+            for job in submitted:
+                update_job(job["kind"], job["id"], new_attempt=True, status="running", started_at=datetime.utcnow())
     except Exception as e:
         db.rollback()
-        logger.error(f"PIPELINE CRASHED: {str(e)}")
+        # Jobs finished meanwhile are skipped when they come around again
+        batch.requeue(jobs)
+        logger.error(f"Batch submission failed: {str(e)}")
         raise e
     finally:
         db.close()
-        if uploaded_gemini_file_name:
+
+
+@celery_app.task(name="task_poll_batches")
+def task_poll_batches():
+    """Write back the results of finished batch jobs (run by beat)."""
+    db = SessionLocal()
+    try:
+        for name, jobs in batch.submitted().items():
             try:
-                client.files.delete(name=uploaded_gemini_file_name)
-            except Exception as cleanup_err:
-                logger.warning(f"Failed to delete Gemini file {uploaded_gemini_file_name}: {cleanup_err}")
\ No newline at end of file
+                state, texts = batch.results(name)
+            except errors.APIError as e:
+                logger.warning(f"Could not poll batch {name}: {e}")
+                continue
+            if state in batch.RUNNING_STATES:
+                continue
+            if state != batch.SUCCEEDED_STATE and state not in batch.FAILED_STATES:
+                # Not known to be final: keep the batch and poll it again
+                logger.warning(f"Batch {name} is in unexpected state {state}")
+                continue
+            if not batch.claim(name):
+                continue
+
+            logger.info(f"Batch {name} finished as {state}")
+            texts = texts or []
+            for index, job in enumerate(jobs):
+                response_text = texts[index] if index < len(texts) else None
+                try:
+                    if response_text is not None and finish_batch_job(db, job, response_text):
+                        # Batch latency says nothing about an interactive call
+                        cache.put(job["cache_key"], response_text, 0.0)
+                        continue
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Could not store batch result of {job['kind']} {job['id']}: {str(e)}")
+                run_interactive(db, job)
+    finally:
+        db.close()
@@ -0,0 +1,97 @@
+"""
+Benchmark for the single-call vs map-reduce meeting analysis cutoff.
+
+Usage (from the backend directory):
+    python scripts/bench_analysis.py                         # fake LLM backend
+    LLM_PROVIDER=gemini python scripts/bench_analysis.py --sizes 8000 32000
+    python scripts/bench_analysis.py --transcript meeting.txt
+
+Analyzes synthetic transcripts of the given sizes (in estimated tokens), or
+a real translated transcript, both ways and reports wall time and calls
+made. Caching and rate limiting are switched off so every run hits the model.
+The fake backend is given a per-token latency so long prompts cost time as
+they do with Gemini; tune it with FAKE_LLM_SECONDS_PER_1K_TOKENS.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("FAKE_LLM_SECONDS_PER_1K_TOKENS", "0.15")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["GEMINI_RPM_LIMIT"] = "0"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.llm import text
+from app.llm.providers import get_provider
+from app.llm.tokens import estimate_text_tokens
+
+_TURNS = [
+    "Speaker 1: Let's go through the delivery plan for the billing migration before the end of the quarter.",
+    "Speaker 2: The new invoice service is deployed to staging, but the reconciliation job still times out on large accounts.",
+    "Speaker 3: Sales wants the usage-based pricing live for the enterprise customers by next month.",
+    "Speaker 1: Then we should split the reconciliation into batches and add an alert when a batch fails.",
+    "Speaker 2: I can take the batching change this sprint if someone reviews the database indexes.",
+    "Speaker 3: I'll ask finance to sign off on the new invoice layout by Thursday.",
+]
+
+
+def synthetic_transcript(tokens: int) -> str:
+    lines = []
+    while estimate_text_tokens("\n".join(lines)) < tokens:
+        lines.append(_TURNS[len(lines) % len(_TURNS)])
+    return "\n".join(lines)
+
+
+class CountingProvider:
+    """Counts generate_content calls of the configured provider."""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self.provider, name)
+
+    def generate_content(self, *args, **kwargs):
+        self.calls += 1
+        return self.provider.generate_content(*args, **kwargs)
+
+
+def run(label: str, analyze, transcript: str, counter: CountingProvider):
+    counter.calls = 0
+    started = time.perf_counter()
+    analyze(transcript)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<11} {elapsed:7.2f}s  {counter.calls:3d} calls")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8000, 16000, 24000, 48000, 96000])
+    parser.add_argument("--transcript", type=Path, help="Translated transcript to analyze instead")
+    args = parser.parse_args()
+
+    counter = CountingProvider(get_provider())
+    text.get_provider = lambda: counter
+
+    if args.transcript:
+        transcripts = [args.transcript.read_text()]
+    else:
+        transcripts = [synthetic_transcript(size) for size in args.sizes]
+
+    print(f"provider={os.environ['LLM_PROVIDER']} cutoff={text.ANALYSIS_MAP_REDUCE_TOKENS} "
+          f"chunk={text.ANALYSIS_CHUNK_TOKENS} parallelism={text.ANALYSIS_PARALLELISM}")
+    for transcript in transcripts:
+        tokens = estimate_text_tokens(transcript)
+        chunks = len(text.chunk_transcript(transcript))
+        print(f"{tokens} tokens ({chunks} chunks)")
+        run("single", text.analyze_single, transcript, counter)
+        run("map-reduce", text.analyze_map_reduce, transcript, counter)
+
+
+if __name__ == "__main__":
+    main()
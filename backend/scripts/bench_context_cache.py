@@ -0,0 +1,70 @@
+"""
+Benchmark of the Gemini context cache for the analysis and notes stages.
+
+Usage (from the backend directory, with Redis running):
+    python scripts/bench_context_cache.py                    # fake LLM backend
+    LLM_PROVIDER=gemini python scripts/bench_context_cache.py --sizes 6000 20000
+    python scripts/bench_context_cache.py --transcript meeting.txt
+
+Analyzes synthetic transcripts of the given sizes (in estimated tokens), or
+a real translated transcript, and writes its notes, once sending the
+transcript with every call and once through a context cache. Reports the
+input tokens sent (creating the cache counts as one call) and served from
+the cache, and the time spent in model calls, per meeting. The response
+cache is switched off so every run hits the model; the fake backend adds
+latency only for tokens that weren't cached.
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("FAKE_LLM_SECONDS_PER_1K_TOKENS", "0.15")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["GEMINI_RPM_LIMIT"] = "0"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.llm import context, text, usage
+from app.llm.tokens import estimate_text_tokens
+from scripts.bench_analysis import synthetic_transcript
+
+
+def run(label: str, transcript: str, cached: bool):
+    context.CONTEXT_CACHE_ENABLED = cached
+    meeting_id = uuid.uuid4()
+    started = time.perf_counter()
+    with usage.track(meeting_id):
+        analysis = text.analyze_transcript(transcript, share_context=True)
+        text.write_notes(transcript, analysis)
+    elapsed = time.perf_counter() - started
+    totals = usage.meeting_usage(meeting_id)
+    sent = totals["prompt_tokens"] - totals["cached_tokens"]
+    print(f"  {label:<9} {elapsed:7.2f}s wall  {totals['seconds']:7.2f}s in calls  "
+          f"{totals['calls']:2d} calls  {sent:7d} tokens sent  {totals['cached_tokens']:7d} cached")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 6000, 12000, 20000])
+    parser.add_argument("--transcript", type=Path, help="Translated transcript to analyze instead")
+    args = parser.parse_args()
+
+    if args.transcript:
+        transcripts = [args.transcript.read_text()]
+    else:
+        transcripts = [synthetic_transcript(size) for size in args.sizes]
+
+    print(f"provider={os.environ['LLM_PROVIDER']} min_tokens={context.CONTEXT_CACHE_MIN_TOKENS} "
+          f"ttl={context.CONTEXT_CACHE_TTL_SECONDS}s")
+    for transcript in transcripts:
+        print(f"{estimate_text_tokens(transcript)} tokens")
+        run("uncached", transcript, cached=False)
+        run("cached", transcript, cached=True)
+
+
+if __name__ == "__main__":
+    main()
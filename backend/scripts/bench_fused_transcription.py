@@ -0,0 +1,83 @@
+"""
+Benchmark of the fused transcribe+translate call against the two-call path.
+
+Usage (from the backend directory, with Redis running):
+    python scripts/bench_fused_transcription.py meeting.mp3               # fake LLM backend
+    LLM_PROVIDER=gemini python scripts/bench_fused_transcription.py meeting.mp3 --runs 3
+
+Uploads the recording once, then transcribes and translates it --runs
+times each way: as two calls (audio to Banglish, then the transcript back
+for translation) and as one multimodal call with structured output.
+Reports wall time, calls made and the input and output tokens per run.
+Only recordings short enough to be transcribed unsegmented can be fused.
+The response cache is switched off so every run hits the model.
+"""
+import argparse
+import mimetypes
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("SYNC_DATABASE_URL", "sqlite://")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["GEMINI_RPM_LIMIT"] = "0"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.audio.probe import probe_duration
+from app.llm import usage
+from app.worker import tasks
+
+
+def run(upload: dict, fused: bool) -> dict:
+    meeting_id = uuid.uuid4()
+    started = time.perf_counter()
+    with usage.track(meeting_id):
+        result = tasks.transcribe_and_translate(upload) if fused else None
+        if result is None:
+            transcript = tasks.transcribe_upload(upload)
+            tasks.translate_banglish(transcript)
+    totals = usage.meeting_usage(meeting_id)
+    totals["wall"] = time.perf_counter() - started
+    totals["fell_back"] = fused and result is None
+    return totals
+
+
+def report(label: str, runs: list[dict]):
+    wall = statistics.median(run["wall"] for run in runs)
+    calls = statistics.median(run["calls"] for run in runs)
+    prompt_tokens = statistics.median(run["prompt_tokens"] for run in runs)
+    output_tokens = statistics.median(run["output_tokens"] for run in runs)
+    fell_back = sum(run["fell_back"] for run in runs)
+    print(f"  {label:<9} {wall:7.2f}s wall  {calls:3.0f} calls  {prompt_tokens:8.0f} input tokens  "
+          f"{output_tokens:7.0f} output tokens" + (f"  ({fell_back} fell back to two calls)" if fell_back else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", type=Path)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    mime_type = mimetypes.guess_type(args.file.name)[0] or "audio/mpeg"
+    duration = probe_duration(str(args.file))
+    upload = tasks.upload_for_transcription("bench", str(args.file), mime_type, duration)
+    try:
+        if upload["segmented"]:
+            sys.exit(f"{args.file} is transcribed in segments, which the fused call doesn't cover")
+        while not tasks.upload_ready("bench", upload):
+            time.sleep(2)
+
+        print(f"provider={os.environ['LLM_PROVIDER']} duration={duration or 0:.0f}s runs={args.runs} (medians)")
+        report("two-call", [run(upload, fused=False) for _ in range(args.runs)])
+        report("fused", [run(upload, fused=True) for _ in range(args.runs)])
+    finally:
+        tasks.delete_upload_files(upload)
+
+
+if __name__ == "__main__":
+    main()
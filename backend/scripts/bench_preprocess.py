@@ -0,0 +1,87 @@
+"""
+Benchmark the audio pre-processing stage against uploading the original file.
+
+Usage (from the backend directory):
+    python scripts/bench_preprocess.py samples/*.wav samples/*.webm
+    python scripts/bench_preprocess.py --upload samples/meeting.wav
+
+For every file it reports the conversion time and the size of the original
+and the speech-encoded version. With --upload it also uploads both versions
+to the Gemini File API (GEMINI_API_KEY must be set) and reports the upload
+time and the time spent waiting for the file to become ACTIVE.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.audio.preprocess import SPEECH_MIME_TYPE, convert_to_speech, ffmpeg_available
+
+
+def upload_and_wait(client, path: Path, mime_type: str) -> tuple[float, float]:
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        audio_file = client.files.upload(file=f, config={"mime_type": mime_type})
+    uploaded = time.perf_counter()
+    while audio_file.state.name == "PROCESSING":
+        time.sleep(0.5)
+        audio_file = client.files.get(name=audio_file.name)
+    active = time.perf_counter()
+    client.files.delete(name=audio_file.name)
+    return uploaded - started, active - uploaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", type=Path)
+    parser.add_argument("--mime-type", default="audio/wav", help="MIME type of the original files for --upload")
+    parser.add_argument("--upload", action="store_true", help="Also measure Gemini upload and processing time")
+    args = parser.parse_args()
+
+    if not ffmpeg_available():
+        sys.exit("ffmpeg is not installed")
+
+    client = None
+    if args.upload:
+        from google import genai
+        client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+
+    totals = {"original": 0, "converted": 0}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for source in args.files:
+            destination = Path(tmp_dir) / (source.name + ".speech.ogg")
+            started = time.perf_counter()
+            convert_to_speech(source, destination)
+            convert_seconds = time.perf_counter() - started
+
+            original_size = source.stat().st_size
+            converted_size = destination.stat().st_size
+            totals["original"] += original_size
+            totals["converted"] += converted_size
+            print(
+                f"{source.name}: {original_size / 1e6:.2f} MB -> {converted_size / 1e6:.2f} MB "
+                f"({converted_size / original_size:.1%}), convert {convert_seconds:.2f}s"
+            )
+
+            if client is not None:
+                up_orig, wait_orig = upload_and_wait(client, source, args.mime_type)
+                up_conv, wait_conv = upload_and_wait(client, destination, SPEECH_MIME_TYPE)
+                print(
+                    f"  original:  upload {up_orig:.2f}s, processing {wait_orig:.2f}s\n"
+                    f"  converted: upload {up_conv:.2f}s, processing {wait_conv:.2f}s "
+                    f"(+{convert_seconds:.2f}s conversion)"
+                )
+
+    if totals["original"]:
+        print(
+            f"Total: {totals['original'] / 1e6:.2f} MB -> {totals['converted'] / 1e6:.2f} MB "
+            f"({totals['converted'] / totals['original']:.1%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Micro-benchmark for the header-only duration prober used at ingest.
+
+Usage (from the backend directory):
+    python scripts/bench_probe.py samples/*
+    python scripts/bench_probe.py              # synthetic 90-minute WAV only
+
+Reports the probed duration and the mean cost per call for every file, so
+it can be compared with the time it takes to stream the same file to disk.
+"""
+import argparse
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.audio.probe import probe_duration
+
+
+def synthetic_wav(directory: Path, minutes: int = 90) -> Path:
+    """A 16 kHz mono WAV of the given length (sparse, so cheap to create)."""
+    path = directory / f"synthetic_{minutes}min.wav"
+    frames = 16000 * 60 * minutes
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(b"")
+    # Patch the header sizes and extend the file instead of writing samples
+    with open(path, "r+b") as f:
+        data_size = frames * 2
+        f.seek(4)
+        f.write((36 + data_size).to_bytes(4, "little"))
+        f.seek(40)
+        f.write(data_size.to_bytes(4, "little"))
+        f.truncate(44 + data_size)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("-n", "--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = args.files or [synthetic_wav(Path(tmp_dir))]
+        for path in files:
+            duration = probe_duration(path)
+            started = time.perf_counter()
+            for _ in range(args.iterations):
+                probe_duration(path)
+            per_call = (time.perf_counter() - started) / args.iterations
+            print(f"{path.name}: duration={duration}s, {per_call * 1e6:.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
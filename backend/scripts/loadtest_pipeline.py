@@ -0,0 +1,92 @@
+"""
+Load test for the full-analysis pipeline.
+
+Start the stack with the fake LLM backend so no quota is spent, e.g.
+    LLM_PROVIDER=fake FAKE_LLM_LATENCY_SECONDS=3 FAKE_LLM_ERROR_RATE=0.05 docker compose up
+
+then, from the backend directory:
+    python scripts/loadtest_pipeline.py --user alice --password secret -n 50 sample.mp3
+
+Submits N pipelines (at most --concurrency uploads in flight), polls each
+analysis until it leaves the pending state (or --timeout passes), and reports submit latency,
+end-to-end latency percentiles and throughput.
+"""
+import argparse
+import asyncio
+import mimetypes
+import statistics
+import time
+from pathlib import Path
+
+import httpx
+
+PENDING = ("Processing...", "Waiting for transcription...")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_one(client, semaphore, path, mime_type, index, poll_interval, timeout):
+    async with semaphore:
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            response = await client.post(
+                "/api/v1/utils/full-analysis",
+                params={"title": f"loadtest-{index}", "generate_markdown": "false"},
+                files={"file": (path.name, f, mime_type)},
+            )
+        response.raise_for_status()
+        submitted = time.perf_counter()
+    analysis_id = response.json()["analysis_id"]
+
+    while time.perf_counter() - started < timeout:
+        await asyncio.sleep(poll_interval)
+        response = await client.get(f"/api/v1/audios/analyses/{analysis_id}")
+        response.raise_for_status()
+        if response.json()["summary"] not in PENDING:
+            return submitted - started, time.perf_counter() - started
+    # Failed pipelines stay pending, so they end up here too
+    return submitted - started, None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", type=Path)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--user", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("-n", "--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=1800)
+    args = parser.parse_args()
+
+    mime_type = mimetypes.guess_type(args.file.name)[0] or "audio/mpeg"
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=300) as client:
+        login = await client.post("/api/v1/auth/login", json={"username": args.user, "password": args.password})
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            run_one(client, semaphore, args.file, mime_type, index, args.poll_interval, args.timeout)
+            for index in range(args.requests)
+        ))
+        elapsed = time.perf_counter() - started
+
+    submit = [r[0] for r in results]
+    done = [r[1] for r in results if r[1] is not None]
+    failed = len(results) - len(done)
+    print(f"{args.requests} pipelines in {elapsed:.1f}s, {failed} failed or timed out")
+    print(f"submit      mean {statistics.mean(submit):6.2f}s  p95 {percentile(submit, 0.95):6.2f}s")
+    if done:
+        print(f"end-to-end  mean {statistics.mean(done):6.2f}s  p50 {percentile(done, 0.5):6.2f}s  "
+              f"p95 {percentile(done, 0.95):6.2f}s  max {max(done):6.2f}s")
+        print(f"throughput  {len(done) / elapsed * 60:.1f} pipelines/min")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
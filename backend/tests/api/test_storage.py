@@ -0,0 +1,24 @@
+from app.api.storage import contiguous_offset, merge_ranges
+
+
+def test_merge_ranges_keeps_disjoint_ranges_sorted():
+    ranges = merge_ranges([[0, 10]], 20, 30)
+    assert merge_ranges(ranges, 40, 50) == [[0, 10], [20, 30], [40, 50]]
+    assert merge_ranges([[20, 30]], 0, 10) == [[0, 10], [20, 30]]
+
+
+def test_merge_ranges_joins_adjacent_and_overlapping_ranges():
+    assert merge_ranges([[0, 10]], 10, 20) == [[0, 20]]
+    assert merge_ranges([[0, 10], [20, 30]], 5, 25) == [[0, 30]]
+    assert merge_ranges([[0, 30]], 10, 20) == [[0, 30]]
+
+
+def test_merge_ranges_accepts_resent_ranges():
+    assert merge_ranges([[0, 10], [20, 30]], 20, 30) == [[0, 10], [20, 30]]
+
+
+def test_contiguous_offset():
+    assert contiguous_offset([]) == 0
+    assert contiguous_offset([[10, 20]]) == 0
+    assert contiguous_offset([[0, 10], [20, 30]]) == 10
+    assert contiguous_offset(merge_ranges([[0, 10], [20, 30]], 10, 20)) == 30
@@ -0,0 +1,57 @@
+import struct
+import wave
+
+from app.audio.probe import probe_duration
+
+
+def write_wav(path, seconds: float, rate: int = 8000):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\x00\x00" * int(rate * seconds))
+    return path
+
+
+def ogg_page(granule: int, packet: bytes) -> bytes:
+    header = b"OggS" + struct.pack("<BBqIII", 0, 0, granule, 1, 0, 0)
+    return header + bytes([1, len(packet)]) + packet
+
+
+def test_wav(tmp_path):
+    assert probe_duration(write_wav(tmp_path / "a.wav", 2.5)) == 2.5
+
+
+def test_wav_with_streaming_data_size(tmp_path):
+    # Recorders that stream leave the data chunk size at 0
+    path = write_wav(tmp_path / "a.wav", 1.5)
+    with open(path, "r+b") as f:
+        f.seek(40)
+        f.write(b"\x00\x00\x00\x00")
+    assert probe_duration(path) == 1.5
+
+
+def test_flac(tmp_path):
+    sample_rate, total_samples = 44100, 44100 * 3
+    packed = (sample_rate << 44) | (0 << 41) | (15 << 36) | total_samples
+    streaminfo = b"\x00" * 10 + packed.to_bytes(8, "big") + b"\x00" * 16
+    path = tmp_path / "a.flac"
+    path.write_bytes(b"fLaC" + b"\x80" + len(streaminfo).to_bytes(3, "big") + streaminfo)
+    assert probe_duration(path) == 3.0
+
+
+def test_ogg_opus_subtracts_pre_skip(tmp_path):
+    opus_head = b"OpusHead" + struct.pack("<BBHIhB", 1, 1, 312, 16000, 0, 0)
+    path = tmp_path / "a.opus"
+    path.write_bytes(ogg_page(0, opus_head) + ogg_page(48000 * 4 + 312, b"\x00" * 10))
+    assert probe_duration(path) == 4.0
+
+
+def test_unknown_missing_and_empty_files(tmp_path):
+    unknown = tmp_path / "a.bin"
+    unknown.write_bytes(b"not audio at all" * 10)
+    empty = tmp_path / "empty.wav"
+    empty.write_bytes(b"")
+    assert probe_duration(unknown) is None
+    assert probe_duration(empty) is None
+    assert probe_duration(tmp_path / "missing.wav") is None
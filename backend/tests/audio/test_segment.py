@@ -0,0 +1,18 @@
+from app.audio.segment import plan_segments
+
+
+def test_short_recording_is_one_segment():
+    assert plan_segments(300, length=600, overlap=20) == [(0.0, 300)]
+
+
+def test_segments_overlap_and_cover_the_recording():
+    segments = plan_segments(1500, length=600, overlap=20)
+    assert segments == [(0.0, 600), (580.0, 600), (1160.0, 340)]
+    for (start, length), (next_start, _) in zip(segments, segments[1:]):
+        assert start + length - next_start == 20
+    start, length = segments[-1]
+    assert start + length == 1500
+
+
+def test_no_sliver_segment_when_the_last_window_reaches_the_end():
+    assert plan_segments(1180, length=600, overlap=20) == [(0.0, 600), (580.0, 600)]
@@ -0,0 +1,57 @@
+from app.audio.transcript import parse_turns, stitch_segments
+
+
+def starts_and_texts(text):
+    return [(turn.start, turn.speaker, turn.text) for turn in parse_turns(text)]
+
+
+def test_turns_are_shifted_to_absolute_time():
+    text = stitch_segments([
+        (0.0, "[00:10] Speaker 1: ami shuru kori"),
+        (580.0, "[00:30] Speaker 1: tarpor bolchi onno kotha"),
+    ], overlap=20)
+    assert starts_and_texts(text) == [
+        (10, 1, "ami shuru kori"),
+        (610, 1, "tarpor bolchi onno kotha"),
+    ]
+
+
+def test_turn_timestamped_across_the_middle_is_kept_once():
+    # Segment A hears it at 590 s, segment B at 580 s; the middle is 590 s
+    text = stitch_segments([
+        (0.0, "[09:50] Speaker 1: budget ta ke final korte hobe ajke\n"),
+        (580.0, "[00:00] Speaker 1: budget ta ke final korte hobe ajke\n"
+                "[00:15] Speaker 2: thik ache ami dekhchi"),
+    ], overlap=20)
+    assert starts_and_texts(text) == [
+        (590, 1, "budget ta ke final korte hobe ajke"),
+        (595, 2, "thik ache ami dekhchi"),
+    ]
+
+
+def test_turn_timestamped_apart_the_other_way_is_not_repeated():
+    # Segment A hears it at 587 s, segment B at 591 s
+    text = stitch_segments([
+        (0.0, "[09:47] Speaker 1: client ke report pathate hobe shukrobar\n"),
+        (580.0, "[00:11] Speaker 1: client ke report pathate hobe shukrobar"),
+    ], overlap=20)
+    assert starts_and_texts(text) == [(587, 1, "client ke report pathate hobe shukrobar")]
+
+
+def test_unmatched_turns_are_cut_at_the_middle_of_the_overlap():
+    text = stitch_segments([
+        (0.0, "[09:45] Speaker 1: prothom kotha\n[09:55] Speaker 1: shesh kotha ta kete gese"),
+        (580.0, "[00:05] Speaker 1: onno kichu\n[00:14] Speaker 1: notun alochona shuru"),
+    ], overlap=20)
+    assert starts_and_texts(text) == [
+        (585, 1, "prothom kotha"),
+        (594, 1, "notun alochona shuru"),
+    ]
+
+
+def test_speakers_are_renumbered_from_matched_turns():
+    text = stitch_segments([
+        (0.0, "[09:45] Speaker 2: ami marketing theke bolchi"),
+        (580.0, "[00:05] Speaker 1: ami marketing theke bolchi\n[00:30] Speaker 1: campaign ready"),
+    ], overlap=20)
+    assert [speaker for _, speaker, _ in starts_and_texts(text)] == [2, 2]
@@ -0,0 +1,22 @@
+import os
+
+# Tests that need Redis use a database of their own, which they empty
+os.environ["REDIS_URL"] = os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+import pytest
+
+
+@pytest.fixture
+def redis_db():
+    """The test Redis database, emptied around the test. Skips the test if Redis is not running."""
+    redis = pytest.importorskip("redis")
+    from app.redis_client import get_redis
+
+    r = get_redis()
+    try:
+        r.ping()
+    except redis.ConnectionError:
+        pytest.skip("Redis is not reachable at TEST_REDIS_URL")
+    r.flushdb()
+    yield r
+    r.flushdb()
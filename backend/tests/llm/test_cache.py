@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from app.llm import cache
+
+
+@pytest.fixture
+def small_cache(redis_db, monkeypatch):
+    monkeypatch.setattr(cache, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(cache, "LLM_CACHE_MAX_BYTES", 300)
+    monkeypatch.setattr(cache, "LLM_CACHE_TTL_SECONDS", 3600)
+    return redis_db
+
+
+def entry_size(text: str) -> int:
+    return len(cache.json.dumps({"text": text, "latency": 1.0}, ensure_ascii=False).encode())
+
+
+def test_put_and_get(small_cache):
+    cache.put("a", "hello", 1.0)
+    assert cache.get("a") == "hello"
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["bytes_stored"] == entry_size("hello")
+
+
+def test_replacing_an_entry_counts_its_size_once(small_cache):
+    cache.put("a", "x" * 10, 1.0)
+    cache.put("a", "x" * 20, 1.0)
+    assert cache.stats()["bytes_stored"] == entry_size("x" * 20)
+
+
+def test_least_recently_used_entries_are_evicted_over_budget(small_cache):
+    cache.put("a", "a" * 100, 1.0)
+    cache.put("b", "b" * 100, 1.0)
+    cache.get("a")  # b is now the least recently used
+    cache.put("c", "c" * 100, 1.0)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes_stored"] == 2 * entry_size("a" * 100)
+
+
+def test_expired_entries_are_dropped_from_the_accounting(small_cache):
+    cache.put("a", "a" * 100, 1.0)
+    cache.put("b", "b" * 100, 1.0)
+    # Both expired: gone from Redis and last used longer than the TTL ago
+    small_cache.delete(cache._ENTRY_PREFIX + "a", cache._ENTRY_PREFIX + "b")
+    small_cache.zadd(cache._INDEX_KEY, {"a": time.time() - 7200, "b": time.time() - 7200})
+
+    cache.put("c", "c" * 100, 1.0)
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["bytes_stored"] == entry_size("c" * 100)
+    assert stats["evictions"] == 0
+
+
+def test_expired_entries_freed_by_eviction_are_not_counted_as_evictions(small_cache):
+    cache.put("a", "a" * 100, 1.0)
+    cache.put("b", "b" * 100, 1.0)
+    small_cache.delete(cache._ENTRY_PREFIX + "a")  # Expired, but used recently
+    cache.put("c", "c" * 100, 1.0)
+    cache.put("d", "d" * 100, 1.0)
+    stats = cache.stats()
+    assert stats["bytes_stored"] == 2 * entry_size("c" * 100)
+    assert stats["evictions"] == 1
+    assert cache.get("b") is None and cache.get("d") is not None
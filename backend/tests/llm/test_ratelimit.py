@@ -0,0 +1,68 @@
+import pytest
+
+from app.llm import ratelimit
+
+MODEL = "test-model"
+
+
+@pytest.fixture
+def limits(redis_db, monkeypatch):
+    monkeypatch.setattr(ratelimit, "GEMINI_RATE_LIMITS", {MODEL: {"rpm": 2, "tpm": 1000}})
+    monkeypatch.setattr(ratelimit, "GEMINI_RATE_LIMIT_MAX_WAIT", 0.0)
+    return redis_db
+
+
+def try_acquire(tokens: int) -> tuple[bool, float]:
+    """One attempt at the buckets: (acquired, seconds to wait)."""
+    rpm, tpm = ratelimit.limits_for(MODEL)
+    acquired, wait = ratelimit.get_redis().eval(ratelimit._ACQUIRE_SCRIPT, 1, ratelimit._bucket_key(MODEL), rpm, tpm, tokens)
+    return bool(int(acquired)), float(wait)
+
+
+def bucket(redis_db) -> dict:
+    return {field: float(value) for field, value in redis_db.hgetall(ratelimit._bucket_key(MODEL)).items()}
+
+
+def test_limits_for_uses_overrides_then_defaults(limits):
+    assert ratelimit.limits_for(MODEL) == (2, 1000)
+    assert ratelimit.limits_for("other-model") == (ratelimit.GEMINI_RPM_LIMIT, ratelimit.GEMINI_TPM_LIMIT)
+
+
+def test_requests_are_limited_per_minute(limits):
+    assert try_acquire(10)[0]
+    assert try_acquire(10)[0]
+    acquired, wait = try_acquire(10)
+    assert not acquired
+    # One request refills in 60 / rpm seconds
+    assert 0 < wait <= 30
+
+
+def test_tokens_are_limited_per_minute(limits):
+    assert try_acquire(900)[0]
+    acquired, wait = try_acquire(200)
+    assert not acquired
+    # The 100 missing tokens refill in 100 * 60 / tpm seconds
+    assert wait == pytest.approx(6, abs=0.1)
+    assert bucket(limits)["tokens"] == pytest.approx(100, abs=2)
+
+
+def test_calls_larger_than_the_bucket_are_capped_to_it(limits):
+    assert try_acquire(5000)[0]
+
+
+def test_acquire_gives_up_after_the_maximum_wait(limits):
+    ratelimit.acquire(MODEL, 10)
+    ratelimit.acquire(MODEL, 10)
+    with pytest.raises(TimeoutError):
+        ratelimit.acquire(MODEL, 10)
+
+
+def test_settle_corrects_the_estimate(limits):
+    ratelimit.acquire(MODEL, 500)
+    ratelimit.settle(MODEL, 500, 200)
+    assert bucket(limits)["tokens"] == pytest.approx(800, abs=2)
+
+
+def test_throttled_empties_the_buckets(limits):
+    ratelimit.throttled(MODEL)
+    assert not try_acquire(1)[0]
@@ -0,0 +1,109 @@
+import pytest
+
+from app.worker import scheduler
+
+
+@pytest.fixture
+def sched(redis_db, monkeypatch):
+    monkeypatch.setattr(scheduler, "SCHED_USER_MAX_IN_FLIGHT", 2)
+    monkeypatch.setattr(scheduler, "SCHED_BULK_AFTER", 3)
+    return redis_db
+
+
+class Starter:
+    """start() for dispatch that records the runs it was given."""
+
+    def __init__(self, result=True):
+        self.result = result
+        self.started = []
+
+    def __call__(self, run_id, priority):
+        self.started.append((run_id, priority))
+        return self.result(run_id) if callable(self.result) else self.result
+
+
+def enqueue(user_id, *run_ids, priority=None):
+    return [scheduler.enqueue_sync(user_id, run_id, priority) for run_id in run_ids]
+
+
+def test_users_take_turns(sched):
+    enqueue("a", "a1", "a2", "a3")
+    enqueue("b", "b1")
+    start = Starter()
+
+    assert scheduler.dispatch(start) == 3
+    assert [run_id for run_id, _ in start.started] == ["a1", "b1", "a2"]
+    # a is at its limit of two runs in flight
+    assert scheduler.user_status("a")["waiting_interactive"] == 1
+    assert scheduler.in_flight("a") == 2
+
+
+def test_released_slots_admit_the_next_run(sched):
+    enqueue("a", "a1", "a2")
+    scheduler.set_user_limit("a", 1)
+    start = Starter()
+
+    assert scheduler.dispatch(start) == 1
+    assert scheduler.dispatch(start) == 0
+    scheduler.release("a", "a1")
+    assert scheduler.dispatch(start) == 1
+    assert [run_id for run_id, _ in start.started] == ["a1", "a2"]
+
+
+def test_user_limits_fall_back_to_the_default(sched):
+    scheduler.set_user_limit("a", 5)
+    assert scheduler.user_limit("a") == 5
+    scheduler.set_user_limit("a", None)
+    assert scheduler.user_limit("a") == 2
+
+
+def test_runs_beyond_the_bulk_threshold_are_bulk(sched):
+    assert enqueue("a", "a1", "a2", "a3", "a4") == ["interactive", "interactive", "interactive", "bulk"]
+    assert enqueue("b", "b1", priority="bulk") == ["bulk"]
+
+
+def test_interactive_runs_are_admitted_first(sched):
+    enqueue("a", "a1", priority="bulk")
+    enqueue("b", "b1")
+    start = Starter()
+
+    assert scheduler.dispatch(start) == 2
+    assert start.started == [("b1", "interactive"), ("a1", "bulk")]
+
+
+def test_runs_with_nothing_to_run_give_their_slot_back(sched):
+    enqueue("a", "a1", "a2", "a3")
+    start = Starter(lambda run_id: run_id != "a1")
+
+    assert scheduler.dispatch(start) == 2
+    assert [run_id for run_id, _ in start.started] == ["a1", "a2", "a3"]
+    assert scheduler.in_flight("a") == 2
+
+
+def test_failed_starts_go_back_to_the_head_of_the_line(sched):
+    enqueue("a", "a1", "a2")
+
+    def start(run_id, priority):
+        raise ConnectionError("broker down")
+
+    with pytest.raises(ConnectionError):
+        scheduler.dispatch(start)
+    assert scheduler.in_flight("a") == 0
+    assert sched.lrange(scheduler.waiting_key("interactive", "a"), 0, -1) == ["a1", "a2"]
+
+    start = Starter()
+    assert scheduler.dispatch(start) == 2
+    assert [run_id for run_id, _ in start.started] == ["a1", "a2"]
+
+
+def test_dispatch_is_skipped_while_another_is_under_way(sched):
+    enqueue("a", "a1")
+    start = Starter()
+    lock = sched.lock(scheduler._LOCK_KEY, timeout=60)
+    assert lock.acquire(blocking=False)
+    try:
+        assert scheduler.dispatch(start) == 0
+        assert start.started == []
+    finally:
+        lock.release()
+    assert scheduler.dispatch(start) == 1
@@ -1,8 +1,46 @@
-import { useState } from 'react';
+import { useState, useEffect } from 'react';
 import ReactMarkdown from 'react-markdown';
+import { audioApi } from '../services/api';
+
+const NOTES_POLL_INTERVAL_MS = 3000;
 
 function MeetingAnalysisDetail({ analysis, onBack }) {
   const [activeTab, setActiveTab] = useState('overview');
+  const [notesMarkdown, setNotesMarkdown] = useState(analysis.notes_markdown);
+  const [notesLoading, setNotesLoading] = useState(false);
+  const [notesError, setNotesError] = useState(null);
+
+  // Notes are generated when first requested, so fetch them when the tab opens
+  useEffect(() => {
+    if (activeTab !== 'markdown' || notesMarkdown) return;
+
+    let cancelled = false;
+    let timer;
+    const fetchNotes = async () => {
+      try {
+        setNotesLoading(true);
+        const data = await audioApi.getAnalysisNotes(analysis.id);
+        if (cancelled) return;
+        if (data.status === 'ready') {
+          setNotesMarkdown(data.notes_markdown);
+          setNotesLoading(false);
+        } else {
+          timer = setTimeout(fetchNotes, NOTES_POLL_INTERVAL_MS);
+        }
+      } catch (err) {
+        if (cancelled) return;
+        console.error('Error fetching notes:', err);
+        setNotesError(err.message || 'Failed to load notes.');
+        setNotesLoading(false);
+      }
+    };
+    fetchNotes();
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [activeTab, notesMarkdown, analysis.id]);
 
   // Extract markdown content from code fence if present
   const extractMarkdown = (markdownText) => {
@@ -17,7 +55,7 @@ function MeetingAnalysisDetail({ analysis, onBack }) {
     return markdownText.trim();
   };
 
-  const cleanMarkdown = extractMarkdown(analysis.notes_markdown);
+  const cleanMarkdown = extractMarkdown(notesMarkdown);
 
   const tabs = [
     { id: 'overview', label: 'Overview', icon: '📋' },
@@ -137,7 +175,7 @@ function MeetingAnalysisDetail({ analysis, onBack }) {
             {activeTab === 'markdown' && (
               <div className="space-y-4">
                 <h2 className="text-2xl font-bold text-gray-900 mb-4">Full Meeting Notes</h2>
-                {analysis.notes_markdown ? (
+                {notesMarkdown ? (
                   <div className="prose prose-lg max-w-none bg-white border border-gray-300 rounded-lg p-8 shadow-sm">
                     <ReactMarkdown
                       components={{
@@ -222,9 +260,16 @@ function MeetingAnalysisDetail({ analysis, onBack }) {
                       {cleanMarkdown}
                     </ReactMarkdown>
                   </div>
+                ) : notesLoading ? (
+                  <div className="bg-gray-50 rounded-lg p-12 text-center border border-gray-200">
+                    <p className="text-gray-500 text-lg">Generating meeting notes...</p>
+                    <p className="text-gray-400 mt-2">
+                      This can take a minute the first time the notes are opened
+                    </p>
+                  </div>
                 ) : (
                   <div className="bg-gray-50 rounded-lg p-12 text-center border border-gray-200">
-                    <p className="text-gray-500 text-lg">No detailed markdown notes available</p>
+                    <p className="text-gray-500 text-lg">{notesError || 'No detailed markdown notes available'}</p>
                     <p className="text-gray-400 mt-2">
                       This analysis may not include formatted notes
                     </p>
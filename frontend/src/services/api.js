@@ -287,6 +287,24 @@ export const audioApi = {
 
     return response.json();
   },
+
+  /**
+   * Markdown notes are generated on first request: the response has
+   * status "generating" (HTTP 202) until they are ready, then "ready".
+   */
+  async getAnalysisNotes(id) {
+    const response = await apiRequest(`${API_BASE_URL}/audios/analyses/${id}/notes`, {
+      method: 'GET',
+      headers: getAuthHeaders(),
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to fetch notes');
+    }
+
+    return response.json();
+  },
 };
 
 // Translation API